@@ -99,6 +99,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    # Responses and generation counters. Must be shared by the web and
+    # worker processes in production, e.g. Redis.
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Signed token revocations. Every process must see the same entries
+    # and none may be evicted before it expires, e.g. Redis with
+    # maxmemory-policy noeviction.
+    'tokens': {
+        'BACKEND': os.environ.get(
+            'TOKEN_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        # A distinct name keeps the local fallback apart from 'default'
+        'LOCATION': os.environ.get('TOKEN_CACHE_LOCATION', 'tokens'),
+        'TIMEOUT': None,
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -139,6 +167,32 @@ MEDIA_URL = '/static/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
+# Stream uploads to temporary files in chunks instead of keeping them
+# in worker memory
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Internal nginx location streaming access controlled media, empty to
+# let Django stream them
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX',
+    '' if DEBUG else '/protected-media/'
+)
+
+# Disk cache of on demand resized art images
+RESIZE_CACHE_DIR = os.environ.get('RESIZE_CACHE_DIR', '/vol/web/resized')
+RESIZE_CACHE_MAX_BYTES = int(
+    os.environ.get('RESIZE_CACHE_MAX_BYTES', 1024 * 1024 * 1024)
+)
+RESIZE_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'RESIZE_ACCEL_REDIRECT_PREFIX',
+    '' if DEBUG else '/resized-images/'
+)
+
+# Partial files of resumable uploads
+UPLOAD_SESSION_DIR = os.environ.get('UPLOAD_SESSION_DIR', '/vol/web/uploads')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -158,7 +212,23 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Collection of comic artists and their artwork',
     'PREPROCESSING_HOOKS': ['core.hooks.custom_preprocessing_hook'],
     'COMPONENT_SPLIT_REQUEST': True,
-    'AUTHENTICATION_WHITELIST': ['rest_framework.authentication.TokenAuthentication']
+    'AUTHENTICATION_WHITELIST': [
+        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
+        'core.authentication.SignedTokenAuthentication',
+    ]
+}
+
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 300,
+    'SHARED': bool(int(os.environ.get('TOKEN_AUTH_CACHE_SHARED', 0))),
+}
+
+SIGNED_TOKENS = {
+    'ENABLED': bool(int(os.environ.get('SIGNED_TOKENS_ENABLED', 0))),
+    'ACCESS_LIFETIME': 5 * 60,
+    'REFRESH_LIFETIME': 7 * 24 * 60 * 60,
 }
 
 CORS_ALLOWED_ORIGINS = [
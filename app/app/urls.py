@@ -23,11 +23,18 @@ from django.conf.urls.static import static
 from django.conf import settings
 
 from rest_framework import routers
+from core.urls import router as core_router
 from user.urls import router as user_router
-from user.api.views import CreateTokenView, ManageUserView
+from user.api.views import (
+    CreateTokenView,
+    ManageUserView,
+    TokenRefreshView,
+    TokenRevokeView
+)
 from portfolio.urls import router as portfolio_router
 
 router = routers.DefaultRouter()
+router.registry.extend(core_router.registry)
 router.registry.extend(user_router.registry)
 router.registry.extend(portfolio_router.registry)
 
@@ -39,6 +46,14 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name='schema'),
         name='swagger-ui'),
     path('api/token/', CreateTokenView.as_view(), name='token'),
+    path(
+        'api/token/refresh/',
+        TokenRefreshView.as_view(),
+        name='token-refresh'),
+    path(
+        'api/token/revoke/',
+        TokenRevokeView.as_view(),
+        name='token-revoke'),
     path('api/me/', ManageUserView.as_view(), name='me'),
     path('api/', include(router.urls)),
 ]
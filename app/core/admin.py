@@ -44,3 +44,14 @@ class UserAdmin(BaseUserAdmin):
 
 
 admin.site.register(models.User, UserAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    """Define the admin pages for background jobs."""
+    ordering = ['-id']
+    list_display = ['id', 'task', 'status', 'attempts', 'updated_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+admin.site.register(models.Job, JobAdmin)
@@ -0,0 +1,18 @@
+"""
+Serializers for the core API
+"""
+from rest_framework import serializers
+
+from core.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for polling background jobs."""
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'task', 'status', 'attempts', 'max_attempts',
+            'progress', 'error', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
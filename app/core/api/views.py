@@ -0,0 +1,26 @@
+"""
+Views for the core API
+"""
+from rest_framework import mixins, viewsets
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+
+from core.api.serializers import JobSerializer
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication
+)
+from core.models import Job
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    View to poll background jobs
+    All endpoints are private
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
+    permission_classes = [IsAdminUser, IsAuthenticated]
@@ -0,0 +1,162 @@
+"""
+Authentication classes for the API
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header
+)
+
+from core.generations import get_generation
+from core.tokens import ACCESS, InvalidToken, decode_token
+from core.tokens import signed_token_settings
+
+
+TOKEN_GENERATION = 'authtoken.token'
+
+
+def token_cache_settings():
+    """Return the TOKEN_AUTH_CACHE settings with their defaults"""
+    options = {
+        'MAX_ENTRIES': 1024,
+        'TIMEOUT': 300,
+        'SHARED': False,
+    }
+    options.update(getattr(settings, 'TOKEN_AUTH_CACHE', {}))
+    return options
+
+
+class LRUCache:
+    """Small thread safe least recently used mapping"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that remembers validated tokens.
+
+    Lookups go through a bounded in-process LRU, then optionally through
+    the shared Django cache, and only then to the database. Entries carry
+    the token generation they were stored with; deleting a token or
+    saving a user moves that generation and makes every entry stale.
+    """
+    local_cache = LRUCache(token_cache_settings()['MAX_ENTRIES'])
+
+    def _shared_key(self, key):
+        return 'token-auth:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def _fresh(self, entry, generation):
+        return (
+            entry is not None
+            and entry['generation'] == generation
+            and entry['expires'] > time.monotonic()
+        )
+
+    def authenticate_credentials(self, key):
+        options = token_cache_settings()
+        generation = get_generation(TOKEN_GENERATION)
+
+        entry = self.local_cache.get(key)
+        if not self._fresh(entry, generation) and options['SHARED']:
+            shared = cache.get(self._shared_key(key))
+            if shared is not None and shared['generation'] == generation:
+                entry = dict(
+                    shared,
+                    expires=time.monotonic() + options['TIMEOUT']
+                )
+                self.local_cache.set(key, entry)
+
+        if not self._fresh(entry, generation):
+            user, token = super().authenticate_credentials(key)
+            entry = {
+                'user': user,
+                'token': token,
+                'generation': generation,
+                'expires': time.monotonic() + options['TIMEOUT'],
+            }
+            self.local_cache.set(key, entry)
+            if options['SHARED']:
+                cache.set(
+                    self._shared_key(key),
+                    {
+                        'user': user,
+                        'token': token,
+                        'generation': generation,
+                    },
+                    options['TIMEOUT']
+                )
+
+        # Each request gets its own user object
+        return copy.copy(entry['user']), entry['token']
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate "Bearer <token>" headers carrying signed access tokens.
+
+    The token holds everything permissions need, so the user is built
+    from it without touching the database. Views needing the stored user
+    must load it themselves.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        if not signed_token_settings()['ENABLED']:
+            return None
+
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                'Invalid token header.'
+            )
+
+        try:
+            payload = decode_token(auth[1].decode(), ACCESS)
+        except (InvalidToken, UnicodeError) as error:
+            raise exceptions.AuthenticationFailed(str(error))
+
+        user = get_user_model()(
+            pk=payload['uid'],
+            is_staff=payload['staff'],
+            is_active=True
+        )
+        user._state.adding = False
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
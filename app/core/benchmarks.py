@@ -0,0 +1,116 @@
+"""
+Base of the bench_* management commands.
+
+A benchmark runs against a throwaway test database and process-local
+caches, so it never writes into the data or the caches of a deployment.
+Run one with e.g. `python manage.py bench_tag_filter --arts 1000000`.
+"""
+import contextlib
+import multiprocessing
+import resource
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-tokens',
+        'TIMEOUT': None,
+    },
+}
+
+
+@contextlib.contextmanager
+def benchmark_database(verbosity=0):
+    """Create a test database and local caches for the duration"""
+    old_name = connection.settings_dict['NAME']
+    with override_settings(CACHES=BENCHMARK_CACHES):
+        connection.creation.create_test_db(
+            verbosity=verbosity,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity)
+
+
+def measure(function, repeat):
+    """Return the median duration of function in milliseconds"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def _report_rss_growth(function, pipe):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    function()
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pipe.send(after - before)
+
+
+def peak_rss_growth(function):
+    """
+    Run function in a forked process and return how much its peak
+    resident memory grew, in KB (Linux reports ru_maxrss in KB).
+    """
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_report_rss_growth,
+        args=(function, sender)
+    )
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f'Measured process exited with {process.exitcode}')
+    return receiver.recv()
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Command running `benchmark(**options)` in a throwaway database.
+    Subclasses add their own arguments and report through `report`.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs of each measurement, the median is reported.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        self.repeat = options['repeat']
+        with benchmark_database(max(options['verbosity'] - 1, 0)):
+            self.benchmark(**options)
+
+    def benchmark(self, **options):
+        raise NotImplementedError
+
+    def section(self, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+
+    def measure(self, label, function):
+        """Time function and report its median duration"""
+        milliseconds = measure(function, self.repeat)
+        self.report(label, f'{milliseconds:.2f} ms')
+        return milliseconds
+
+    def report(self, label, value):
+        self.stdout.write(f'  {label:<40} {value:>14}')
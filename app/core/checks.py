@@ -0,0 +1,52 @@
+"""
+System checks for settings the API cannot run correctly without
+"""
+from django.conf import settings
+from django.core import checks
+
+from core.tokens import REVOCATION_CACHE, signed_token_settings
+from core.utils import is_process_local
+
+
+@checks.register(checks.Tags.security, checks.Tags.caches)
+def check_token_revocation_cache(app_configs, **kwargs):
+    """
+    Signed tokens are revoked through a cache; a cache private to each
+    process would let other processes accept revoked tokens.
+    """
+    if not signed_token_settings()['ENABLED']:
+        return []
+
+    if REVOCATION_CACHE in settings.CACHES and not is_process_local(
+        REVOCATION_CACHE
+    ):
+        return []
+
+    return [checks.Error(
+        f'Signed tokens need a shared "{REVOCATION_CACHE}" cache.',
+        hint=(
+            'Set TOKEN_CACHE_BACKEND and TOKEN_CACHE_LOCATION to a cache '
+            'every process shares and that never evicts live entries, '
+            'such as Redis with maxmemory-policy noeviction.'
+        ),
+        id='core.E001',
+    )]
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_default_cache(app_configs, **kwargs):
+    """
+    Generation counters live in the default cache; kept per process, a
+    write in one worker leaves the others' indexes and token cache stale.
+    """
+    if not is_process_local():
+        return []
+
+    return [checks.Warning(
+        'The default cache is local to each process.',
+        hint=(
+            'Set CACHE_BACKEND and CACHE_LOCATION to a cache shared by '
+            'the web and worker processes, or run a single process.'
+        ),
+        id='core.W001',
+    )]
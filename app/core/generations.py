@@ -0,0 +1,60 @@
+"""
+Per-model generation counters kept in the Django cache.
+
+A generation moves every time a model's data changes, so anything derived
+from that data (in-process indexes, cached responses) can tell it is stale
+by comparing the generation it was built with against the current one.
+Counters are only seen by other processes when the default cache is
+shared between them (see the core.W001 deploy check).
+"""
+import time
+
+from django.core.cache import cache
+
+
+KEY_PREFIX = 'generation'
+
+
+def _generation_key(model):
+    """Return the cache key of a model class or `app_label.model` label"""
+    label = model if isinstance(model, str) else model._meta.label_lower
+    return f'{KEY_PREFIX}:{label.lower()}'
+
+
+def _seed(key):
+    """
+    Start a missing counter from the clock.
+    A counter that got evicted must never repeat a value it had before.
+    """
+    cache.add(key, time.time_ns(), timeout=None)
+    return cache.get(key)
+
+
+def get_generation(model):
+    """Return the current generation of a model"""
+    key = _generation_key(model)
+    value = cache.get(key)
+    if value is None:
+        value = _seed(key)
+
+    return value
+
+
+def get_generations(models):
+    """Return the current generations of several models, in order"""
+    keys = [_generation_key(model) for model in models]
+    values = cache.get_many(keys)
+
+    return [
+        values[key] if key in values else _seed(key)
+        for key in keys
+    ]
+
+
+def bump_generation(model):
+    """Move the generation of a model forward"""
+    key = _generation_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return _seed(key)
@@ -0,0 +1,129 @@
+"""
+Database backed job queue.
+
+A job names a task by dotted path and carries JSON keyword arguments.
+Workers claim jobs with a conditional UPDATE, so several workers can poll
+the same table without locks, and hold them under a lease. A job whose
+worker died is claimed again once its lease expires. Failures are retried
+with exponential backoff until max_attempts is reached. A task can
+report its progress, which is stored on its job for clients to poll.
+"""
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 10 * 60
+RETRY_DELAY = 30
+
+_running = threading.local()
+
+
+def enqueue(task, max_attempts=3, **payload):
+    """Queue a call of the function at dotted path `task`"""
+    return Job.objects.create(
+        task=task,
+        payload=payload,
+        max_attempts=max_attempts
+    )
+
+
+def claimable_jobs(now):
+    """Jobs that are due, or whose worker let the lease expire"""
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_after__lte=now)
+        | Q(status=Job.RUNNING, lease_expires_at__lt=now)
+    )
+
+
+def claim_jobs(limit, lease_seconds=LEASE_SECONDS):
+    """
+    Claim up to `limit` jobs and return their ids.
+    A candidate is only taken if its row still looks the way it did when
+    read, so two workers never claim the same job.
+    """
+    now = timezone.now()
+    candidates = claimable_jobs(now).order_by('run_after', 'id').values(
+        'id', 'status', 'attempts'
+    )[:limit * 2]
+
+    claimed = []
+    for candidate in candidates:
+        updated = Job.objects.filter(
+            pk=candidate['id'],
+            status=candidate['status'],
+            attempts=candidate['attempts'],
+        ).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            updated_at=now,
+        )
+        if updated:
+            claimed.append(candidate['id'])
+            if len(claimed) == limit:
+                break
+
+    return claimed
+
+
+def report_progress(**progress):
+    """
+    Store the progress of the job running in this thread, if any.
+    Reporting also renews the lease, so a long task that keeps reporting
+    is not claimed again by another worker.
+    """
+    job_id = getattr(_running, 'job_id', None)
+    if job_id is not None:
+        now = timezone.now()
+        Job.objects.filter(pk=job_id, status=Job.RUNNING).update(
+            progress=progress,
+            lease_expires_at=now + timedelta(seconds=LEASE_SECONDS),
+            updated_at=now,
+        )
+
+
+def run_job(job_id):
+    """Run a claimed job and record its outcome. Returns the new status."""
+    job = Job.objects.get(pk=job_id)
+
+    _running.job_id = job.pk
+    try:
+        if job.attempts > job.max_attempts:
+            raise RuntimeError('Job exceeded its attempts.')
+        import_string(job.task)(**job.payload)
+    except Exception:
+        logger.exception('Job %s failed', job)
+        if job.attempts < job.max_attempts:
+            status = Job.QUEUED
+            delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+        else:
+            status = Job.FAILED
+            delay = 0
+        Job.objects.filter(pk=job.pk).update(
+            status=status,
+            run_after=timezone.now() + timedelta(seconds=delay),
+            lease_expires_at=None,
+            error=traceback.format_exc(),
+            updated_at=timezone.now(),
+        )
+        return status
+    finally:
+        _running.job_id = None
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.SUCCEEDED,
+        lease_expires_at=None,
+        error='',
+        updated_at=timezone.now(),
+    )
+    return Job.SUCCEEDED
@@ -0,0 +1,68 @@
+"""
+Django command timing the verification of one access token: signed
+tokens against database and cached token lookups.
+use: python manage.py bench_signed_tokens --iterations 10000
+"""
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.test.utils import override_settings
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication
+)
+from core.benchmarks import BenchmarkCommand, measure
+from core.tokens import ACCESS, SALT, decode_token, encode_token
+
+
+class Command(BenchmarkCommand):
+    help = 'Time access token verification for each token kind.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=10000)
+
+    def benchmark(self, **options):
+        user = get_user_model().objects.create_superuser(
+            email='benchmark@example.com',
+            password='benchmark'
+        )
+        key = Token.objects.create(user=user).key
+        iterations = options['iterations']
+
+        with override_settings(SIGNED_TOKENS={'ENABLED': True}):
+            token = encode_token(user, ACCESS)
+            request = APIRequestFactory().get(
+                '/',
+                HTTP_AUTHORIZATION=f'Bearer {token}'
+            )
+            database = TokenAuthentication()
+            cached = CachedTokenAuthentication()
+            signed = SignedTokenAuthentication()
+            verifications = {
+                'signature only': lambda: signing.loads(token, salt=SALT),
+                # Includes the lookup in the (here local) revocation cache
+                'decode_token': lambda: decode_token(token, ACCESS),
+                'SignedTokenAuthentication': lambda: signed.authenticate(
+                    request
+                ),
+                'CachedTokenAuthentication': lambda: (
+                    cached.authenticate_credentials(key)
+                ),
+                'TokenAuthentication': lambda: (
+                    database.authenticate_credentials(key)
+                ),
+            }
+
+            self.section(f'Per verification, {iterations} iterations')
+            for label, verify in verifications.items():
+                milliseconds = measure(
+                    lambda: [verify() for _ in range(iterations)],
+                    self.repeat
+                )
+                microseconds = milliseconds * 1000 / iterations
+                self.report(label, f'{microseconds:.1f} us')
@@ -0,0 +1,88 @@
+"""
+Django command measuring authenticated write throughput with database
+token lookups, the in-process token cache and its shared cache tier.
+use: python manage.py bench_token_auth --requests 2000
+"""
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import CachedTokenAuthentication, token_cache_settings
+from core.benchmarks import BenchmarkCommand
+from portfolio.api.views import TagViewSet
+
+
+STRATEGIES = {
+    'database': (TokenAuthentication, False, False),
+    'in-process cache': (CachedTokenAuthentication, False, False),
+    # Every request misses the local LRU, as in a worker new to the token
+    'shared cache tier': (CachedTokenAuthentication, True, True),
+}
+
+
+class Command(BenchmarkCommand):
+    help = 'Measure tag creations per second for each token lookup.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def benchmark(self, **options):
+        self.user = get_user_model().objects.create_superuser(
+            email='benchmark@example.com',
+            password='benchmark'
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        url = reverse('tag-list')
+        self.created = 0
+
+        for name, (authentication, shared, cold) in STRATEGIES.items():
+            self.section(name)
+            cache_settings = dict(token_cache_settings(), SHARED=shared)
+            with override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                TOKEN_AUTH_CACHE=cache_settings,
+            ), mock.patch.object(
+                TagViewSet,
+                'authentication_classes',
+                [authentication]
+            ):
+                CachedTokenAuthentication.local_cache.clear()
+                # Warm up, filling the caches being measured
+                self.write(client, url, cold)
+
+                requests = options['requests']
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for _ in range(requests):
+                        self.write(client, url, cold)
+                    elapsed = time.perf_counter() - start
+
+            self.report('requests per second', f'{requests / elapsed:.0f}')
+            self.report(
+                'queries per request',
+                f'{len(queries) / requests:.2f}'
+            )
+
+    def write(self, client, url, cold):
+        if cold:
+            CachedTokenAuthentication.local_cache.clear()
+        self.created += 1
+        res = client.post(url, {
+            'name': f'Tag {self.created}',
+            'created_by': self.user.pk,
+        })
+        if res.status_code != 201:
+            raise CommandError(f'Creating a tag failed: {res.content}')
@@ -0,0 +1,107 @@
+"""
+Django command running queued background jobs.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.jobs import LEASE_SECONDS, claim_jobs, run_job
+from core.utils import fork_process_pool
+
+
+def run_pooled_job(job_id):
+    """Entrypoint of pool processes, which reuse their connection"""
+    close_old_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    """Django command to run background jobs."""
+    help = 'Claim queued jobs and run them on a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Pool size; 0 runs jobs in this process.',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once no job is ready instead of polling.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the queue is empty.',
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=LEASE_SECONDS,
+            help='Seconds before a running job is considered abandoned.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['processes'] == 0:
+            self.run_inline(options)
+        else:
+            self.run_pool(options)
+
+    def report(self, job_id, status):
+        self.stdout.write(f'Job {job_id}: {status}')
+
+    def run_inline(self, options):
+        while True:
+            claimed = claim_jobs(1, options['lease'])
+            if not claimed:
+                if options['burst']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            self.report(claimed[0], run_job(claimed[0]))
+
+    def run_pool(self, options):
+        running = {}
+        with fork_process_pool(options['processes']) as pool:
+            try:
+                while True:
+                    free = options['processes'] - len(running)
+                    if free:
+                        for job_id in claim_jobs(free, options['lease']):
+                            future = pool.submit(run_pooled_job, job_id)
+                            running[future] = job_id
+
+                    if not running:
+                        if options['burst']:
+                            return
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, _ = wait(
+                        running,
+                        timeout=options['poll_interval'],
+                        return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        job_id = running.pop(future)
+                        try:
+                            self.report(job_id, future.result())
+                        except Exception as error:
+                            # The job stays running until its lease expires
+                            self.stderr.write(f'Job {job_id}: {error!r}')
+            except BrokenProcessPool:
+                # Claimed jobs are picked up again when their lease expires
+                raise CommandError('A pool process died, restart the worker.')
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping, waiting for running jobs...')
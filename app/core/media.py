@@ -0,0 +1,66 @@
+"""
+Delivery of access controlled media files.
+
+Django checks permissions and answers with an X-Accel-Redirect header;
+nginx then streams the file from an internal location with sendfile, so
+no worker is held while bytes are sent. Without a proxy (development and
+tests) the file is streamed by Django.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.encoding import iri_to_uri
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Renderer letting views return file responses for any Accept.
+    Those bypass rendering, so only error responses reach render(), and
+    they are sent as JSON.
+    """
+    media_type = '*/*'
+    format = ''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return JSONRenderer().render(data)
+
+
+def accel_file_response(name, prefix, open_file):
+    """
+    Return a response sending the file `name`: an X-Accel-Redirect to
+    prefix + name when a prefix is set, else the file from open_file().
+    """
+    content_type = mimetypes.guess_type(name)[0]
+    if prefix:
+        response = HttpResponse(
+            content_type=content_type or 'application/octet-stream'
+        )
+        response['X-Accel-Redirect'] = iri_to_uri(
+            prefix.rstrip('/') + '/' + name
+        )
+    else:
+        response = FileResponse(open_file(), content_type=content_type)
+
+    response['Content-Disposition'] = (
+        f'inline; filename="{os.path.basename(name)}"'
+    )
+    return response
+
+
+def protected_media_response(field_file):
+    """Return a response delivering a stored file to an authorized user"""
+    response = accel_file_response(
+        field_file.name,
+        settings.MEDIA_ACCEL_REDIRECT_PREFIX,
+        lambda: field_file.storage.open(field_file.name, 'rb')
+    )
+    # Stored names never change content, only access can
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,207 @@
+"""
+Reusable viewset mixins
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_http_date_safe
+
+from rest_framework import serializers, status
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from core.generations import get_generations
+from core.utils import if_none_match
+
+
+class QueryPlanMixin:
+    """
+    Add select_related and prefetch_related lookups to a queryset
+    based on the fields the action's serializer is going to render.
+    """
+    unplanned_actions = ('destroy',)
+
+    def get_query_plan(self):
+        """Return the (select_related, prefetch_related) lookups needed"""
+        select, prefetch = [], []
+        if self.action in self.unplanned_actions:
+            return select, prefetch
+
+        for field in self.get_serializer().fields.values():
+            if field.write_only or field.source == '*':
+                continue
+            if isinstance(
+                field,
+                (ManyRelatedField, serializers.ListSerializer)
+            ):
+                prefetch.append('__'.join(field.source_attrs))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                # Primary keys are read from the local `<field>_id` column.
+                continue
+            elif isinstance(
+                field,
+                (serializers.RelatedField, serializers.BaseSerializer)
+            ):
+                select.append('__'.join(field.source_attrs))
+
+        return select, prefetch
+
+    def plan_queryset(self, queryset):
+        """Apply the query plan of the current action to a queryset"""
+        select, prefetch = self.get_query_plan()
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+
+        return queryset
+
+
+class CachedResponseMixin:
+    """
+    Cache the data of list and retrieve responses.
+    Keys hold the generation of every model in `cache_models`, so a write
+    to any of them makes the previous entries unreachable at once.
+    Generations only move for every process when the cache is shared,
+    which the core.W001 deploy check asks for.
+    """
+    cache_models = ()
+    cache_timeout = 60 * 60
+    cache_key_prefix = 'response'
+
+    def get_response_cache_key(self, request):
+        """Key on host, path, normalized query params and generations"""
+        params = sorted(
+            (name, value)
+            for name in request.query_params
+            for value in request.query_params.getlist(name)
+            if value != ''
+        )
+        raw = json.dumps([
+            request.scheme,
+            request.get_host(),
+            request.path,
+            params,
+            get_generations(self.cache_models),
+        ])
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f'{self.cache_key_prefix}:{self.basename}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return a cached response or run the handler and cache its data"""
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """
+    Add strong ETag and Last-Modified validators to list and retrieve
+    responses and answer 304 Not Modified when the client's copy is
+    current. Validators come from one MAX(updated_at)/COUNT(*) aggregate,
+    the body is never serialized for a 304.
+    Lists only get an ETag: deleting or hiding rows changes the count
+    but not MAX(updated_at), so a date alone can not validate them.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_validators(self, request, queryset):
+        """Return the etag, last modification and row count of a queryset"""
+        state = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field),
+            count=Count('pk'),
+        )
+        last_modified = state['last_modified']
+        params = sorted(
+            (name, value)
+            for name in request.query_params
+            for value in request.query_params.getlist(name)
+        )
+        raw = json.dumps([
+            request.path,
+            params,
+            request.accepted_media_type,
+            last_modified.isoformat() if last_modified else None,
+            state['count'],
+        ])
+        etag = '"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+        return etag, last_modified, state['count']
+
+    def is_not_modified(self, request, etag, last_modified):
+        """
+        Evaluate If-None-Match, or If-Modified-Since when it is absent and
+        a Last-Modified validator was given
+        """
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            return if_none_match(request, etag)
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE')
+        )
+        if if_modified_since is None or last_modified is None:
+            return False
+        return int(last_modified.timestamp()) <= if_modified_since
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Answer 304 when the validators match, else run the handler"""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                queryset = queryset.filter(
+                    **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+                )
+            except (TypeError, ValueError, ValidationError):
+                # A malformed lookup value, get_object() answers 404
+                return handler(request, *args, **kwargs)
+        etag, last_modified, count = self.get_validators(request, queryset)
+        if self.action == 'retrieve' and not count:
+            # Let the handler answer 404
+            return handler(request, *args, **kwargs)
+        if self.action != 'retrieve':
+            last_modified = None
+
+        headers = {'ETag': etag}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified.timestamp())
+        if self.is_not_modified(request, etag, last_modified):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers=headers
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in headers.items():
+                response[header] = value
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,69 @@
+"""
+Pagination classes for the API
+"""
+from rest_framework import pagination
+
+
+class KeysetCursorPagination(pagination.CursorPagination):
+    """
+    Cursor pagination over the primary key.
+    Each page is fetched with `id > cursor` so the cost does not
+    depend on how deep the client is, and no COUNT(*) is run.
+    """
+    ordering = 'id'
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+
+class LimitOffsetOrCursorPagination(pagination.LimitOffsetPagination):
+    """
+    Limit/offset pagination with an opt-in keyset cursor mode.
+    Use `?pagination=cursor` to get the first page, then follow the
+    opaque `next`/`previous` links.
+    """
+    mode_query_param = 'pagination'
+    cursor_pagination_class = KeysetCursorPagination
+    cursor_paginator = None
+
+    def use_cursor(self, request):
+        """Check if the request asks for cursor pagination"""
+        cursor_class = self.cursor_pagination_class
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Set to `cursor` to use keyset pagination.',
+            'schema': {'type': 'string', 'enum': ['cursor']},
+        })
+        parameters.append({
+            'name': self.cursor_pagination_class.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Opaque cursor from a previous `next` link.',
+            'schema': {'type': 'string'},
+        })
+
+        return parameters
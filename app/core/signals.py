@@ -0,0 +1,61 @@
+"""
+Signal handlers invalidating cached authentication
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core.authentication import TOKEN_GENERATION
+from core.generations import bump_generation
+from core.tokens import revoke_user_tokens
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, **kwargs):
+    bump_generation(TOKEN_GENERATION)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, created, update_fields=None, **kwargs):
+    """
+    Cached tokens hold a copy of their user, so flags like is_active and
+    is_staff must not outlive a save. Logins only touch last_login.
+    """
+    if created or (update_fields and set(update_fields) == {'last_login'}):
+        return
+
+    bump_generation(TOKEN_GENERATION)
+
+
+@receiver(pre_save, sender=get_user_model())
+def user_flags_before_save(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored flags signed tokens were issued with"""
+    if instance.pk is None or (
+        update_fields and not {'is_active', 'is_staff'} & set(update_fields)
+    ):
+        return
+
+    instance._stored_flags = sender.objects.filter(
+        pk=instance.pk
+    ).values_list('is_active', 'is_staff').first()
+
+
+@receiver(post_save, sender=get_user_model())
+def user_flags_saved(sender, instance, **kwargs):
+    """
+    Signed tokens copy the staff flag and are not checked against the
+    database, so they are revoked when either flag changes.
+    """
+    stored = getattr(instance, '_stored_flags', None)
+    instance._stored_flags = None
+    current = (instance.is_active, instance.is_staff)
+    if stored is not None and stored != current:
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
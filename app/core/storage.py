@@ -0,0 +1,116 @@
+"""
+Content addressed file storage.
+
+Files are named by the sha256 of their bytes and sharded into two levels
+of directories, so "uploads/art/x.jpg" is stored as
+"uploads/art/ab/cd/abcd....jpg". Saving bytes that are already stored
+only adds a reference, and a file is removed once its last reference is
+deleted. Names not created by this storage are handled as plain files.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+from core.models import StoredFile
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage deduplicating files by content hash"""
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content, they never need a suffix
+        return name
+
+    def hashed_name(self, name, digest):
+        """Return the sharded name of content with `digest` saved as name"""
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory,
+            digest[:2],
+            digest[2:4],
+            f'{digest}{extension}'
+        )
+
+    def _spool(self, name, content):
+        """Copy content to a temporary file next to its destination"""
+        directory = self.path(os.path.dirname(name))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        file = tempfile.NamedTemporaryFile(
+            dir=directory,
+            prefix='.upload-',
+            delete=False
+        )
+        with file:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                digest.update(chunk)
+                file.write(chunk)
+        return file.name, digest.hexdigest()
+
+    def _save(self, name, content):
+        temporary, digest = self._spool(name, content)
+        name = self.hashed_name(name, digest)
+        try:
+            with transaction.atomic():
+                stored = self._lock(name, create=True)
+                if self.exists(name):
+                    os.remove(temporary)
+                    # A fresh mtime keeps gc_media's grace period from
+                    # collecting content that is being referenced again
+                    os.utime(self.path(name))
+                else:
+                    os.makedirs(
+                        os.path.dirname(self.path(name)),
+                        exist_ok=True
+                    )
+                    os.replace(temporary, self.path(name))
+                    if self.file_permissions_mode is not None:
+                        os.chmod(self.path(name), self.file_permissions_mode)
+                stored.references += 1
+                stored.save(update_fields=['references'])
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+        return name
+
+    def _lock(self, name, create=False):
+        """Return the locked reference row of a name, or None"""
+        while True:
+            if create:
+                StoredFile.objects.get_or_create(name=name)
+            stored = StoredFile.objects.select_for_update().filter(
+                name=name
+            ).first()
+            if stored is not None or not create:
+                return stored
+            # Deleted between creation and locking, try again
+
+    def delete(self, name):
+        if not name:
+            raise ValueError('The name must be given to delete().')
+
+        with transaction.atomic():
+            stored = self._lock(name)
+            if stored is not None and stored.references > 1:
+                stored.references -= 1
+                stored.save(update_fields=['references'])
+                return
+
+            if stored is not None:
+                stored.delete()
+            super().delete(name)
+
+
+image_storage = ContentAddressedStorage()
+
+
+def content_addressed_storage():
+    """Storage of uploaded images, used as a callable field storage"""
+    return image_storage
@@ -0,0 +1,85 @@
+"""
+Test cached token authentication
+"""
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import CachedTokenAuthentication, LRUCache
+
+
+ME_URL = reverse('me')
+TAGS_URL = reverse('tag-list')
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test the bounded in-process cache"""
+
+    def test_least_recently_used_entry_is_evicted(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test tokens are served from cache and invalidated"""
+
+    def setUp(self):
+        CachedTokenAuthentication.local_cache.clear()
+        self.user = get_user_model().objects.create_superuser(
+            'admin@example.com',
+            'testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeated_requests_skip_token_lookup(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_flag_changes_apply_immediately(self):
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.user.is_staff = False
+        self.user.save()
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE={'SHARED': True})
+    def test_shared_tier_serves_other_processes(self):
+        """Test an empty local cache is filled from the shared cache"""
+        self.client.get(ME_URL)
+        CachedTokenAuthentication.local_cache.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,40 @@
+"""
+Test the core benchmark commands run on small data sets
+"""
+import contextlib
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BenchmarkCommandTests(TestCase):
+    """Test each benchmark completes and reports its measurements"""
+
+    def setUp(self):
+        # The tests already run in a test database
+        patch = mock.patch(
+            'core.benchmarks.benchmark_database',
+            contextlib.nullcontext
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def _bench(self, name, **options):
+        out = StringIO()
+        call_command(name, repeat=1, stdout=out, **options)
+        return out.getvalue()
+
+    def test_bench_token_auth(self):
+        output = self._bench('bench_token_auth', requests=5)
+
+        self.assertIn('shared cache tier', output)
+        self.assertIn('requests per second', output)
+        self.assertIn('queries per request', output)
+
+    def test_bench_signed_tokens(self):
+        output = self._bench('bench_signed_tokens', iterations=5)
+
+        self.assertIn('SignedTokenAuthentication', output)
+        self.assertIn('TokenAuthentication', output)
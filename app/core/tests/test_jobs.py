@@ -0,0 +1,107 @@
+"""
+Test the database backed job queue
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.jobs import claim_jobs, enqueue, report_progress, run_job
+from core.models import Job
+
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def explode():
+    raise ValueError('boom')
+
+
+def progress(steps):
+    for step in range(1, steps + 1):
+        report_progress(done=step, total=steps)
+
+
+class JobQueueTests(TestCase):
+    """Test claiming, retrying and recovering jobs"""
+
+    def setUp(self):
+        calls.clear()
+
+    def _work(self):
+        call_command('worker', processes=0, burst=True, stdout=StringIO())
+
+    def test_worker_runs_queued_jobs(self):
+        job = enqueue('core.tests.test_jobs.record', value=7)
+
+        self._work()
+
+        job.refresh_from_db()
+        self.assertEqual(calls, [7])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_jobs_are_claimed_once(self):
+        enqueue('core.tests.test_jobs.record', value=1)
+        enqueue('core.tests.test_jobs.record', value=2)
+
+        first = claim_jobs(1)
+        second = claim_jobs(5)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first, second)
+        self.assertEqual(claim_jobs(5), [])
+
+    def test_failed_jobs_are_retried_then_failed(self):
+        job = enqueue('core.tests.test_jobs.explode', max_attempts=2)
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self._work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('boom', job.error)
+        self.assertGreater(job.run_after, timezone.now())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self._work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_abandoned_jobs_are_recovered(self):
+        """Test a running job whose lease expired is claimed again"""
+        job = enqueue('core.tests.test_jobs.record', value=3)
+        claim_jobs(1)
+        self.assertEqual(claim_jobs(1), [])
+
+        Job.objects.filter(pk=job.pk).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(claim_jobs(1), [job.pk])
+        self.assertEqual(run_job(job.pk), Job.SUCCEEDED)
+        self.assertEqual(calls, [3])
+
+    def test_progress_is_reported(self):
+        job = enqueue('core.tests.test_jobs.progress', steps=3)
+
+        self._work()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.progress, {'done': 3, 'total': 3})
+
+    def test_progress_outside_jobs_is_ignored(self):
+        job = enqueue('core.tests.test_jobs.record', value=4)
+
+        report_progress(done=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.progress, {})
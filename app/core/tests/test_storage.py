@@ -0,0 +1,68 @@
+"""
+Test the content addressed storage
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from core.models import StoredFile
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test naming, deduplication and reference counting"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def test_files_are_named_by_content(self):
+        digest = hashlib.sha256(b'pixels').hexdigest()
+
+        name = self.storage.save('uploads/art/x.JPG', ContentFile(b'pixels'))
+
+        self.assertEqual(
+            name,
+            f'uploads/art/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        )
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'pixels')
+        self.assertEqual(
+            os.listdir(self.storage.path('uploads/art')),
+            [digest[:2]]
+        )
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save('uploads/art/a.png', ContentFile(b'same'))
+        second = self.storage.save('uploads/art/b.png', ContentFile(b'same'))
+        other = self.storage.save('uploads/art/c.png', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(StoredFile.objects.get(name=first).references, 2)
+
+    def test_file_is_deleted_with_its_last_reference(self):
+        name = self.storage.save('uploads/a.png', ContentFile(b'same'))
+        self.storage.save('uploads/b.png', ContentFile(b'same'))
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_plain_files_are_deleted(self):
+        """Test files saved before the storage was used can be deleted"""
+        path = self.storage.path('uploads/legacy.png')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as file:
+            file.write(b'old')
+
+        self.storage.delete('uploads/legacy.png')
+
+        self.assertFalse(os.path.exists(path))
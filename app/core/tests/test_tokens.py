@@ -0,0 +1,166 @@
+"""
+Test signed access tokens
+"""
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import tokens
+from core.checks import check_token_revocation_cache
+
+
+TOKEN_URL = reverse('token')
+REFRESH_URL = reverse('token-refresh')
+REVOKE_URL = reverse('token-revoke')
+ME_URL = reverse('me')
+TAGS_URL = reverse('tag-list')
+
+
+@override_settings(SIGNED_TOKENS={'ENABLED': True})
+class SignedTokenTests(TestCase):
+    """Test issuing, verifying, refreshing and revoking signed tokens"""
+
+    def setUp(self):
+        cache.clear()
+        tokens.revocations().clear()
+        self.user = get_user_model().objects.create_superuser(
+            'admin@example.com',
+            'testpass123'
+        )
+        self.client = APIClient()
+        res = self.client.post(TOKEN_URL, {
+            'email': 'admin@example.com',
+            'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.pair = res.data
+
+    def _authenticate(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_access_token_is_verified_without_queries(self):
+        self.assertIn('access', self.pair)
+        self.assertIn('refresh', self.pair)
+        self._authenticate(self.pair['access'])
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user_table = get_user_model()._meta.db_table
+        for query in queries.captured_queries:
+            self.assertNotIn(user_table, query['sql'])
+            self.assertNotIn('authtoken', query['sql'])
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_and_misused_tokens_are_rejected(self):
+        self._authenticate(self.pair['access'] + 'x')
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self._authenticate(self.pair['refresh'])
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.post(REFRESH_URL, {'refresh': self.pair['access']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_token_is_rejected(self):
+        self._authenticate(self.pair['access'])
+        later = time.time() + tokens.signed_token_settings()['ACCESS_LIFETIME']
+
+        with mock.patch('core.tokens.time.time', return_value=later + 1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_the_pair(self):
+        res = self.client.post(REFRESH_URL, {'refresh': self.pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self._authenticate(res.data['access'])
+        self.assertEqual(
+            self.client.get(ME_URL).status_code,
+            status.HTTP_200_OK
+        )
+
+        res = self.client.post(REFRESH_URL, {'refresh': self.pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_refresh_tokens_are_claimed_once(self):
+        """Test only one of two concurrent refreshes can use the token"""
+        payload = tokens.decode_token(self.pair['refresh'], tokens.REFRESH)
+
+        self.assertTrue(tokens.claim_token(payload))
+        self.assertFalse(tokens.claim_token(payload))
+        res = self.client.post(REFRESH_URL, {'refresh': self.pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revocations_survive_default_cache_eviction(self):
+        self.client.post(REVOKE_URL, {'refresh': self.pair['refresh']})
+
+        cache.clear()
+        res = self.client.post(REFRESH_URL, {'refresh': self.pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_process_local_revocation_cache_is_refused(self):
+        self.assertEqual(
+            [error.id for error in check_token_revocation_cache(None)],
+            ['core.E001']
+        )
+
+        caches = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'tokens': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': '/tmp/revocations',
+            },
+        }
+        with override_settings(CACHES=caches):
+            self.assertEqual(check_token_revocation_cache(None), [])
+        with override_settings(SIGNED_TOKENS={'ENABLED': False}):
+            self.assertEqual(check_token_revocation_cache(None), [])
+
+    def test_revoked_refresh_token_is_rejected(self):
+        res = self.client.post(REVOKE_URL, {'refresh': self.pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.client.post(REFRESH_URL, {'refresh': self.pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flag_changes_revoke_issued_tokens(self):
+        self._authenticate(self.pair['access'])
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post(REFRESH_URL, {'refresh': self.pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, {
+            'email': 'admin@example.com',
+            'password': 'testpass123',
+        })
+        self._authenticate(res.data['access'])
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(SIGNED_TOKENS={'ENABLED': False})
+    def test_bearer_tokens_are_ignored_when_disabled(self):
+        self._authenticate(self.pair['access'])
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,132 @@
+"""
+Short-lived HMAC signed access tokens.
+
+Tokens carry the user id and staff flag, so verifying one needs no
+database access. Refresh tokens are exchanged for new pairs, and
+revocations are kept in the `tokens` cache until the token would expire
+anyway. That cache must be shared by every process and must not evict
+live entries, or a revoked token would be accepted again.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+
+SALT = 'core.tokens'
+ACCESS = 'access'
+REFRESH = 'refresh'
+REVOCATION_CACHE = 'tokens'
+
+
+class InvalidToken(Exception):
+    """Raised when a token is malformed, expired, revoked or misused"""
+
+
+def signed_token_settings():
+    """Return the SIGNED_TOKENS settings with their defaults"""
+    options = {
+        'ENABLED': False,
+        'ACCESS_LIFETIME': 5 * 60,
+        'REFRESH_LIFETIME': 7 * 24 * 60 * 60,
+    }
+    options.update(getattr(settings, 'SIGNED_TOKENS', {}))
+    return options
+
+
+def revocations():
+    """Return the cache holding revoked token ids and user cutoffs"""
+    return caches[REVOCATION_CACHE]
+
+
+def _revoked_key(jti):
+    return f'revoked-token:{jti}'
+
+
+def _not_before_key(user_id):
+    return f'tokens-not-before:{user_id}'
+
+
+def encode_token(user, kind):
+    """Return a signed token of the given kind for a user"""
+    lifetime = signed_token_settings()[f'{kind.upper()}_LIFETIME']
+    now = time.time()
+    payload = {
+        'uid': user.pk,
+        'staff': user.is_staff,
+        'typ': kind,
+        'jti': uuid.uuid4().hex,
+        'iat': now,
+        'exp': int(now) + lifetime,
+    }
+    return signing.dumps(payload, salt=SALT)
+
+
+def issue_tokens(user):
+    """Return a new access and refresh token pair"""
+    return {
+        ACCESS: encode_token(user, ACCESS),
+        REFRESH: encode_token(user, REFRESH),
+    }
+
+
+def decode_token(token, kind):
+    """Verify a token and return its payload"""
+    try:
+        payload = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        raise InvalidToken('Invalid token.')
+
+    if payload.get('typ') != kind:
+        raise InvalidToken(f'Expected an {kind} token.')
+    if payload['exp'] <= time.time():
+        raise InvalidToken('Token has expired.')
+
+    revoked = revocations().get_many([
+        _revoked_key(payload['jti']),
+        _not_before_key(payload['uid']),
+    ])
+    not_before = revoked.get(_not_before_key(payload['uid']))
+    if _revoked_key(payload['jti']) in revoked or (
+        not_before is not None and payload['iat'] < not_before
+    ):
+        raise InvalidToken('Token has been revoked.')
+
+    return payload
+
+
+def _remaining_lifetime(payload):
+    return max(int(payload['exp'] - time.time()), 1)
+
+
+def revoke_token(payload):
+    """Add a token to the revocation list until it expires"""
+    revocations().set(
+        _revoked_key(payload['jti']),
+        True,
+        _remaining_lifetime(payload)
+    )
+
+
+def claim_token(payload):
+    """
+    Use up a single use token. Returns False when it was already used or
+    revoked; the check and the write are one atomic add, so concurrent
+    claims of the same token cannot both succeed.
+    """
+    return revocations().add(
+        _revoked_key(payload['jti']),
+        True,
+        _remaining_lifetime(payload)
+    )
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to a user until now"""
+    revocations().set(
+        _not_before_key(user_id),
+        time.time(),
+        signed_token_settings()['REFRESH_LIFETIME']
+    )
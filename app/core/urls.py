@@ -0,0 +1,12 @@
+"""
+URL mappings for the core API.
+"""
+from rest_framework import routers
+
+from core.api.views import JobViewSet
+
+router = routers.SimpleRouter()
+
+router.register(r'jobs', JobViewSet)
+
+urlpatterns = router.urls
@@ -1,3 +1,62 @@
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.utils.http import parse_etags
+
+
 def normalize_name(str):
     """Auxiliar function to captalize the first letters of a name"""
     return str.lower().strip().title()
+
+
+def name_trigrams(name):
+    """Return the set of lowercase 3-character substrings of a name"""
+    name = name.lower()
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def is_process_local(alias=DEFAULT_CACHE_ALIAS):
+    """Whether a cache keeps its entries inside this process"""
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def if_none_match(request, etag):
+    """
+    Whether the If-None-Match header of a request lists an etag, weakly
+    compared as GET and HEAD require, or is "*"
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = [
+        tag[2:] if tag.startswith('W/') else tag
+        for tag in parse_etags(header)
+    ]
+    return '*' in etags or etag in etags
+
+
+def _ignore_interrupt():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def fork_process_pool(processes):
+    """
+    Return a started ProcessPoolExecutor safe to use with Django.
+    Database connections are closed before forking so no process shares
+    the parent's sockets, and every process is started before the parent
+    reconnects. Ctrl+C is left to the parent.
+    """
+    connections.close_all()
+    pool = ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_ignore_interrupt
+    )
+    pool.submit(os.getpid).result()
+    return pool
@@ -0,0 +1,225 @@
+"""
+Query filters for the portfolio API.
+
+Arts can be filtered with boolean tag expressions.
+Grammar (keywords are case insensitive):
+    expr   := term ('OR' term)*
+    term   := factor ('AND' factor)*
+    factor := 'NOT' factor | '(' expr ')' | <tag id>
+
+Example: `3 AND 7 AND NOT 9`
+"""
+import re
+
+from django.db.models import Count, Exists, OuterRef, Q
+
+from core.utils import name_trigrams
+from portfolio.fuzzy import MAX_DISTANCE, fuzzy_name_ids
+from portfolio.models import Art
+
+
+MAX_TERMS = 32
+# Bounds the recursion of the parser and of the Q compiler
+MAX_DEPTH = 32
+
+TOKEN_RE = re.compile(r'\s*(?:(\d+)|(\()|(\))|([A-Za-z]+))')
+
+
+class TagQueryError(ValueError):
+    """Raised when a tag expression can not be parsed"""
+
+
+def tokenize(text):
+    """Split a tag expression into tokens"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if not match:
+            raise TagQueryError(f'Unexpected character at {position}.')
+        number, opening, closing, word = match.groups()
+        if number:
+            tokens.append(('tag', int(number)))
+        elif opening:
+            tokens.append(('(', None))
+        elif closing:
+            tokens.append((')', None))
+        elif word.upper() in ('AND', 'OR', 'NOT'):
+            tokens.append((word.upper(), None))
+        else:
+            raise TagQueryError(f'Unknown keyword "{word}".')
+        position = match.end()
+
+    return tokens
+
+
+class Parser:
+    """Recursive descent parser producing a small tuple AST"""
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.depth = 0
+        terms = sum(1 for kind, _ in self.tokens if kind == 'tag')
+        if terms > MAX_TERMS:
+            raise TagQueryError(f'At most {MAX_TERMS} tags are allowed.')
+
+    def parse(self):
+        if not self.tokens:
+            raise TagQueryError('Empty tag expression.')
+        node = self.expr()
+        if self.position != len(self.tokens):
+            raise TagQueryError('Unexpected trailing tokens.')
+
+        return node
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+
+        return None
+
+    def take(self, kind):
+        if self.peek() != kind:
+            raise TagQueryError(f'Expected {kind}.')
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expr(self):
+        children = [self.term()]
+        while self.peek() == 'OR':
+            self.take('OR')
+            children.append(self.term())
+
+        return children[0] if len(children) == 1 else ('or', children)
+
+    def term(self):
+        children = [self.factor()]
+        while self.peek() == 'AND':
+            self.take('AND')
+            children.append(self.factor())
+
+        return children[0] if len(children) == 1 else ('and', children)
+
+    def factor(self):
+        kind = self.peek()
+        if kind not in ('NOT', '('):
+            return self.take('tag')
+
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise TagQueryError(
+                f'Expressions can be nested at most {MAX_DEPTH} deep.'
+            )
+        if kind == 'NOT':
+            self.take('NOT')
+            node = ('not', self.factor())
+        else:
+            self.take('(')
+            node = self.expr()
+            self.take(')')
+        self.depth -= 1
+
+        return node
+
+
+def parse_tag_query(text):
+    """Parse a tag expression into a tuple AST"""
+    return Parser(text).parse()
+
+
+def has_any_tag(tag_ids):
+    """Semi-join: the art has at least one of the tags"""
+    art_tags = Art.tags.through.objects.filter(
+        art_id=OuterRef('pk'),
+        tag_id__in=tag_ids
+    )
+    return Q(Exists(art_tags))
+
+
+def has_all_tags(tag_ids):
+    """The art has every tag, using GROUP BY / HAVING COUNT"""
+    if len(tag_ids) == 1:
+        return has_any_tag(tag_ids)
+
+    matching = Art.tags.through.objects.filter(
+        tag_id__in=tag_ids
+    ).values('art_id').annotate(
+        matched=Count('tag_id')
+    ).filter(matched=len(tag_ids)).values('art_id')
+    return Q(pk__in=matching)
+
+
+def compile_tag_query(node):
+    """Compile a tag expression AST into a Q object over Art"""
+    kind, value = node
+    if kind == 'tag':
+        return has_any_tag([value])
+    if kind == 'not':
+        # NOT EXISTS / NOT IN, i.e. an anti-join
+        return ~compile_tag_query(value)
+
+    tag_ids = sorted({child[1] for child in value if child[0] == 'tag'})
+    others = [compile_tag_query(c) for c in value if c[0] != 'tag']
+    if kind == 'and':
+        conditions = [has_all_tags(tag_ids)] if tag_ids else []
+        conditions += others
+        combined = Q()
+        for condition in conditions:
+            combined &= condition
+        return combined
+
+    conditions = [has_any_tag(tag_ids)] if tag_ids else []
+    conditions += others
+    combined = conditions[0]
+    for condition in conditions[1:]:
+        combined |= condition
+    return combined
+
+
+def filter_by_tag_query(queryset, text):
+    """Filter an Art queryset with a tag expression"""
+    return queryset.filter(compile_tag_query(parse_tag_query(text)))
+
+
+def filter_name_contains(queryset, value):
+    """
+    Case insensitive substring filter on `name` backed by the trigram index.
+    Names holding every trigram of the value are candidates, which are
+    then checked with icontains. Values shorter than a trigram fall back
+    to a plain icontains scan.
+    """
+    trigrams = name_trigrams(value)
+    if trigrams:
+        trigram_field = queryset.model.name_trigrams.field
+        candidates = trigram_field.model.objects.filter(
+            trigram__in=trigrams
+        ).values(trigram_field.attname).annotate(
+            matched=Count('trigram')
+        ).filter(matched=len(trigrams)).values(trigram_field.attname)
+        queryset = queryset.filter(pk__in=candidates)
+
+    return queryset.filter(name__icontains=value)
+
+
+def parse_fuzzy_distance(value):
+    """Return the edit distance asked by a `fuzzy` query parameter"""
+    try:
+        distance = int(value)
+    except ValueError:
+        distance = None
+    if distance is None or not 1 <= distance <= MAX_DISTANCE:
+        raise ValueError(
+            f'Must be an edit distance between 1 and {MAX_DISTANCE}.'
+        )
+
+    return distance
+
+
+def filter_name_fuzzy(queryset, value, max_distance):
+    """Typo tolerant name filter served by the in-process name index"""
+    return queryset.filter(
+        pk__in=fuzzy_name_ids(queryset.model, value, max_distance)
+    )
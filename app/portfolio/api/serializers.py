@@ -1,6 +1,63 @@
 from rest_framework import serializers
 
+from drf_spectacular.utils import extend_schema_field
+
 from portfolio import models
+from portfolio.images import inspect_upload, variant_urls
+
+
+@extend_schema_field({
+    'type': 'object',
+    'nullable': True,
+    'additionalProperties': {
+        'type': 'object',
+        'additionalProperties': {'type': 'string', 'format': 'uri'},
+    },
+})
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of the sized variants of an image, by variant and format"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'image')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        urls = variant_urls(value)
+        request = self.context.get('request')
+        if urls is None or request is None:
+            return urls
+
+        return {
+            variant: {
+                extension: request.build_absolute_uri(url)
+                for extension, url in formats.items()
+            }
+            for variant, formats in urls.items()
+        }
+
+
+class ImageUploadField(serializers.FileField):
+    """
+    Image field validated from the file header only.
+    Unlike ImageField, the image is never fully decoded here.
+    """
+
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        try:
+            inspect_upload(file)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error), code='invalid_image')
+
+        return file
+
+
+IMAGE_METADATA_FIELDS = [
+    'image_width',
+    'image_height',
+    'image_bytes',
+    'image_blurhash',
+]
 
 
 class CharacterSerializer(serializers.ModelSerializer):
@@ -20,9 +77,13 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class ArtistSerializer(serializers.ModelSerializer):
+    image = ImageUploadField(required=False, allow_null=True)
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = models.Artist
-        fields = '__all__'
+        exclude = ['hidden']
+        read_only_fields = IMAGE_METADATA_FIELDS
         extra_kwargs = {
             'slug': {'required': False}
         }
@@ -30,33 +91,64 @@ class ArtistSerializer(serializers.ModelSerializer):
 
 class ArtistImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to artists."""
+    image = ImageUploadField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = models.Artist
-        fields = ['id', 'image']
-        read_only_fields = ['id']
-        extra_kwargs = {
-            'image': {'required': True}
-        }
+        fields = ['id', 'image', 'image_variants', *IMAGE_METADATA_FIELDS]
+        read_only_fields = ['id', *IMAGE_METADATA_FIELDS]
 
 
 class ArtSerializer(serializers.ModelSerializer):
+    image = ImageUploadField(required=False, allow_null=True)
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = models.Art
         fields = '__all__'
+        read_only_fields = IMAGE_METADATA_FIELDS
         extra_kwargs = {
             'tags': {'required': False},
             'characters': {'required': False},
+            # No new artworks for artists being deleted
+            'artist': {'queryset': models.Artist.objects.filter(hidden=False)},
+            'phash': {'read_only': True},
+            'palette': {'read_only': True},
         }
 
 
+class SimilarArtSerializer(ArtSerializer):
+    """Art with its hash distance to the art searched from"""
+    distance = serializers.IntegerField(read_only=True)
+
+
 class ArtImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to art."""
+    image = ImageUploadField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = models.Art
-        fields = ['id', 'image']
-        read_only_fields = ['id']
+        fields = ['id', 'image', 'image_variants', *IMAGE_METADATA_FIELDS]
+        read_only_fields = ['id', *IMAGE_METADATA_FIELDS]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable image upload sessions."""
+
+    class Meta:
+        model = models.UploadSession
+        fields = ['id', 'filename', 'size', 'offset', 'expires_at']
+        read_only_fields = ['id', 'offset', 'expires_at']
         extra_kwargs = {
-            'image': {'required': True}
+            'size': {'min_value': 1}
         }
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Serializer for typeahead suggestions."""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    slug = serializers.CharField(allow_null=True)
@@ -1,8 +1,16 @@
+import io
+import os
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
+from django.http import HttpResponseNotModified
+
 from portfolio.models import (
     Character,
     Tag,
     Artist,
-    Art
+    Art,
+    UploadSession
 )
 from portfolio.api.serializers import (
     CharacterSerializer,
@@ -10,18 +18,81 @@ from portfolio.api.serializers import (
     ArtistSerializer,
     ArtSerializer,
     ArtistImageSerializer,
-    ArtImageSerializer
+    ArtImageSerializer,
+    AutocompleteSerializer,
+    SimilarArtSerializer,
+    UploadSessionSerializer
+)
+from portfolio.colors import (
+    MAX_DISTANCE as COLOR_MAX_DISTANCE,
+    color_art_ids,
+    parse_hex_color,
+)
+from portfolio.search import search_arts
+from portfolio.similar import (
+    MAX_LIMIT as SIMILAR_MAX_LIMIT,
+    similar_art_ids,
+)
+from portfolio.autocomplete import (
+    PUBLIC_KINDS as AUTOCOMPLETE_PUBLIC_KINDS,
+    autocomplete,
+)
+from portfolio.deletion import enqueue_artist_deletion, visible_arts
+from portfolio.images import enqueue_image_processing
+from portfolio.resize import (
+    FORMATS as RESIZE_FORMATS,
+    MAX_WIDTH,
+    MIN_WIDTH,
+    cache_key,
+    get_resized
+)
+from portfolio.uploads import (
+    OffsetMismatch,
+    SessionBusy,
+    UploadError,
+    append_chunk,
+    create_session,
+    discard_session,
+    finalize_session
+)
+from portfolio.api.filters import (
+    TagQueryError,
+    filter_by_tag_query,
+    filter_name_contains,
+    filter_name_fuzzy,
+    parse_fuzzy_distance,
+    has_any_tag
+)
+
+from core.api.serializers import JobSerializer
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication
+)
+from core.media import (
+    PassthroughRenderer,
+    accel_file_response,
+    protected_media_response
 )
 from core.permissions import IsAuthenticatedAndIsAdminOrReadOnly
+from core.mixins import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    QueryPlanMixin
+)
+from core.pagination import LimitOffsetOrCursorPagination
+from core.utils import if_none_match
 
-from rest_framework import viewsets, status
+from rest_framework import generics, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.permissions import (
     IsAuthenticated,
     IsAdminUser,
 )
-from rest_framework.authentication import TokenAuthentication
 
 from drf_spectacular.utils import (
     extend_schema_view,
@@ -31,15 +102,241 @@ from drf_spectacular.utils import (
 )
 
 
-class CharacterViewSet(viewsets.ModelViewSet):
+def accepted_job(request, job, data):
+    """Answer 202 Accepted pointing at a queued job"""
+    location = reverse('job-detail', kwargs={'pk': job.pk}, request=request)
+    return Response(
+        data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': location}
+    )
+
+
+def accepted_image_upload(request, instance, data):
+    """Queue processing of an uploaded image and answer 202 Accepted"""
+    job = enqueue_image_processing(instance)
+    return accepted_job(request, job, {**data, 'job': job.pk})
+
+
+class ResumableUploadMixin:
+    """
+    Resumable image uploads for a viewset whose model has an image field.
+    POST upload-sessions/ opens a session, PATCH upload-sessions/<id>/
+    appends the raw request body at the Upload-Offset header, GET reports
+    the offset to resume from, and POST upload-sessions/<id>/finalize/
+    attaches the file like upload-image does.
+    """
+    image_serializer_class = None
+
+    def get_upload_session(self, session_id):
+        instance = self.get_object()
+        session = generics.get_object_or_404(
+            UploadSession,
+            pk=session_id,
+            model=instance._meta.label_lower,
+            object_id=instance.pk
+        )
+        return instance, session
+
+    def upload_session_response(self, session, **kwargs):
+        return Response(
+            UploadSessionSerializer(session).data,
+            headers={
+                'Upload-Offset': str(session.offset),
+                'Upload-Length': str(session.size),
+            },
+            **kwargs
+        )
+
+    @extend_schema(
+        request=UploadSessionSerializer,
+        responses={201: UploadSessionSerializer}
+    )
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-sessions',
+        permission_classes=[IsAdminUser, IsAuthenticated]
+    )
+    def create_upload_session(self, request, pk=None):
+        """Open a resumable image upload."""
+        instance = self.get_object()
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = create_session(
+                instance,
+                serializer.validated_data['filename'],
+                serializer.validated_data['size'],
+                request.user
+            )
+        except UploadError as error:
+            raise ValidationError({'size': str(error)})
+
+        return self.upload_session_response(
+            session,
+            status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        methods=['PATCH'],
+        request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                'Upload-Offset',
+                OpenApiTypes.INT,
+                OpenApiParameter.HEADER,
+                required=True,
+                description='Position of the first byte of the body',
+            )
+        ],
+        responses={
+            200: UploadSessionSerializer,
+            # Wrong offset, or another request is writing a chunk
+            409: UploadSessionSerializer,
+            423: UploadSessionSerializer,
+        }
+    )
+    @extend_schema(methods=['GET'], responses=UploadSessionSerializer)
+    @extend_schema(methods=['DELETE'], responses={204: None})
+    @action(
+        methods=['GET', 'PATCH', 'DELETE'],
+        detail=True,
+        url_path=r'upload-sessions/(?P<session_id>[0-9a-f-]+)',
+        permission_classes=[IsAdminUser, IsAuthenticated]
+    )
+    def upload_session(self, request, pk=None, session_id=None):
+        """Report, append to or discard a resumable image upload."""
+        instance, session = self.get_upload_session(session_id)
+        if request.method == 'DELETE':
+            discard_session(session)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if request.method == 'GET':
+            return self.upload_session_response(session)
+
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            raise ValidationError(
+                {'Upload-Offset': 'This header must be an integer.'}
+            )
+
+        try:
+            session = append_chunk(
+                session.pk,
+                offset,
+                request.stream or io.BytesIO()
+            )
+        except OffsetMismatch as error:
+            session.offset = error.args[0]
+            return self.upload_session_response(
+                session,
+                status=status.HTTP_409_CONFLICT
+            )
+        except SessionBusy as error:
+            session.offset = error.args[0]
+            return self.upload_session_response(
+                session,
+                status=status.HTTP_423_LOCKED
+            )
+        except UploadError as error:
+            raise ValidationError({'detail': str(error)})
+
+        return self.upload_session_response(session)
+
+    @extend_schema(request=None, responses={202: ArtImageSerializer})
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path=r'upload-sessions/(?P<session_id>[0-9a-f-]+)/finalize',
+        permission_classes=[IsAdminUser, IsAuthenticated]
+    )
+    def finalize_upload_session(self, request, pk=None, session_id=None):
+        """Attach a complete resumable upload to the image field."""
+        instance, session = self.get_upload_session(session_id)
+        try:
+            finalize_session(session, instance)
+        except UploadError as error:
+            raise ValidationError({'detail': str(error)})
+
+        serializer = self.image_serializer_class(
+            instance,
+            context=self.get_serializer_context()
+        )
+        return accepted_image_upload(request, instance, serializer.data)
+
+
+class OriginalImageMixin:
+    """
+    Access controlled delivery of original images.
+    Django checks permissions, nginx streams the file.
+    """
+
+    @extend_schema(responses={(200, '*/*'): OpenApiTypes.BINARY})
+    @action(
+        detail=True,
+        renderer_classes=[PassthroughRenderer],
+        permission_classes=[IsAdminUser, IsAuthenticated]
+    )
+    def original(self, request, pk=None):
+        """Download the original image."""
+        instance = self.get_object()
+        if not instance.image:
+            raise NotFound('No image was uploaded.')
+
+        return protected_media_response(instance.image)
+
+
+def filter_by_name(queryset, name, request):
+    """Filter by substring, or by edit distance when `fuzzy` is given"""
+    fuzzy = request.query_params.get('fuzzy')
+    if not fuzzy:
+        return filter_name_contains(queryset, name)
+
+    try:
+        distance = parse_fuzzy_distance(fuzzy)
+    except ValueError as error:
+        raise ValidationError({'fuzzy': str(error)})
+    return filter_name_fuzzy(queryset, name, distance)
+
+
+NAME_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        'name',
+        OpenApiTypes.STR,
+        description='String or partial string to filter',
+    ),
+    OpenApiParameter(
+        'fuzzy',
+        OpenApiTypes.INT,
+        description=(
+            'Match names within this edit distance (1 or 2) '
+            'instead of by substring'
+        ),
+    ),
+]
+
+
+@extend_schema_view(list=extend_schema(parameters=NAME_FILTER_PARAMETERS))
+class CharacterViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    QueryPlanMixin,
+    viewsets.ModelViewSet
+):
     """
     View to CRUD characters
     Only reading is open to public
     """
     permission_classes = [IsAuthenticatedAndIsAdminOrReadOnly]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
     queryset = Character.objects.all()
     serializer_class = CharacterSerializer
+    pagination_class = LimitOffsetOrCursorPagination
+    cache_models = [Character]
 
     def get_queryset(self):
         """Retrieve characters filtering  by name when applicable"""
@@ -47,9 +344,9 @@ class CharacterViewSet(viewsets.ModelViewSet):
         queryset = self.queryset
 
         if filter:
-            queryset = queryset.filter(name__contains=filter)
+            queryset = filter_by_name(queryset, filter, self.request)
 
-        return queryset
+        return self.plan_queryset(queryset.order_by('id'))
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -59,30 +356,42 @@ class TagViewSet(viewsets.ModelViewSet):
     """
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
     permission_classes = [IsAdminUser, IsAuthenticated]
 
 
 @extend_schema_view(
-    list=extend_schema(
-        parameters=[
-            OpenApiParameter(
-                'name',
-                OpenApiTypes.STR,
-                description='String or partial string to filter',
-            )
-        ]
+    list=extend_schema(parameters=NAME_FILTER_PARAMETERS),
+    finalize_upload_session=extend_schema(
+        request=None,
+        responses={202: ArtistImageSerializer}
     )
 )
-class ArtistViewSet(viewsets.ModelViewSet):
+class ArtistViewSet(
+    OriginalImageMixin,
+    ResumableUploadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    QueryPlanMixin,
+    viewsets.ModelViewSet
+):
     """
     View to CRUD artists
     Only reading is open to public
     """
     permission_classes = [IsAuthenticatedAndIsAdminOrReadOnly]
-    authentication_classes = [TokenAuthentication]
-    queryset = Artist.objects.all()
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
+    queryset = Artist.objects.filter(hidden=False)
     serializer_class = ArtistSerializer
+    image_serializer_class = ArtistImageSerializer
+    pagination_class = LimitOffsetOrCursorPagination
+    cache_models = [Artist]
 
     def get_queryset(self):
         """Retrieve artists filtering by name when applicable"""
@@ -90,9 +399,9 @@ class ArtistViewSet(viewsets.ModelViewSet):
         queryset = self.queryset
 
         if name:
-            queryset = queryset.filter(name__contains=name)
+            queryset = filter_by_name(queryset, name, self.request)
 
-        return queryset.order_by('id')
+        return self.plan_queryset(queryset.order_by('id'))
 
     def get_serializer_class(self):
         """return the serializer class for request"""
@@ -103,20 +412,36 @@ class ArtistViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @extend_schema(responses={202: JobSerializer})
+    def destroy(self, request, *args, **kwargs):
+        """
+        Hide the artist at once and delete it with its artworks in a
+        background job, which the response points to.
+        """
+        artist = self.get_object()
+        job = enqueue_artist_deletion(artist)
+        return accepted_job(request, job, JobSerializer(job).data)
+
+    @extend_schema(responses={202: ArtistImageSerializer})
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=[MultiPartParser]
+    )
     def upload_image(self, request, pk=None):
         """Upload an image to artist."""
         artist = self.get_object()
         serializer = self.get_serializer(artist, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return accepted_image_upload(request, artist, serializer.data)
 
     @action(detail=True)
     def artworks(self, request, pk=None):
         """Fetch Artist related work"""
         artist = self.get_object()
-        artworks = artist.artworks.all()
+        artworks = self.plan_queryset(artist.artworks.order_by('id'))
         serializer = self.get_serializer(artworks, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -133,19 +458,56 @@ class ArtistViewSet(viewsets.ModelViewSet):
                 'artist',
                 OpenApiTypes.STR,
                 description='Comma separated list of IDs to filter'
-            )
+            ),
+            OpenApiParameter(
+                'tag_query',
+                OpenApiTypes.STR,
+                description=(
+                    'Boolean tag expression with AND, OR, NOT and '
+                    'parentheses, e.g. "3 AND 7 AND NOT 9"'
+                )
+            ),
+            OpenApiParameter(
+                'color',
+                OpenApiTypes.STR,
+                description=(
+                    'Hex color, e.g. "#aa3322". Only arts whose palette '
+                    'has a close color are listed, closest first'
+                )
+            ),
+            OpenApiParameter(
+                'color_distance',
+                OpenApiTypes.INT,
+                description=(
+                    'Largest CIE76 delta E counted as close, '
+                    f'{COLOR_MAX_DISTANCE} by default'
+                )
+            ),
         ]
     )
 )
-class ArtViewSet(viewsets.ModelViewSet):
+class ArtViewSet(
+    OriginalImageMixin,
+    ResumableUploadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    QueryPlanMixin,
+    viewsets.ModelViewSet
+):
     """
     View to CRUD art
     Only reading is open to public
     """
     permission_classes = [IsAuthenticatedAndIsAdminOrReadOnly]
-    authentication_classes = [TokenAuthentication]
-    queryset = Art.objects.all()
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
+    queryset = visible_arts()
     serializer_class = ArtSerializer
+    image_serializer_class = ArtImageSerializer
+    pagination_class = LimitOffsetOrCursorPagination
+    cache_models = [Art]
 
     def _params_to_ints(self, qs):
         """Convert a list of string to integers"""
@@ -154,16 +516,62 @@ class ArtViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Retrieve arts filtering by tags or artists when applicable"""
         tags = self.request.query_params.get('tags')
+        tag_query = self.request.query_params.get('tag_query')
         artists = self.request.query_params.get('artists')
+        color = self.request.query_params.get('color')
         queryset = self.queryset
         if tags:
             tags_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tags_ids)
+            # Semi-join on the through table instead of JOIN + DISTINCT
+            queryset = queryset.filter(has_any_tag(tags_ids))
+        if tag_query:
+            try:
+                queryset = filter_by_tag_query(queryset, tag_query)
+            except TagQueryError as error:
+                raise ValidationError({'tag_query': str(error)})
         if artists:
             artists_ids = self._params_to_ints(artists)
-            queryset = queryset.filter(artist__id__in=artists_ids)
+            queryset = queryset.filter(artist_id__in=artists_ids)
+        if color:
+            return self.plan_queryset(
+                self.filter_by_color(queryset, color)
+            )
+
+        return self.plan_queryset(queryset.order_by('id'))
+
+    def filter_by_color(self, queryset, color):
+        """
+        Keep arts showing a color, ranked by the in-process palette index
+        so no palette is read from the database.
+        """
+        try:
+            rgb = parse_hex_color(color)
+        except ValueError as error:
+            raise ValidationError({'color': str(error)})
+        try:
+            distance = int(self.request.query_params.get(
+                'color_distance',
+                COLOR_MAX_DISTANCE
+            ))
+        except ValueError:
+            distance = -1
+        if distance < 0:
+            raise ValidationError(
+                {'color_distance': 'Must be an integer of 0 or more.'}
+            )
 
-        return queryset.order_by('id').distinct()
+        matches = color_art_ids(rgb, distance)
+        if not matches:
+            return queryset.none()
+        # Cursor pagination orders by id on its own
+        rank = Case(
+            *[When(pk=pk, then=position)
+              for position, (pk, _) in enumerate(matches)],
+            output_field=IntegerField()
+        )
+        return queryset.filter(
+            pk__in=[pk for pk, _ in matches]
+        ).order_by(rank, 'id')
 
     def get_serializer_class(self):
         """return the serializer class for request"""
@@ -172,11 +580,215 @@ class ArtViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @extend_schema(responses={202: ArtImageSerializer})
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=[MultiPartParser]
+    )
     def upload_image(self, request, pk=None):
         """Upload an image to artist."""
         art = self.get_object()
         serializer = self.get_serializer(art, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        return accepted_image_upload(request, art, serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'w',
+                OpenApiTypes.INT,
+                required=True,
+                description=f'Width in pixels, {MIN_WIDTH} to {MAX_WIDTH}',
+            ),
+            OpenApiParameter(
+                'fmt',
+                OpenApiTypes.STR,
+                enum=list(RESIZE_FORMATS),
+                description='Image format, webp by default',
+            ),
+        ],
+        responses={(200, '*/*'): OpenApiTypes.BINARY}
+    )
+    @action(detail=True, renderer_classes=[PassthroughRenderer])
+    def image(self, request, pk=None):
+        """Fetch the art image resized to a width."""
+        art = self.get_object()
+        if not art.image:
+            raise NotFound('No image was uploaded.')
+
+        try:
+            width = int(request.query_params.get('w', ''))
+        except ValueError:
+            raise ValidationError({'w': 'A width is required.'})
+        if not MIN_WIDTH <= width <= MAX_WIDTH:
+            raise ValidationError(
+                {'w': f'Width must be between {MIN_WIDTH} and {MAX_WIDTH}.'}
+            )
+        extension = request.query_params.get('fmt', 'webp')
+        if extension not in RESIZE_FORMATS:
+            raise ValidationError(
+                {'fmt': f'Use one of {", ".join(RESIZE_FORMATS)}.'}
+            )
+
+        etag = f'"{cache_key(art.image.name, width, extension)}"'
+        if if_none_match(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            name = get_resized(art.image, width, extension)
+            response = accel_file_response(
+                name,
+                settings.RESIZE_ACCEL_REDIRECT_PREFIX,
+                lambda: open(
+                    os.path.join(settings.RESIZE_CACHE_DIR, name),
+                    'rb'
+                )
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=3600'
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description=f'Number of arts, at most {SIMILAR_MAX_LIMIT}',
+            ),
+            OpenApiParameter(
+                'max_distance',
+                OpenApiTypes.INT,
+                description='Largest Hamming distance between hashes, 0-64',
+            ),
+        ],
+        responses=SimilarArtSerializer(many=True)
+    )
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """List arts whose image looks like this art's, closest first."""
+        art = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+            max_distance = int(request.query_params.get('max_distance', 12))
+        except ValueError:
+            raise ValidationError('limit and max_distance must be integers.')
+        if not 1 <= limit <= SIMILAR_MAX_LIMIT:
+            raise ValidationError(
+                {'limit': f'Must be between 1 and {SIMILAR_MAX_LIMIT}.'}
+            )
+        if not 0 <= max_distance <= 64:
+            raise ValidationError(
+                {'max_distance': 'Must be between 0 and 64.'}
+            )
+
+        matches = similar_art_ids(art, limit, max_distance)
+        arts = self.plan_queryset(
+            self.queryset.filter(pk__in=[pk for pk, _ in matches])
+        ).in_bulk()
+        similar = []
+        for pk, distance in matches:
+            # Skip arts deleted since the index was refreshed
+            if pk in arts:
+                arts[pk].distance = distance
+                similar.append(arts[pk])
+
+        serializer = SimilarArtSerializer(
+            similar,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description='Words to search in arts and related names',
+            )
+        ]
+    )
+)
+class SearchViewSet(QueryPlanMixin, viewsets.GenericViewSet):
+    """
+    Ranked full-text search over arts, their artist,
+    tags and characters. Open to public.
+    """
+    permission_classes = [IsAuthenticatedAndIsAdminOrReadOnly]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
+    queryset = visible_arts()
+    serializer_class = ArtSerializer
+
+    def list(self, request):
+        """Return arts matching the query, best match first"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+
+        art_ids = [art_id for art_id, _ in search_arts(query)]
+        page = self.paginate_queryset(art_ids)
+        arts = self.plan_queryset(self.queryset).in_bulk(page)
+        serializer = self.get_serializer(
+            [arts[art_id] for art_id in page if art_id in arts],
+            many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description=(
+                    'Prefix of a character or artist name, or of a tag '
+                    'name for staff'
+                ),
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Maximum number of suggestions (up to 50)',
+            )
+        ],
+        responses=AutocompleteSerializer(many=True)
+    )
+)
+class AutocompleteViewSet(viewsets.ViewSet):
+    """
+    Typeahead suggestions over tags, characters and artists.
+    Served from an in-process index, open to public; tags are private
+    like the tag endpoints, so only staff gets them.
+    """
+    permission_classes = [IsAuthenticatedAndIsAdminOrReadOnly]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
+    max_limit = 50
+
+    def list(self, request):
+        """Return the top prefix matches"""
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        limit = min(max(limit, 1), self.max_limit)
+
+        kinds = None if request.user.is_staff else AUTOCOMPLETE_PUBLIC_KINDS
+        serializer = AutocompleteSerializer(
+            autocomplete(query, limit, kinds),
+            many=True
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)
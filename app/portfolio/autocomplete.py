@@ -0,0 +1,109 @@
+"""
+Typeahead over tag, character and artist names.
+Tags are private like the tag endpoints, only staff is suggested them.
+
+Names and slugs live in a sorted in-process array; a prefix lookup is a
+binary search followed by a short scan. The array is rebuilt only when the
+generation of one of the source models moves.
+"""
+import threading
+from bisect import bisect_left
+
+from core.generations import get_generations
+from portfolio.models import Artist, Character, Tag
+
+
+SOURCES = [
+    ('tag', Tag.objects.all(), ['name']),
+    ('character', Character.objects.all(), ['name', 'slug']),
+    ('artist', Artist.objects.filter(hidden=False), ['name', 'slug']),
+]
+PUBLIC_KINDS = ('character', 'artist')
+
+
+class PrefixIndex:
+    """Sorted array of (key, entry) pairs answering prefix queries"""
+
+    def __init__(self, entries):
+        """
+        entries is an iterable of (texts, entry) pairs.
+        Each text is indexed whole and from every word start, so
+        "man" finds "Spider Man".
+        """
+        pairs = set()
+        for texts, entry in entries:
+            for text in texts:
+                words = text.lower().replace('-', ' ').split()
+                for i in range(len(words)):
+                    pairs.add((' '.join(words[i:]), entry))
+                pairs.add((text.lower(), entry))
+
+        pairs = sorted(pairs)
+        self.keys = [key for key, _ in pairs]
+        self.entries = [entry for _, entry in pairs]
+
+    def search(self, prefix, limit, keep=None):
+        """
+        Return up to `limit` distinct entries whose key starts by prefix,
+        only those `keep(entry)` accepts when given.
+        """
+        prefix = prefix.lower().strip()
+        results = []
+        if not prefix:
+            return results
+
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and len(results) < limit:
+            if not self.keys[position].startswith(prefix):
+                break
+            entry = self.entries[position]
+            if (keep is None or keep(entry)) and entry not in results:
+                results.append(entry)
+            position += 1
+
+        return results
+
+
+def _load_entries():
+    for kind, queryset, fields in SOURCES:
+        for row in queryset.values('pk', *fields).iterator():
+            texts = [row[field] for field in fields if row[field]]
+            entry = (kind, row['pk'], row['name'], row.get('slug'))
+            yield texts, entry
+
+
+_index = None
+_index_generations = None
+_index_lock = threading.Lock()
+
+
+def get_prefix_index():
+    """Return this process' index, rebuilding it when names changed"""
+    global _index, _index_generations
+
+    generations = get_generations(
+        [queryset.model for _, queryset, _ in SOURCES]
+    )
+    if _index is None or _index_generations != generations:
+        with _index_lock:
+            if _index is None or _index_generations != generations:
+                _index = PrefixIndex(_load_entries())
+                _index_generations = generations
+
+    return _index
+
+
+def autocomplete(prefix, limit=10, kinds=None):
+    """
+    Return the top matches for a prefix as dictionaries, only of the given
+    kinds when kinds is not None.
+    """
+    keep = None if kinds is None else (lambda entry: entry[0] in kinds)
+    return [
+        {'type': kind, 'id': pk, 'name': name, 'slug': slug}
+        for kind, pk, name, slug in get_prefix_index().search(
+            prefix,
+            limit,
+            keep
+        )
+    ]
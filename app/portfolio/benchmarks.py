@@ -0,0 +1,132 @@
+"""
+Bulk data for the portfolio bench_* commands.
+
+Rows are inserted with bulk_create, so no signal handler runs: search
+documents, trigrams and caches are left for each benchmark to build.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.utils import name_trigrams
+from portfolio.models import Art, Artist, ArtistNameTrigram, Tag
+
+
+BATCH_SIZE = 5000
+SYLLABLES = [
+    'ka', 'ri', 'mo', 'len', 'tas', 'vo', 'ne', 'dru', 'sil', 'pa',
+    'gor', 'im', 'el', 'zan', 'tu', 'bra', 'os', 'fe', 'lin', 'mar',
+    'ch', 'ad', 'wy', 'qui', 'ber', 'sto', 'ux', 'ha', 'je', 'nor',
+]
+
+
+def benchmark_user():
+    return get_user_model().objects.create_user(
+        email='benchmark@example.com',
+        password='benchmark'
+    )
+
+
+def create_in_batches(model, rows, batch_size=BATCH_SIZE):
+    """Insert rows from an iterable without holding them all"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+
+
+def random_names(count, seed=0):
+    """Return `count` distinct made up two word names"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(' '.join(
+            ''.join(
+                rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))
+            ).title()
+            for _ in range(2)
+        ))
+    names = sorted(names)
+    rng.shuffle(names)
+    return names
+
+
+def create_artists(names, user, trigrams=False):
+    """
+    Create artists with the given names, and their trigram rows when
+    asked. Returns their ids.
+    """
+    create_in_batches(Artist, (
+        Artist(name=name, slug=slugify(name), created_by=user)
+        for name in names
+    ))
+    # MySQL does not return the ids of bulk inserted rows
+    rows = Artist.objects.order_by('-pk').values_list('pk', 'name')[
+        :len(names)
+    ]
+    if trigrams:
+        create_in_batches(ArtistNameTrigram, (
+            ArtistNameTrigram(artist_id=pk, trigram=trigram)
+            for pk, name in rows.iterator()
+            for trigram in name_trigrams(name)
+        ))
+    return [pk for pk, _ in rows]
+
+
+def create_arts(count, user, artists=100, tags=0, tags_per_art=0,
+                seed=0, values=None):
+    """
+    Create `count` arts spread over `artists` artists, each tagged with
+    `tags_per_art` of `tags` tags drawn at random. `values(rng)` returns
+    extra field values of each art. Returns the tag ids.
+    """
+    rng = random.Random(seed)
+    artist_ids = create_artists(
+        [f'Artist {index}' for index in range(artists)],
+        user
+    )
+    start = (Art.objects.order_by('-pk').values_list('pk', flat=True)
+             .first() or 0) + 1
+    create_in_batches(Art, (
+        Art(
+            pk=pk,
+            title=f'Art {pk}',
+            subtitle='Benchmark',
+            type=1,
+            artist_id=artist_ids[pk % len(artist_ids)],
+            created_by=user,
+            **(values(rng) if values else {})
+        )
+        for pk in range(start, start + count)
+    ))
+
+    # As if created over time: index refreshes re-read the arts updated
+    # around the newest one, which would otherwise be every art
+    created = Art.objects.filter(pk__gte=start)
+    created.update(updated_at=timezone.now() - timedelta(hours=2))
+    created.filter(pk=start + count - 1).update(
+        updated_at=timezone.now() - timedelta(hours=1)
+    )
+
+    names = [f'Tag {index}' for index in range(tags)]
+    Tag.objects.bulk_create([
+        Tag(name=name, created_by=user) for name in names
+    ])
+    tag_ids = list(Tag.objects.filter(name__in=names).values_list(
+        'pk',
+        flat=True
+    ))
+    if tag_ids and tags_per_art:
+        through = Art.tags.through
+        create_in_batches(through, (
+            through(art_id=pk, tag_id=tag_id)
+            for pk in range(start, start + count)
+            for tag_id in rng.sample(tag_ids, tags_per_art)
+        ))
+    return tag_ids
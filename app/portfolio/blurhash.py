@@ -0,0 +1,84 @@
+"""
+BlurHash encoding (https://blurha.sh).
+
+A blurhash is a ~30 character string holding the average color and a
+few cosine components of an image, which clients decode into a blurred
+placeholder shown while the real image loads.
+"""
+import numpy as np
+
+
+X_COMPONENTS = 4
+Y_COMPONENTS = 3
+
+BASE83 = (
+    '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    'abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+)
+
+
+def base83(value, length):
+    """Encode an integer as `length` base 83 digits"""
+    return ''.join(
+        BASE83[value // 83 ** (length - i) % 83]
+        for i in range(1, length + 1)
+    )
+
+
+def srgb_to_linear(values):
+    values = values / 255
+    return np.where(
+        values <= 0.04045,
+        values / 12.92,
+        ((values + 0.055) / 1.055) ** 2.4
+    )
+
+
+def linear_to_srgb(value):
+    value = min(max(value, 0), 1)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def encode(image, x_components=X_COMPONENTS, y_components=Y_COMPONENTS):
+    """
+    Return the blurhash of an RGB PIL image. Callers should pass a small
+    thumbnail, the hash only keeps low frequencies.
+    """
+    pixels = srgb_to_linear(np.asarray(image, dtype=np.float64))
+    height, width = pixels.shape[:2]
+    # Cosine bases of every component along each axis
+    basis_x = np.cos(
+        np.pi * np.outer(np.arange(x_components), np.arange(width)) / width
+    )
+    basis_y = np.cos(
+        np.pi * np.outer(np.arange(y_components), np.arange(height)) / height
+    )
+    # factors[j, i] = mean of basis_y[j] * basis_x[i] * pixels
+    factors = np.einsum('jy,ix,yxc->jic', basis_y, basis_x, pixels)
+    factors /= width * height
+    factors[1:] *= 2
+    factors[0, 1:] *= 2
+    factors = factors.reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+    result = base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if len(ac):
+        quantised_max = int(max(0, min(82, np.floor(
+            np.abs(ac).max() * 166 - 0.5
+        ))))
+        maximum = (quantised_max + 1) / 166
+    else:
+        quantised_max, maximum = 0, 1
+    result += base83(quantised_max, 1)
+
+    red, green, blue = (linear_to_srgb(value) for value in dc)
+    result += base83((red << 16) + (green << 8) + blue, 4)
+
+    quantised = np.floor(
+        np.sign(ac) * np.abs(ac / maximum) ** 0.5 * 9 + 9.5
+    ).clip(0, 18).astype(int)
+    for red, green, blue in quantised:
+        result += base83(red * 19 * 19 + green * 19 + blue, 2)
+    return result
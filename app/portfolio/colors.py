@@ -0,0 +1,154 @@
+"""
+Dominant colors of art images and search by color.
+
+Palettes are found by k-means over the pixels of a small thumbnail in
+CIE Lab space, where Euclidean distance follows perceived difference
+(CIE76 delta E). Each process keeps every palette in one float32 array,
+so a color query is a vectorized scan instead of a table scan.
+"""
+import re
+
+import numpy as np
+
+from PIL import Image, ImageOps
+
+from portfolio.indexes import ArtIndex, get_art_index
+
+
+PALETTE_SIZE = 5
+SAMPLE_SIDE = 64
+ITERATIONS = 20
+# Delta E under which two colors are considered a match
+MAX_DISTANCE = 20
+
+HEX_COLOR_RE = re.compile(r'^#?([0-9a-fA-F]{6})$')
+
+# sRGB to XYZ under the D65 white point, and that white point
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def parse_hex_color(value):
+    """Return the (r, g, b) of "#rrggbb" or "rrggbb", or raise ValueError"""
+    match = HEX_COLOR_RE.match(value.strip())
+    if match is None:
+        raise ValueError('Colors must look like #aa3322.')
+    digits = match.group(1)
+    return tuple(int(digits[i:i + 2], 16) for i in range(0, 6, 2))
+
+
+def rgb_to_lab(rgb):
+    """Convert an (..., 3) array of 0-255 sRGB values to CIE Lab"""
+    rgb = np.asarray(rgb, dtype=np.float64) / 255
+    linear = np.where(
+        rgb > 0.04045,
+        ((rgb + 0.055) / 1.055) ** 2.4,
+        rgb / 12.92
+    )
+    xyz = linear @ _RGB_TO_XYZ.T / _WHITE
+    f = np.where(
+        xyz > (6 / 29) ** 3,
+        np.cbrt(xyz),
+        xyz / (3 * (6 / 29) ** 2) + 4 / 29
+    )
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ], axis=-1)
+
+
+def kmeans(points, k):
+    """
+    Cluster points into at most k groups and return (centers, labels).
+    Seeded k-means++ keeps palettes stable across runs.
+    """
+    rng = np.random.default_rng(0)
+    centers = points[[rng.integers(len(points))]]
+    while len(centers) < k:
+        distances = ((points[:, None] - centers[None]) ** 2).sum(-1).min(1)
+        if not distances.any():
+            break
+        chosen = rng.choice(len(points), p=distances / distances.sum())
+        centers = np.vstack([centers, points[chosen]])
+
+    labels = None
+    for _ in range(ITERATIONS):
+        distances = ((points[:, None] - centers[None]) ** 2).sum(-1)
+        new_labels = distances.argmin(1)
+        if labels is not None and (new_labels == labels).all():
+            break
+        labels = new_labels
+        for cluster in range(len(centers)):
+            members = points[labels == cluster]
+            if len(members):
+                centers[cluster] = members.mean(0)
+
+    return centers, labels
+
+
+def extract_palette(file):
+    """
+    Return the dominant colors of an image as
+    [{'color': '#rrggbb', 'weight': share of pixels}], largest first.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    image.draft('RGB', (SAMPLE_SIDE, SAMPLE_SIDE))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    # Nearest sampling keeps blended edge pixels out of the clusters
+    image.thumbnail((SAMPLE_SIDE, SAMPLE_SIDE), Image.NEAREST)
+    pixels = np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+
+    _, labels = kmeans(rgb_to_lab(pixels), PALETTE_SIZE)
+    counts = np.bincount(labels)
+    palette = []
+    for cluster in np.argsort(-counts, kind='stable')[:PALETTE_SIZE]:
+        if not counts[cluster]:
+            continue
+        # Stored as the mean sRGB of the cluster's pixels
+        red, green, blue = np.rint(
+            pixels[labels == cluster].mean(0)
+        ).astype(int)
+        palette.append({
+            'color': f'#{red:02x}{green:02x}{blue:02x}',
+            'weight': round(float(counts[cluster] / len(pixels)), 3),
+        })
+    return palette
+
+
+class PaletteIndex(ArtIndex):
+    """
+    Art palettes as an (arts, PALETTE_SIZE, 3) Lab array. Short palettes
+    are padded with infinity, which never matches.
+    """
+    field = 'palette'
+
+    def encode(self, values):
+        rows = np.full((len(values), PALETTE_SIZE, 3), np.inf, np.float32)
+        for row, palette in enumerate(values):
+            colors = [
+                parse_hex_color(item['color'])
+                for item in palette[:PALETTE_SIZE]
+            ]
+            if colors:
+                rows[row, :len(colors)] = rgb_to_lab(colors)
+        return rows
+
+    def search(self, rgb, limit, max_distance):
+        """
+        Return [(id, distance)] of arts whose palette has a color close to
+        rgb, closest first, all of them when limit is None.
+        """
+        query = rgb_to_lab(rgb).astype(np.float32)
+        distances = np.sqrt(((self.values - query) ** 2).sum(-1)).min(1)
+        return self.closest(distances, limit, max_distance)
+
+
+def color_art_ids(rgb, max_distance=MAX_DISTANCE):
+    """Return [(id, distance)] of every art showing a color, closest first"""
+    return get_art_index(PaletteIndex).search(rgb, None, max_distance)
@@ -0,0 +1,75 @@
+"""
+Background deletion of artists and their artworks.
+
+Deleting an artist in one statement cascades to every artwork, tag and
+character relation and search document in a single transaction, holding
+locks for as long as that takes. Instead the artist is hidden at once and
+a job deletes its artworks in small batches, each committed on its own,
+before deleting the artist. A retried job resumes with what is left.
+Image files are released by the post_delete handlers of portfolio.signals
+once each batch commits, as for any other deletion.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from core.generations import bump_generation
+from core.jobs import enqueue, report_progress
+from portfolio.models import Art, Artist
+
+
+BATCH_SIZE = 100
+
+
+def visible_arts():
+    """
+    Artworks whose artist is not being deleted. Hidden artists are few,
+    so this is an anti-join on a short list rather than a join of every
+    artwork to its artist.
+    """
+    return Art.objects.exclude(
+        artist_id__in=Artist.objects.filter(hidden=True).values('pk')
+    )
+
+
+def hide_artist(artist):
+    """Hide an artist and its artworks from every listing right away"""
+    Artist.objects.filter(pk=artist.pk).update(
+        hidden=True,
+        updated_at=timezone.now()
+    )
+    bump_generation(Artist)
+    bump_generation(Art)
+    artist.hidden = True
+
+
+def enqueue_artist_deletion(artist):
+    """Hide an artist and queue the deletion of its data, returns the job"""
+    hide_artist(artist)
+    return enqueue('portfolio.deletion.delete_artist', pk=artist.pk)
+
+
+def delete_artist(pk, batch_size=BATCH_SIZE):
+    """Job task deleting a hidden artist's artworks in batches, then it"""
+    artist = Artist.objects.filter(pk=pk, hidden=True).first()
+    if artist is None:
+        return
+
+    artworks = Art.objects.filter(artist_id=pk)
+    total = artworks.count()
+    deleted = 0
+    report_progress(deleted=deleted, total=total)
+    while True:
+        with transaction.atomic():
+            batch = list(
+                artworks.order_by('pk').select_for_update()
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            # Tag and character rows and search documents cascade
+            Art.objects.filter(pk__in=batch).delete()
+
+        deleted += len(batch)
+        report_progress(deleted=deleted, total=total)
+
+    artist.delete()
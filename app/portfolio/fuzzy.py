@@ -0,0 +1,142 @@
+"""
+Typo tolerant name lookup for artists and characters.
+
+Names are reduced to a comparison key and indexed by trigram. A query
+only computes the edit distance to keys sharing enough trigrams with it,
+which keeps latency bounded. Indexes live in-process and are rebuilt when
+the model's generation moves.
+"""
+import re
+import threading
+from collections import Counter, defaultdict
+
+from core.generations import get_generation
+from core.utils import normalize_name
+
+
+MAX_DISTANCE = 2
+
+NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+
+def name_key(name):
+    """Return the key names are compared by: lowercase letters and digits"""
+    return NON_ALNUM_RE.sub('', normalize_name(name).lower())
+
+
+def levenshtein(a, b, max_distance):
+    """
+    Edit distance between two strings, or max_distance + 1 as soon as
+    it is known to be larger than max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return min(previous[-1], max_distance + 1)
+
+
+def padded_trigrams(key):
+    """Distinct trigrams of a key padded so its edges count too"""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Trigram index over name keys mapped back to primary keys.
+
+    A single edit touches at most three trigrams of a key, so a key within
+    distance d of the query shares at least len(trigrams) - 3 * d of the
+    query's trigrams. Only keys passing that count are compared with the
+    (bounded) edit distance.
+    """
+
+    def __init__(self, rows):
+        self.ids = {}
+        for pk, name in rows:
+            self.ids.setdefault(name_key(name), []).append(pk)
+
+        self.keys = list(self.ids)
+        self.postings = defaultdict(list)
+        self.by_length = defaultdict(list)
+        for position, key in enumerate(self.keys):
+            for trigram in padded_trigrams(key):
+                self.postings[trigram].append(position)
+            self.by_length[len(key)].append(position)
+
+    def candidates(self, key, max_distance):
+        """Return positions of keys that may be within max_distance"""
+        trigrams = padded_trigrams(key)
+        required = len(trigrams) - 3 * max_distance
+        lengths = range(len(key) - max_distance, len(key) + max_distance + 1)
+        if required <= 0:
+            # Too short for the trigram filter, compare by length only
+            return [
+                position
+                for length in lengths
+                for position in self.by_length.get(length, ())
+            ]
+
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        return [
+            position for position, count in shared.items()
+            if count >= required and len(self.keys[position]) in lengths
+        ]
+
+    def search(self, name, max_distance):
+        """Return primary keys of names within max_distance, closest first"""
+        max_distance = min(max_distance, MAX_DISTANCE)
+        key = name_key(name)
+        matches = []
+        for position in self.candidates(key, max_distance):
+            candidate = self.keys[position]
+            distance = levenshtein(key, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, candidate))
+
+        return [
+            pk
+            for _, candidate in sorted(matches)
+            for pk in self.ids[candidate]
+        ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_name_index(model):
+    """Return this process' index of a model, rebuilt when names changed"""
+    generation = get_generation(model)
+    cached = _indexes.get(model)
+    if cached is None or cached[0] != generation:
+        with _indexes_lock:
+            cached = _indexes.get(model)
+            if cached is None or cached[0] != generation:
+                rows = model.objects.values_list('pk', 'name').iterator()
+                cached = (generation, NameIndex(rows))
+                _indexes[model] = cached
+
+    return cached[1]
+
+
+def fuzzy_name_ids(model, name, max_distance):
+    """Return primary keys of `model` rows whose name is close to name"""
+    return get_name_index(model).search(name, max_distance)
@@ -0,0 +1,360 @@
+"""
+Sized variants of uploaded art and artist images.
+
+Every original gets a thumbnail, card and full variant in WebP and JPEG,
+stored next to it as "<name>_<variant>.<format>" so their URLs can be
+derived from the original's name without extra columns. Variants go
+through the default storage, since the content addressed storage of
+originals would rename them. JPEG originals
+are decoded at a reduced scale through Pillow's draft mode, which makes
+downscaling large photos cheap. Variants are generated by background jobs
+so uploads do not hold a web worker; the same jobs record the features
+computed from pixels, like blurhash placeholders and art palettes.
+"""
+import hashlib
+import io
+import json
+import os
+import warnings
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from PIL import Image, ImageOps
+
+from core.generations import bump_generation
+from core.jobs import enqueue
+from portfolio import blurhash
+from portfolio.colors import extract_palette
+
+
+# name: (longest side in pixels, byte budget)
+VARIANTS = {
+    'thumbnail': (160, 20 * 1024),
+    'card': (480, 80 * 1024),
+    'full': (1600, 400 * 1024),
+}
+
+FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+QUALITIES = (85, 75, 65, 55, 45)
+MIN_SIDE = 16
+
+# Uploads are checked against these before anything is decoded
+UPLOAD_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_MAX_PIXELS = 40 * 1000 * 1000
+
+ORIENTATION_TAG = 0x0112
+BLURHASH_SIDE = 32
+
+
+def variant_name(name, variant, extension):
+    """Return the storage name of one variant of an original"""
+    return f'{os.path.splitext(name)[0]}_{variant}.{extension}'
+
+
+def manifest_name(name):
+    """Return the storage name of the manifest describing the variants"""
+    return f'{os.path.splitext(name)[0]}_variants.json'
+
+
+def variants_signature():
+    """Fingerprint of the variant settings, which changes with them"""
+    settings = json.dumps([VARIANTS, FORMATS, QUALITIES, MIN_SIDE])
+    return hashlib.sha256(settings.encode()).hexdigest()[:16]
+
+
+def file_digest(file):
+    """Return the sha256 hex digest of an open file"""
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(64 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(storage, name):
+    """Return the stored manifest of an original, or None"""
+    try:
+        with storage.open(manifest_name(name), 'rb') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def inspect_upload(file, max_bytes=UPLOAD_MAX_BYTES):
+    """
+    Check an uploaded image from its header only and return
+    (format, width, height). Raises ValueError when it is not acceptable.
+    Image.open() parses the header lazily, so pixels are never decoded.
+    """
+    if file.size > max_bytes:
+        raise ValueError(
+            f'Images must be at most {max_bytes // 1024 // 1024}MB.'
+        )
+
+    file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(file)
+            format, (width, height) = image.format, image.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ValueError('Image has too many pixels.')
+    except Exception:
+        raise ValueError('Upload a valid image.')
+    finally:
+        file.seek(0)
+
+    if format not in UPLOAD_FORMATS:
+        raise ValueError(
+            f'Unsupported image format {format}, use one of '
+            f'{", ".join(sorted(UPLOAD_FORMATS))}.'
+        )
+    if width * height > UPLOAD_MAX_PIXELS:
+        raise ValueError('Image has too many pixels.')
+
+    return format, width, height
+
+
+def dhash(file):
+    """
+    Return the 64-bit difference hash of an image as a signed integer.
+    Each bit tells whether a pixel of a 9x8 grayscale thumbnail is
+    brighter than its right neighbour, so near duplicates differ in few
+    bits.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    image.draft('L', (64, 64))
+    pixels = list(
+        image.convert('L').resize((9, 8), Image.LANCZOS).getdata()
+    )
+
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            value = value << 1 | (left > pixels[row * 9 + column + 1])
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def image_metadata(file):
+    """
+    Return the image_width, image_height and image_bytes fields of an
+    image, read from its header. Dimensions are as displayed, after
+    EXIF rotation.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    width, height = image.size
+    if image.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8):
+        width, height = height, width
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_bytes': size,
+    }
+
+
+def image_blurhash(file):
+    """Return the blurhash placeholder of an image"""
+    return blurhash.encode(open_scaled(file, BLURHASH_SIDE))
+
+
+# Fields derived from the image by the processing job, by model
+IMAGE_FEATURES = {
+    'portfolio.artist': {
+        'image_blurhash': image_blurhash,
+    },
+    'portfolio.art': {
+        'image_blurhash': image_blurhash,
+        'phash': dhash,
+        'palette': extract_palette,
+    },
+}
+
+
+def open_scaled(file, size):
+    """
+    Open an image reduced to fit a size x size box.
+    draft() lets the JPEG decoder skip detail the variant does not need.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    image.draft('RGB', (size, size))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail((size, size), Image.LANCZOS)
+    return image
+
+
+def encode_within_budget(image, format, budget):
+    """
+    Encode an image lowering quality, then dimensions, until it fits
+    the byte budget. Returns the encoded bytes.
+    """
+    while True:
+        for quality in QUALITIES:
+            buffer = io.BytesIO()
+            image.save(buffer, format=format, quality=quality, optimize=True)
+            if buffer.tell() <= budget:
+                return buffer.getvalue()
+
+        width, height = image.size
+        if max(width, height) <= MIN_SIDE:
+            return buffer.getvalue()
+        image = image.resize(
+            (max(int(width * 0.8), 1), max(int(height * 0.8), 1)),
+            Image.LANCZOS
+        )
+
+
+def save_replacing(storage, name, content):
+    """Save content under exactly `name`, replacing any existing file"""
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def generate_variants(field_file, force=True):
+    """
+    Create or replace every variant of an image field's file.
+    Unless forced, nothing is done when the manifest shows the variants
+    were made from the same content with the current settings. Returns
+    whether variants were written.
+    """
+    storage = default_storage
+    with field_file.open('rb') as file:
+        manifest = {
+            'sha256': file_digest(file),
+            'signature': variants_signature(),
+        }
+        if not force and read_manifest(storage, field_file.name) == manifest:
+            return False
+
+        for variant, (size, budget) in VARIANTS.items():
+            image = open_scaled(file, size)
+            for extension, format in FORMATS.items():
+                content = encode_within_budget(image, format, budget)
+                save_replacing(
+                    storage,
+                    variant_name(field_file.name, variant, extension),
+                    ContentFile(content)
+                )
+
+    save_replacing(
+        storage,
+        manifest_name(field_file.name),
+        ContentFile(json.dumps(manifest).encode())
+    )
+    return True
+
+
+def delete_variants(field_file):
+    """Delete every variant of an image field's file"""
+    for variant in VARIANTS:
+        for extension in FORMATS:
+            default_storage.delete(
+                variant_name(field_file.name, variant, extension)
+            )
+    default_storage.delete(manifest_name(field_file.name))
+
+
+def release_image(field_file):
+    """
+    Drop one reference to a stored image, and its variants once no other
+    upload refers to the same content.
+    """
+    if not field_file:
+        return
+    storage = field_file.storage
+    storage.delete(field_file.name)
+    if not storage.exists(field_file.name):
+        delete_variants(field_file)
+
+
+def variant_urls(field_file):
+    """Return {variant: {format: url}} for an image field, or None"""
+    if not field_file:
+        return None
+
+    # Variants change with their settings while keeping their names, so
+    # the URL carries the settings version to stay immutable
+    version = variants_signature()
+    return {
+        variant: {
+            extension: default_storage.url(
+                variant_name(field_file.name, variant, extension)
+            ) + f'?v={version}'
+            for extension in FORMATS
+        }
+        for variant in VARIANTS
+    }
+
+
+def image_features(model, file, fields=None):
+    """Return {field: value} of the features of a model's image"""
+    features = IMAGE_FEATURES[model]
+    return {
+        field: features[field](file)
+        for field in (features if fields is None else fields)
+    }
+
+
+def process_image(model, pk):
+    """
+    Job task generating the variants and the features of a stored art
+    or artist image.
+    """
+    instance = apps.get_model(model).objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return
+
+    # Re-uploads of stored content keep their variants
+    generate_variants(instance.image, force=False)
+    with instance.image.open('rb') as file:
+        features = {
+            **image_metadata(file),
+            **image_features(model, file),
+        }
+    # The row may hold another image by now, whose own job computes its
+    # features. updated_at moves so in-process indexes pick the row up.
+    updated = type(instance).objects.filter(
+        pk=pk,
+        image=instance.image.name
+    ).update(**features, updated_at=timezone.now())
+    if updated:
+        bump_generation(model)
+
+
+def enqueue_image_processing(instance):
+    """Queue variant generation for an instance's image, returns the job"""
+    return enqueue(
+        'portfolio.images.process_image',
+        model=instance._meta.label_lower,
+        pk=instance.pk
+    )
+
+
+def reprocess_image(model, name, force=False):
+    """
+    Regenerate the variants of a stored original by model label and name,
+    without database access. Returns 'processed', 'skipped' or 'missing'.
+    """
+    field = apps.get_model(model)._meta.get_field('image')
+    field_file = field.attr_class(None, field, name)
+    if not field.storage.exists(name):
+        return 'missing'
+
+    return 'processed' if generate_variants(field_file, force) else 'skipped'
@@ -0,0 +1,124 @@
+"""
+In-process NumPy indexes over one column of every art.
+
+An index keeps the arts' values as rows of an array so a query is one
+vectorized scan. It is refreshed with arts updated since the previous
+query; deleting an art moves a generation that makes the next query
+rebuild it, since deletions leave no updated rows behind.
+"""
+import threading
+from datetime import timedelta
+
+import numpy as np
+
+from core.generations import get_generation
+from portfolio.models import Art
+
+
+DELETED_GENERATION = 'portfolio.art.deleted'
+# Rows committed late with an older updated_at are still picked up
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+class ArtIndex:
+    """
+    Art ids and the array rows encoding one of their fields.
+    Subclasses name the field and implement encode().
+    """
+    field = None
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.values = self.encode([])
+        self.positions = {}
+
+    def encode(self, values):
+        """Return the array whose rows encode the given field values"""
+        raise NotImplementedError
+
+    def upsert(self, rows):
+        """Add or replace (id, value) pairs; None values remove"""
+        added_ids, added_values = [], []
+        removed = []
+        for pk, value in rows:
+            position = self.positions.get(pk)
+            if value is None:
+                if position is not None:
+                    removed.append(position)
+            elif position is not None:
+                self.values[position] = self.encode([value])[0]
+            else:
+                added_ids.append(pk)
+                added_values.append(value)
+
+        if removed:
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[removed] = False
+            self.ids = self.ids[keep]
+            self.values = self.values[keep]
+            self.positions = {
+                pk: position for position, pk in enumerate(self.ids.tolist())
+            }
+        if added_ids:
+            start = len(self.ids)
+            self.ids = np.concatenate(
+                [self.ids, np.array(added_ids, dtype=np.int64)]
+            )
+            self.values = np.concatenate(
+                [self.values, self.encode(added_values)]
+            )
+            self.positions.update(
+                (pk, position) for position, pk in enumerate(added_ids, start)
+            )
+
+    def closest(self, distances, limit, max_distance, exclude=None):
+        """
+        Return [(id, distance)] of the rows within max_distance, closest
+        first, only the `limit` closest unless limit is None.
+        """
+        candidates = np.flatnonzero(distances <= max_distance)
+        if exclude is not None and exclude in self.positions:
+            candidates = candidates[candidates != self.positions[exclude]]
+        if limit is not None and len(candidates) > limit:
+            nearest = np.argpartition(distances[candidates], limit - 1)
+            candidates = candidates[nearest[:limit]]
+
+        order = np.lexsort((self.ids[candidates], distances[candidates]))
+        return [
+            (int(self.ids[position]), distances[position].item())
+            for position in candidates[order]
+        ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_art_index(index_class):
+    """
+    Return this process' index of a class, rebuilt when arts were deleted
+    and otherwise updated with arts changed since the last call.
+    """
+    field = index_class.field
+    generation = get_generation(DELETED_GENERATION)
+    with _indexes_lock:
+        cached = _indexes.get(index_class)
+        if cached is None or cached[0] != generation or not cached[2]:
+            index, watermark = index_class(), None
+            queryset = Art.objects.filter(**{f'{field}__isnull': False})
+        else:
+            _, index, watermark = cached
+            queryset = Art.objects.filter(
+                updated_at__gte=watermark - REFRESH_OVERLAP
+            )
+
+        rows = []
+        values = queryset.values_list('pk', field, 'updated_at')
+        for pk, value, updated_at in values.iterator(chunk_size=10000):
+            rows.append((pk, value))
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        index.upsert(rows)
+
+        _indexes[index_class] = (generation, index, watermark)
+        return index
@@ -0,0 +1,97 @@
+"""
+Django command timing dominant color extraction and the palette index
+behind /api/arts/?color=.
+use: python manage.py bench_colors --arts 100000 --width 3000 --height 2000
+"""
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.benchmarks import BenchmarkCommand
+from portfolio import colors, indexes
+from portfolio.benchmarks import benchmark_user, create_arts
+
+
+def random_palette(rng):
+    weights = sorted(
+        (rng.random() for _ in range(colors.PALETTE_SIZE)),
+        reverse=True
+    )
+    return {'palette': [
+        {
+            'color': f'#{rng.getrandbits(24):06x}',
+            'weight': round(weight / sum(weights), 3),
+        }
+        for weight in weights
+    ]}
+
+
+def photo_jpeg(width, height):
+    """A JPEG of smooth color gradients with some noise"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([
+        x / width * 255,
+        y / height * 255,
+        (x + y) / (width + height) * 255,
+    ], axis=-1) + rng.normal(0, 12, (height, width, 3))
+    buffer = BytesIO()
+    Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(
+        buffer,
+        format='JPEG',
+        quality=90
+    )
+    return buffer
+
+
+class Command(BenchmarkCommand):
+    help = 'Time palette extraction and color queries.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--arts', type=int, default=100 * 1000)
+        parser.add_argument('--width', type=int, default=3000)
+        parser.add_argument('--height', type=int, default=2000)
+
+    def benchmark(self, **options):
+        self.section(f'{options["width"]}x{options["height"]} JPEG')
+        image = photo_jpeg(options['width'], options['height'])
+        self.measure('palette extraction', lambda: colors.extract_palette(
+            image
+        ))
+
+        self.stdout.write(f'Creating {options["arts"]} arts with palettes...')
+        create_arts(options['arts'], benchmark_user(), values=random_palette)
+
+        self.section(f'{options["arts"]} palettes')
+        self.measure('full build', self.rebuild)
+        index = indexes.get_art_index(colors.PaletteIndex)
+        query = colors.parse_hex_color('#aa3322')
+        self.measure('query', lambda: index.search(
+            query,
+            None,
+            colors.MAX_DISTANCE
+        ))
+
+        url = reverse('art-list')
+        client = APIClient()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            res = client.get(url, {'color': '#aa3322'})
+            if res.status_code != 200:
+                raise CommandError(f'{url} failed: {res.content}')
+            self.report('endpoint matches', res.data['count'])
+            self.measure('endpoint', lambda: client.get(
+                url,
+                {'color': '#aa3322'}
+            ))
+
+    def rebuild(self):
+        indexes._indexes.pop(colors.PaletteIndex, None)
+        indexes.get_art_index(colors.PaletteIndex)
@@ -0,0 +1,108 @@
+"""
+Django command timing typo tolerant name lookups: the in-process trigram
+index against comparing the query with every name.
+use: python manage.py bench_fuzzy --names 100000
+"""
+import random
+import statistics
+import string
+import time
+
+from core.benchmarks import BenchmarkCommand
+from portfolio import fuzzy
+from portfolio.benchmarks import benchmark_user, create_artists, random_names
+from portfolio.models import Artist
+
+
+def misspell(name, edits, rng):
+    """Apply `edits` random substitutions, insertions or deletions"""
+    for _ in range(edits):
+        position = rng.randrange(len(name))
+        letter = rng.choice(string.ascii_lowercase)
+        edit = rng.choice(['substitute', 'insert', 'delete'])
+        if edit == 'substitute':
+            name = name[:position] + letter + name[position + 1:]
+        elif edit == 'insert':
+            name = name[:position] + letter + name[position:]
+        else:
+            name = name[:position] + name[position + 1:]
+    return name
+
+
+def scan(keys, name, max_distance):
+    """Compare a name with every key"""
+    key = fuzzy.name_key(name)
+    return [
+        candidate for candidate in keys
+        if fuzzy.levenshtein(key, candidate, max_distance) <= max_distance
+    ]
+
+
+class Command(BenchmarkCommand):
+    help = 'Time fuzzy name lookups at edit distances 1 and 2.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--names', type=int, default=100 * 1000)
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Misspelled names looked up at each distance.',
+        )
+        parser.add_argument(
+            '--scan-queries',
+            type=int,
+            default=5,
+            help='Queries also compared with every name, for reference.',
+        )
+
+    def benchmark(self, **options):
+        rng = random.Random(0)
+        names = random_names(options['names'])
+        create_artists(names, benchmark_user())
+
+        self.section(f'{len(names)} names')
+        self.measure('index build', self.build_index)
+        index = fuzzy.get_name_index(Artist)
+
+        for distance in [1, 2]:
+            queries = [
+                misspell(rng.choice(names), distance, rng)
+                for _ in range(options['queries'])
+            ]
+            self.section(f'Edit distance {distance}')
+            found = sum(bool(index.search(query, distance))
+                        for query in queries)
+            self.report('queries finding a name', f'{found}/{len(queries)}')
+            self.latencies('index', [
+                lambda query=query: index.search(query, distance)
+                for query in queries
+            ])
+            self.latencies('full scan', [
+                lambda query=query: scan(index.keys, query, distance)
+                for query in queries[:options['scan_queries']]
+            ])
+
+    def build_index(self):
+        # Forget the built index so every run rebuilds it
+        fuzzy._indexes.pop(Artist, None)
+        fuzzy.get_name_index(Artist)
+
+    def latencies(self, label, lookups):
+        """Time each lookup once and report the distribution"""
+        durations = []
+        for lookup in lookups:
+            start = time.perf_counter()
+            lookup()
+            durations.append((time.perf_counter() - start) * 1000)
+        durations.sort()
+        self.report(
+            f'{label} median',
+            f'{statistics.median(durations):.2f} ms'
+        )
+        self.report(
+            f'{label} p99',
+            f'{durations[int(len(durations) * 0.99)]:.2f} ms'
+        )
+        self.report(f'{label} max', f'{durations[-1]:.2f} ms')
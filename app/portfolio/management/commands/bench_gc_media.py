@@ -0,0 +1,117 @@
+"""
+Django command timing gc_media over a generated media tree, and the
+peak memory it allocates with one pass and with partitioned passes.
+use: python manage.py bench_gc_media --files 200000 --referenced 0.9
+"""
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+from core.benchmarks import BenchmarkCommand
+from portfolio.benchmarks import benchmark_user, create_arts
+
+
+def stored_name(rng):
+    """A name as the content addressed storage shards it"""
+    digest = f'{rng.getrandbits(256):064x}'
+    return os.path.join(
+        'uploads', 'art', digest[:2], digest[2:4], f'{digest}.jpg'
+    )
+
+
+class Command(BenchmarkCommand):
+    help = 'Time gc_media and measure the memory it allocates.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--files', type=int, default=200 * 1000)
+        parser.add_argument(
+            '--referenced',
+            type=float,
+            default=0.9,
+            help='Share of the files an art refers to.',
+        )
+        parser.add_argument(
+            '--passes',
+            type=int,
+            default=4,
+            help='Passes of the partitioned run.',
+        )
+
+    def benchmark(self, **options):
+        rng = random.Random(0)
+        names = [stored_name(rng) for _ in range(options['files'])]
+        referenced = names[:int(len(names) * options['referenced'])]
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root,
+            RESIZE_CACHE_DIR=os.path.join(media_root, 'resized'),
+            UPLOAD_SESSION_DIR=os.path.join(media_root, 'sessions'),
+        ):
+            self.stdout.write(f'Creating {len(names)} files...')
+            for name in names:
+                path = os.path.join(media_root, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, 'wb').close()
+            pending = iter(referenced)
+            create_arts(
+                len(referenced),
+                benchmark_user(),
+                values=lambda rng: {'image': next(pending)}
+            )
+
+            self.root = os.path.join(media_root, 'uploads')
+            runs = {
+                'one pass': len(referenced),
+                f'{options["passes"]} passes': math.ceil(
+                    len(referenced) / options['passes']
+                ),
+            }
+            self.section(
+                f'{len(names)} files, {len(referenced)} referenced'
+            )
+            for label, keys in runs.items():
+                self.measure(
+                    f'{label} dry run',
+                    lambda: self.gc_media(keys, dry_run=True)
+                )
+                self.report(
+                    f'{label} peak allocated',
+                    f'{self.traced_peak(keys) / 1024 / 1024:.1f} MB'
+                )
+
+            start = time.perf_counter()
+            output = self.gc_media(len(referenced))
+            self.report(
+                'removing orphans',
+                f'{(time.perf_counter() - start) * 1000:.2f} ms'
+            )
+            self.stdout.write(f'  {output.strip()}')
+
+    def gc_media(self, max_keys, **options):
+        out = StringIO()
+        call_command(
+            'gc_media',
+            root=self.root,
+            grace_hours=0,
+            max_keys_per_pass=max(max_keys, 1),
+            stdout=out,
+            **options
+        )
+        return out.getvalue()
+
+    def traced_peak(self, max_keys):
+        """Peak bytes allocated by a dry run, NumPy arrays included"""
+        tracemalloc.start()
+        try:
+            self.gc_media(max_keys, dry_run=True)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,60 @@
+"""
+Django command timing the `name` substring filter: the trigram index
+used by the artist and character viewsets against the LIKE '%x%' scan it
+replaced, at growing table sizes.
+use: python manage.py bench_name_filter --sizes 10000 100000 1000000
+"""
+from core.benchmarks import BenchmarkCommand
+from portfolio.api.filters import filter_name_contains
+from portfolio.benchmarks import benchmark_user, create_artists, random_names
+from portfolio.models import Artist
+
+
+PAGE_SIZE = 20
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare the trigram name filter with a LIKE scan.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10 * 1000, 100 * 1000, 1000 * 1000],
+        )
+
+    def benchmark(self, **options):
+        sizes = sorted(options['sizes'])
+        names = random_names(sizes[-1])
+        user = benchmark_user()
+        # A rare substring (most of one name) and a frequent one
+        sample = names[0]
+        queries = {
+            'rare': sample[1:-1],
+            'frequent': sample[1:4],
+        }
+
+        created = 0
+        for size in sizes:
+            create_artists(names[created:size], user, trigrams=True)
+            created = size
+
+            for kind, value in queries.items():
+                self.section(f'{size} artists, {kind} substring {value!r}')
+                strategies = {
+                    'LIKE': Artist.objects.filter(name__contains=value),
+                    'trigrams': filter_name_contains(
+                        Artist.objects.all(),
+                        value
+                    ),
+                }
+                for name, queryset in strategies.items():
+                    queryset = queryset.order_by('id')
+                    self.report(f'{name} matches', queryset.count())
+                    self.measure(
+                        f'{name} first page',
+                        lambda: list(queryset[:PAGE_SIZE])
+                    )
+                    self.measure(f'{name} count', queryset.count)
@@ -0,0 +1,94 @@
+"""
+Django command timing the perceptual hash index behind
+/api/arts/{id}/similar/: building it, refreshing it and querying it.
+use: python manage.py bench_similar --arts 1000000
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core.benchmarks import BenchmarkCommand
+from portfolio import indexes, similar
+from portfolio.benchmarks import benchmark_user, create_arts
+from portfolio.models import Art
+
+
+def random_phash(rng):
+    return {'phash': rng.getrandbits(64) - (1 << 63)}
+
+
+class Command(BenchmarkCommand):
+    help = 'Time building, refreshing and querying the hash index.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--arts', type=int, default=1000 * 1000)
+        parser.add_argument(
+            '--updated',
+            type=int,
+            default=100,
+            help='Arts changed before each incremental refresh.',
+        )
+
+    def benchmark(self, **options):
+        self.stdout.write(f'Creating {options["arts"]} hashed arts...')
+        create_arts(options['arts'], benchmark_user(), values=random_phash)
+        rng = random.Random(1)
+
+        self.section(f'{options["arts"]} hashes')
+        self.measure('full build', self.rebuild)
+        self.report(
+            'incremental refresh',
+            f'{self.refresh(options["updated"], rng):.2f} ms'
+        )
+
+        index = indexes.get_art_index(similar.HashIndex)
+        query = rng.getrandbits(64) - (1 << 63)
+        self.measure('query', lambda: index.search(query, 10, 12))
+        if similar.popcount is not similar.table_popcount:
+            values = index.values ^ index.encode([query])[0]
+            self.measure(
+                'native popcount',
+                lambda: similar.popcount(values)
+            )
+            self.measure(
+                'table popcount',
+                lambda: similar.table_popcount(values)
+            )
+
+        art = Art.objects.order_by('pk').first()
+        url = reverse('art-similar', kwargs={'pk': art.pk})
+        client = APIClient()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            res = client.get(url)
+            if res.status_code != 200:
+                raise CommandError(f'{url} failed: {res.content}')
+            self.measure('endpoint', lambda: client.get(url))
+
+    def rebuild(self):
+        indexes._indexes.pop(similar.HashIndex, None)
+        indexes.get_art_index(similar.HashIndex)
+
+    def refresh(self, updated, rng):
+        """Median time to pick up `updated` changed arts"""
+        indexes.get_art_index(similar.HashIndex)
+        pks = Art.objects.values_list('pk', flat=True)
+        first, last = pks.order_by('pk')[0], pks.order_by('-pk')[0]
+        durations = []
+        for _ in range(self.repeat):
+            for pk in rng.sample(range(first, last + 1), updated):
+                Art.objects.filter(pk=pk).update(
+                    updated_at=timezone.now(),
+                    **random_phash(rng)
+                )
+            start = time.perf_counter()
+            indexes.get_art_index(similar.HashIndex)
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations)
@@ -0,0 +1,60 @@
+"""
+Django command timing the art tag filter: the EXISTS semi-join used by
+ArtViewSet against the JOIN + DISTINCT it replaced.
+use: python manage.py bench_tag_filter --arts 1000000 --tags 50
+"""
+from core.benchmarks import BenchmarkCommand
+from portfolio.api.filters import has_any_tag
+from portfolio.benchmarks import benchmark_user, create_arts
+from portfolio.deletion import visible_arts
+
+
+PAGE_SIZE = 20
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare the EXISTS tag filter with JOIN + DISTINCT.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--arts', type=int, default=1000 * 1000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-art', type=int, default=3)
+        parser.add_argument(
+            '--filter-tags',
+            type=int,
+            default=3,
+            help='Tags in the ?tags= filter being timed.',
+        )
+
+    def benchmark(self, **options):
+        self.stdout.write(
+            f'Creating {options["arts"]} arts with {options["tags"]} tags...'
+        )
+        tag_ids = create_arts(
+            options['arts'],
+            benchmark_user(),
+            tags=options['tags'],
+            tags_per_art=options['tags_per_art'],
+        )
+        filter_ids = tag_ids[:options['filter_tags']]
+        offset = options['arts'] // 2
+
+        strategies = {
+            'JOIN + DISTINCT': visible_arts().filter(
+                tags__id__in=filter_ids
+            ).distinct(),
+            'EXISTS': visible_arts().filter(has_any_tag(filter_ids)),
+        }
+        for name, queryset in strategies.items():
+            queryset = queryset.order_by('id')
+            self.section(name)
+            self.measure(
+                'first page',
+                lambda: list(queryset[:PAGE_SIZE])
+            )
+            self.measure(
+                f'page at offset {offset}',
+                lambda: list(queryset[offset:offset + PAGE_SIZE])
+            )
+            self.measure('count', queryset.count)
@@ -0,0 +1,119 @@
+"""
+Django command measuring the peak memory of receiving one image upload:
+parsing the multipart body and validating the image, as the upload-image
+actions do, against the default handlers with DRF's ImageField.
+use: python manage.py bench_uploads --sizes 1 4 9 --megapixels 36
+"""
+import os
+import statistics
+import tempfile
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler
+)
+from django.http.multipartparser import MultiPartParser
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+from rest_framework import serializers
+
+from core.benchmarks import BenchmarkCommand, peak_rss_growth
+from portfolio.images import inspect_upload
+
+
+def noise_jpeg(megabytes):
+    """A JPEG of about the given size, noise does not compress"""
+    side = int((megabytes * 1024 * 1024 / 1.1) ** 0.5)
+    pixels = np.random.default_rng(0).integers(
+        0, 256, (side, side, 3), dtype=np.uint8
+    )
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=95)
+    return buffer.getvalue()
+
+
+def flat_jpeg(megapixels):
+    """A small file holding many pixels"""
+    side = int((megapixels * 1000 * 1000) ** 0.5)
+    buffer = BytesIO()
+    Image.new('RGB', (side, side), 'gray').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def receive(body_path, handlers, validate):
+    """Parse a multipart body from disk and validate its image"""
+    with open(body_path, 'rb') as body:
+        meta = {
+            'CONTENT_TYPE': MULTIPART_CONTENT,
+            'CONTENT_LENGTH': os.path.getsize(body_path),
+        }
+        _, files = MultiPartParser(meta, body, handlers()).parse()
+        validate(files['image'])
+
+
+STRATEGIES = {
+    'memory handler, ImageField': (
+        lambda: [MemoryFileUploadHandler(), TemporaryFileUploadHandler()],
+        lambda file: serializers.ImageField().run_validation(file),
+    ),
+    'temporary file, header check': (
+        lambda: [TemporaryFileUploadHandler()],
+        inspect_upload,
+    ),
+    # What validating by decoding the pixels would cost
+    'temporary file, full decode': (
+        lambda: [TemporaryFileUploadHandler()],
+        lambda file: Image.open(file).load(),
+    ),
+}
+
+
+class Command(BenchmarkCommand):
+    help = 'Measure the peak RSS growth of receiving an image upload.'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--sizes',
+            type=float,
+            nargs='+',
+            default=[1, 4, 9],
+            help='Sizes in MB of noise images to upload.',
+        )
+        parser.add_argument(
+            '--megapixels',
+            type=float,
+            default=36,
+            help='Pixels of a flat, small-file image to upload.',
+        )
+
+    def benchmark(self, **options):
+        images = {
+            f'{size:g}MB noise': noise_jpeg(size)
+            for size in options['sizes']
+        }
+        images[f'{options["megapixels"]:g}MP flat'] = flat_jpeg(
+            options['megapixels']
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            body_path = os.path.join(directory, 'body')
+            for label, content in images.items():
+                with open(body_path, 'wb') as body:
+                    body.write(encode_multipart(BOUNDARY, {
+                        'image': SimpleUploadedFile('image.jpg', content),
+                    }))
+                self.section(f'{label} ({len(content) // 1024} KB)')
+                for name, (handlers, validate) in STRATEGIES.items():
+                    growth = statistics.median(
+                        peak_rss_growth(
+                            lambda: receive(body_path, handlers, validate)
+                        )
+                        for _ in range(self.repeat)
+                    )
+                    self.report(name, f'{growth / 1024:.1f} MB')
@@ -0,0 +1,293 @@
+"""
+Django command removing media files no image field refers to.
+"""
+import hashlib
+import math
+import os
+import shutil
+import time
+
+import numpy as np
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import StoredFile
+from portfolio.images import VARIANTS
+from portfolio.models import Art, Artist
+
+
+MODELS = [Artist, Art]
+SCAN_SLICE = 10000
+# Suffixes of the files generated next to an original
+DERIVED_SUFFIXES = tuple(f'_{variant}' for variant in [*VARIANTS, 'variants'])
+
+
+def file_key(name):
+    """
+    Return the name of the original a media file belongs to, without its
+    extension: variants and manifests share the key of their original.
+    """
+    root = os.path.splitext(name)[0]
+    for suffix in DERIVED_SUFFIXES:
+        if root.endswith(suffix):
+            return root[:-len(suffix)]
+    return root
+
+
+def key_hash(key):
+    """64-bit hash of a key; a collision only keeps an orphan around"""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def contains(sorted_keys, values):
+    """Boolean mask of the values present in a sorted array"""
+    if not len(sorted_keys):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(sorted_keys, values)
+    positions = np.minimum(positions, len(sorted_keys) - 1)
+    return sorted_keys[positions] == values
+
+
+def modified_since(paths, cutoff):
+    """Whether any of the existing files was modified after cutoff"""
+    for path in paths:
+        try:
+            if os.stat(path).st_mtime >= cutoff:
+                return True
+        except FileNotFoundError:
+            pass
+    return False
+
+
+def walk_directories(root, skip):
+    """
+    Yield (directory, [entries]) for the files of a tree, in slices of at
+    most SCAN_SLICE entries so no directory is ever listed whole.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = []
+                for entry in iterator:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path not in skip:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        entries.append(entry)
+                        if len(entries) == SCAN_SLICE:
+                            yield directory, entries
+                            entries = []
+        except FileNotFoundError:
+            continue
+        if entries:
+            yield directory, entries
+
+
+class Command(BaseCommand):
+    """
+    Django command to delete or quarantine orphaned media files.
+    Referenced names are hashed into a sorted uint64 array, read in id
+    ordered chunks, and the media tree is streamed with os.scandir and
+    checked against it. When there are more references than fit one
+    pass, keys are partitioned by hash and the tree is scanned once per
+    partition, which bounds memory whatever the number of files.
+    Files modified within the grace period are always kept.
+    use: python manage.py gc_media [--dry-run] [--quarantine DIR]
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report orphans without touching them.',
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Keep files modified more recently than this.',
+        )
+        parser.add_argument(
+            '--quarantine',
+            help='Move orphans under this directory instead of deleting.',
+        )
+        parser.add_argument(
+            '--root',
+            default=os.path.join(settings.MEDIA_ROOT, 'uploads'),
+            help='Directory to collect, under MEDIA_ROOT.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument(
+            '--max-keys-per-pass',
+            type=int,
+            default=20 * 1000 * 1000,
+            help='Referenced keys held in memory at once, 8 bytes each.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        self.options = options
+        root = os.path.abspath(options['root'])
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        if os.path.commonpath([root, media_root]) != media_root:
+            raise CommandError(f'{root} is not under MEDIA_ROOT.')
+
+        self.media_root = media_root
+        self.skip = {
+            os.path.abspath(path)
+            for path in [
+                settings.RESIZE_CACHE_DIR,
+                settings.UPLOAD_SESSION_DIR,
+                options['quarantine'] or '',
+            ]
+            if path
+        }
+        self.cutoff = time.time() - options['grace_hours'] * 3600
+
+        references = sum(
+            model.objects.exclude(image='').exclude(image=None).count()
+            for model in MODELS
+        )
+        partitions = max(
+            1,
+            math.ceil(references / options['max_keys_per_pass'])
+        )
+        totals = {'files': 0, 'orphans': 0, 'bytes': 0}
+        for partition in range(partitions):
+            keys = self.referenced_keys(partition, partitions)
+            counts = self.collect(root, keys, partition, partitions)
+            for name, count in counts.items():
+                totals[name] += count
+            if partitions > 1:
+                self.stdout.write(
+                    f'pass {partition + 1}/{partitions}: '
+                    f'{counts["orphans"]} orphans'
+                )
+
+        verb = 'would remove' if options['dry_run'] else 'removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{totals["files"]} files scanned, {verb} '
+            f'{totals["orphans"]} orphans '
+            f'({totals["bytes"] / 1024 / 1024:.1f}MB)'
+        ))
+
+    def referenced_keys(self, partition, partitions):
+        """Sorted hashes of the referenced keys falling in a partition"""
+        chunks = []
+        for model in MODELS:
+            queryset = model.objects.exclude(image='').exclude(image=None)
+            last_id = 0
+            while True:
+                rows = list(
+                    queryset.filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .values_list('pk', 'image')[:self.options['chunk_size']]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                hashes = np.fromiter(
+                    (key_hash(file_key(name)) for _, name in rows),
+                    dtype=np.uint64,
+                    count=len(rows)
+                )
+                chunks.append(hashes[hashes % partitions == partition])
+
+        if not chunks:
+            return np.empty(0, dtype=np.uint64)
+        return np.unique(np.concatenate(chunks))
+
+    def collect(self, root, keys, partition, partitions):
+        """Scan the tree once and remove orphans of one partition"""
+        counts = {'files': 0, 'orphans': 0, 'bytes': 0}
+        batch, batched = [], 0
+        for _, entries in walk_directories(root, self.skip):
+            names = [
+                os.path.relpath(entry.path, self.media_root)
+                for entry in entries
+            ]
+            hashes = np.fromiter(
+                (key_hash(file_key(name)) for name in names),
+                dtype=np.uint64,
+                count=len(names)
+            )
+            mine = hashes % partitions == partition
+            counts['files'] += int(mine.sum())
+            orphaned = mine & ~contains(keys, hashes)
+
+            groups = {}
+            for entry, name, candidate in zip(entries, names, orphaned):
+                if candidate:
+                    groups.setdefault(file_key(name), []).append(
+                        (name, entry)
+                    )
+            for group in groups.values():
+                stats = [
+                    entry.stat(follow_symlinks=False) for _, entry in group
+                ]
+                # Variants follow their original: one recent file keeps
+                # the whole group
+                if max(stat.st_mtime for stat in stats) >= self.cutoff:
+                    continue
+                counts['orphans'] += len(group)
+                counts['bytes'] += sum(stat.st_size for stat in stats)
+                batch.append([name for name, _ in group])
+                batched += len(group)
+                if batched >= self.options['batch_size']:
+                    self.remove(batch)
+                    batch, batched = [], 0
+
+        if batch:
+            self.remove(batch)
+        return counts
+
+    def remove(self, groups):
+        """
+        Delete or quarantine groups of orphaned files. Reference rows are
+        locked, so a concurrent upload of the same content either waits
+        or has already refreshed the file's mtime, which is checked again.
+        """
+        if self.options['verbosity'] > 1:
+            for group in groups:
+                for name in group:
+                    self.stdout.write(f'orphan: {name}')
+        if self.options['dry_run']:
+            return
+
+        names = [name for group in groups for name in group]
+        with transaction.atomic():
+            stored = set(
+                StoredFile.objects.select_for_update()
+                .filter(name__in=names)
+                .values_list('name', flat=True)
+            )
+            removed = []
+            for group in groups:
+                paths = [os.path.join(self.media_root, n) for n in group]
+                if modified_since(paths, self.cutoff):
+                    continue
+                for name, path in zip(group, paths):
+                    self.discard(name, path)
+                    removed.append(name)
+            StoredFile.objects.filter(
+                name__in=[name for name in removed if name in stored]
+            ).delete()
+
+    def discard(self, name, path):
+        """Delete a file, or move it to the quarantine directory"""
+        quarantine = self.options['quarantine']
+        try:
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
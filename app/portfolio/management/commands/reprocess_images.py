@@ -0,0 +1,196 @@
+"""
+Django command regenerating the variants of every stored image and
+backfilling missing features (blurhash, hash, palette) of images.
+"""
+import json
+import os
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.generations import bump_generation
+from core.storage import image_storage
+from core.utils import fork_process_pool
+from portfolio.images import IMAGE_FEATURES, image_features, reprocess_image
+from portfolio.models import Art, Artist
+
+
+MODELS = [Artist, Art]
+
+
+def reprocess_safely(model, name, force, features=()):
+    """
+    Pool entrypoint returning (outcome, {feature: value}): one broken
+    file must not stop the run.
+    """
+    try:
+        outcome = reprocess_image(model, name, force)
+        if outcome == 'missing' or not features:
+            return outcome, {}
+        with image_storage.open(name, 'rb') as file:
+            return outcome, image_features(model, file, features)
+    except Exception:
+        return 'failed', {}
+
+
+class Command(BaseCommand):
+    """
+    Django command to regenerate image variants.
+    Rows are walked by id in chunks; after each chunk the last id is
+    checkpointed, so an interrupted run resumes where it stopped.
+    use: python manage.py reprocess_images [--force] [--restart]
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Pool size; 0 processes images in this process.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.MEDIA_ROOT, '.reprocess_images'),
+            help='File recording the last processed id of each model.',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint and start from the first row.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate even when variants are up to date.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        self.options = options
+        self.checkpoint = {}
+        if not options['restart']:
+            self.checkpoint = self.read_checkpoint()
+
+        self.pool = None
+        if options['processes']:
+            self.pool = fork_process_pool(options['processes'])
+        try:
+            for model in MODELS:
+                self.reprocess(model)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        self.stdout.write(self.style.SUCCESS('Reprocessing finished!'))
+
+    def read_checkpoint(self):
+        try:
+            with open(self.options['checkpoint']) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def write_checkpoint(self):
+        """Replace the checkpoint atomically so a crash cannot corrupt it"""
+        path = self.options['checkpoint']
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.checkpoint, file)
+        os.replace(f'{path}.tmp', path)
+
+    def run_chunk(self, label, rows):
+        args = [
+            (label, name, self.options['force'], features)
+            for _, name, features in rows
+        ]
+        if self.pool is None:
+            return [reprocess_safely(*arg) for arg in args]
+
+        return list(self.pool.map(reprocess_safely, *zip(*args)))
+
+    def save_features(self, model, features):
+        """
+        Store features computed from {pk: (image name, values)}, moving
+        updated_at for the indexes. Rows whose image was replaced since
+        it was read are skipped, their processing job covers them.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            current = set(
+                model.objects.select_for_update()
+                .filter(pk__in=features)
+                .values_list('pk', 'image')
+            )
+            groups = defaultdict(list)
+            for pk, (name, values) in features.items():
+                if (pk, name) in current:
+                    groups[tuple(values)].append(
+                        model(pk=pk, updated_at=now, **values)
+                    )
+            for fields, instances in groups.items():
+                model.objects.bulk_update(
+                    instances,
+                    [*fields, 'updated_at']
+                )
+        bump_generation(model)
+
+    def reprocess(self, model):
+        label = model._meta.label_lower
+        last_id = self.checkpoint.get(label, 0)
+        queryset = model.objects.exclude(image='').exclude(image=None)
+        features = list(IMAGE_FEATURES[label])
+        total = queryset.filter(pk__gt=last_id).count()
+        if last_id:
+            self.stdout.write(f'{label}: resuming after id {last_id}')
+
+        done = 0
+        outcomes = Counter()
+        started = time.monotonic()
+        while True:
+            chunk = (
+                queryset.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', 'image', *features)
+            )
+            rows = [
+                (pk, name, [
+                    feature
+                    for feature, value in zip(features, values)
+                    if value is None
+                ])
+                for pk, name, *values in chunk[:self.options['chunk_size']]
+            ]
+            if not rows:
+                break
+
+            results = self.run_chunk(label, rows)
+            computed = {}
+            for (pk, name, _), (result, values) in zip(rows, results):
+                if result in ('failed', 'missing'):
+                    self.stderr.write(f'{label} {pk}: {result} ({name})')
+                if values:
+                    computed[pk] = (name, values)
+            if computed:
+                self.save_features(model, computed)
+            outcomes.update(result for result, _ in results)
+            last_id = rows[-1][0]
+            self.checkpoint[label] = last_id
+            self.write_checkpoint()
+
+            done += len(rows)
+            rate = done / max(time.monotonic() - started, 1e-6)
+            summary = ', '.join(
+                f'{count} {outcome}'
+                for outcome, count in sorted(outcomes.items())
+            )
+            self.stdout.write(
+                f'{label}: {done}/{total} images, '
+                f'{rate:.1f} images/s ({summary})'
+            )
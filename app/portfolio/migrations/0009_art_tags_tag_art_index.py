@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+INDEX = models.Index(fields=['tag', 'art'], name='portfolio_art_tags_tag_art')
+
+
+def add_index(apps, schema_editor):
+    """Add a covering (tag_id, art_id) index to the art tags through table"""
+    through = apps.get_model('portfolio', 'Art').tags.through
+    schema_editor.add_index(through, INDEX)
+
+
+def remove_index(apps, schema_editor):
+    through = apps.get_model('portfolio', 'Art').tags.through
+    schema_editor.remove_index(through, INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_alter_tag_description'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
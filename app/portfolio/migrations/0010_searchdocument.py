@@ -0,0 +1,75 @@
+# Generated by Django 4.2 on 2026-10-18 08:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def document_body(title, subtitle, description, artist_name,
+                  tag_names, character_names):
+    """Searchable text of an art, as portfolio.search built it"""
+    parts = [title, subtitle, description, artist_name]
+    parts += list(tag_names) + list(character_names)
+    return '\n'.join(part for part in parts if part)
+
+
+def add_fulltext_index(apps, schema_editor):
+    """MySQL ranks searches with a FULLTEXT index on the document body"""
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX portfolio_searchdocument_body_ft '
+            'ON portfolio_searchdocument (body)'
+        )
+
+
+def remove_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'DROP INDEX portfolio_searchdocument_body_ft '
+            'ON portfolio_searchdocument'
+        )
+
+
+def create_documents(apps, schema_editor):
+    """Build search documents for existing arts"""
+    Art = apps.get_model('portfolio', 'Art')
+    SearchDocument = apps.get_model('portfolio', 'SearchDocument')
+    arts = Art.objects.select_related('artist').prefetch_related(
+        'tags', 'characters'
+    ).order_by('id')
+    documents = []
+    for art in arts.iterator(chunk_size=1000):
+        documents.append(SearchDocument(
+            art=art,
+            body=document_body(
+                art.title,
+                art.subtitle,
+                art.description,
+                art.artist.name,
+                [tag.name for tag in art.tags.all()],
+                [character.name for character in art.characters.all()],
+            )
+        ))
+        if len(documents) == 1000:
+            SearchDocument.objects.bulk_create(documents)
+            documents = []
+    SearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_art_tags_tag_art_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('art', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='portfolio.art')),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(add_fulltext_index, remove_fulltext_index),
+        migrations.RunPython(create_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2 on 2026-10-18 08:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def name_trigrams(name):
+    """Lowercase 3-character substrings of a name, as core.utils built them"""
+    name = name.lower()
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def create_trigrams(apps, schema_editor):
+    """Index the names of existing artists and characters"""
+    for model_name, owner_field in [
+        ('Artist', 'artist_id'),
+        ('Character', 'character_id'),
+    ]:
+        model = apps.get_model('portfolio', model_name)
+        trigram_model = apps.get_model(
+            'portfolio', f'{model_name}NameTrigram'
+        )
+        rows = []
+        for pk, name in model.objects.values_list('pk', 'name').iterator():
+            rows += [
+                trigram_model(trigram=trigram, **{owner_field: pk})
+                for trigram in name_trigrams(name)
+            ]
+            if len(rows) >= 1000:
+                trigram_model.objects.bulk_create(rows)
+                rows = []
+        trigram_model.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CharacterNameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('character', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_trigrams', to='portfolio.character')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArtistNameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('artist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_trigrams', to='portfolio.artist')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='characternametrigram',
+            index=models.Index(fields=['trigram', 'character'], name='portfolio_c_trigram_144e77_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artistnametrigram',
+            index=models.Index(fields=['trigram', 'artist'], name='portfolio_a_trigram_d6154f_idx'),
+        ),
+        migrations.RunPython(create_trigrams, migrations.RunPython.noop),
+    ]
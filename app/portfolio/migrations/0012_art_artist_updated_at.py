@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0011_name_trigrams'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='art',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
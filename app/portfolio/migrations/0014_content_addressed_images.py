@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 09:20
+
+import core.storage
+from django.db import migrations, models
+import portfolio.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0013_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='art',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.content_addressed_storage, upload_to=portfolio.models.art_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='artist',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.content_addressed_storage, upload_to=portfolio.models.artist_image_file_path),
+        ),
+    ]
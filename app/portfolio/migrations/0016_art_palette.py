@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0015_art_phash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='art',
+            name='palette',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,201 @@
+# Generated by Django 4.2 on 2026-10-18 09:37
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+from django.db import migrations, models
+
+import numpy as np
+from PIL import Image, ImageOps
+
+
+BATCH_SIZE = 500
+
+# Copied from portfolio.images and portfolio.blurhash as they were when
+# this migration was written, so later changes to them cannot alter it.
+ORIENTATION_TAG = 0x0112
+BLURHASH_SIDE = 32
+BASE83 = (
+    '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    'abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+)
+
+
+def image_metadata(file):
+    """Displayed dimensions and byte size of an image"""
+    file.seek(0)
+    image = Image.open(file)
+    width, height = image.size
+    if image.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8):
+        width, height = height, width
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_bytes': size,
+    }
+
+
+def base83(value, length):
+    return ''.join(
+        BASE83[value // 83 ** (length - i) % 83]
+        for i in range(1, length + 1)
+    )
+
+
+def srgb_to_linear(values):
+    values = values / 255
+    return np.where(
+        values <= 0.04045,
+        values / 12.92,
+        ((values + 0.055) / 1.055) ** 2.4
+    )
+
+
+def linear_to_srgb(value):
+    value = min(max(value, 0), 1)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def image_blurhash(file, x_components=4, y_components=3):
+    """4x3 component blurhash of an image scaled to 32 pixels"""
+    file.seek(0)
+    image = Image.open(file)
+    image.draft('RGB', (BLURHASH_SIDE, BLURHASH_SIDE))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail((BLURHASH_SIDE, BLURHASH_SIDE), Image.LANCZOS)
+
+    pixels = srgb_to_linear(np.asarray(image, dtype=np.float64))
+    height, width = pixels.shape[:2]
+    basis_x = np.cos(
+        np.pi * np.outer(np.arange(x_components), np.arange(width)) / width
+    )
+    basis_y = np.cos(
+        np.pi * np.outer(np.arange(y_components), np.arange(height)) / height
+    )
+    factors = np.einsum('jy,ix,yxc->jic', basis_y, basis_x, pixels)
+    factors /= width * height
+    factors[1:] *= 2
+    factors[0, 1:] *= 2
+    factors = factors.reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+    result = base83((x_components - 1) + (y_components - 1) * 9, 1)
+    quantised_max = int(max(0, min(82, np.floor(
+        np.abs(ac).max() * 166 - 0.5
+    ))))
+    maximum = (quantised_max + 1) / 166
+    result += base83(quantised_max, 1)
+
+    red, green, blue = (linear_to_srgb(value) for value in dc)
+    result += base83((red << 16) + (green << 8) + blue, 4)
+
+    quantised = np.floor(
+        np.sign(ac) * np.abs(ac / maximum) ** 0.5 * 9 + 9.5
+    ).clip(0, 18).astype(int)
+    for red, green, blue in quantised:
+        result += base83(red * 19 * 19 + green * 19 + blue, 2)
+    return result
+
+
+def read_metadata(storage, name):
+    """Metadata of a stored image, None when it is missing or broken"""
+    try:
+        with storage.open(name, 'rb') as file:
+            return {
+                **image_metadata(file),
+                'image_blurhash': image_blurhash(file),
+            }
+    except Exception:
+        return None
+
+
+def backfill_metadata(apps, schema_editor):
+    """
+    Record the metadata of existing images. Files are read and decoded
+    by a thread pool, Pillow and NumPy release the GIL while doing so;
+    rows are written from this thread in batches.
+    """
+    fields = ['image_width', 'image_height', 'image_bytes', 'image_blurhash']
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        for model_name in ['Artist', 'Art']:
+            model = apps.get_model('portfolio', model_name)
+            storage = model._meta.get_field('image').storage
+            rows = model.objects.exclude(image='').exclude(image=None)
+            last_id = 0
+            while True:
+                batch = list(
+                    rows.filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .values_list('pk', 'image')[:BATCH_SIZE]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                results = executor.map(
+                    lambda row: read_metadata(storage, row[1]),
+                    batch
+                )
+                model.objects.bulk_update([
+                    model(pk=pk, **metadata)
+                    for (pk, _), metadata in zip(batch, results)
+                    if metadata is not None
+                ], fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0016_art_palette'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='art',
+            name='image_blurhash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='art',
+            name='image_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='art',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='art',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='image_blurhash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='image_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0017_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artist',
+            name='hidden',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -2,12 +2,19 @@ from django.db import models
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 
+from core.storage import content_addressed_storage
+from core.utils import name_trigrams
+
 import uuid
 import os
 
 
 def art_image_file_path(instance, filename):
-    """Generate file path for new art image."""
+    """
+    Generate file path for new art image.
+    The storage keeps the directory and extension but names the file by
+    its content hash.
+    """
     ext = os.path.splitext(filename)[1]
     filename = f'{uuid.uuid4()}{ext}'
 
@@ -27,6 +34,21 @@ def normalize_name(str):
     return str.lower().strip().title()
 
 
+def update_name_trigrams(instance):
+    """Sync the trigram index rows of an artist or character name"""
+    wanted = name_trigrams(instance.name)
+    current = set(instance.name_trigrams.values_list('trigram', flat=True))
+    if current - wanted:
+        instance.name_trigrams.filter(trigram__in=current - wanted).delete()
+    if wanted - current:
+        trigram_model = instance.name_trigrams.model
+        owner_field = instance.name_trigrams.field.name
+        trigram_model.objects.bulk_create([
+            trigram_model(trigram=trigram, **{owner_field: instance})
+            for trigram in wanted - current
+        ])
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=20, unique=True)
     description = models.CharField(max_length=255, null=True, blank=True)
@@ -67,7 +89,9 @@ class Character(models.Model):
 
     def save(self, *args, **kwargs):
         self.name = normalize_name(self.name)
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        update_name_trigrams(self)
+        return result
 
 
 class Artist(models.Model):
@@ -75,13 +99,22 @@ class Artist(models.Model):
     image = models.ImageField(
         null=True,
         blank=True,
-        upload_to=artist_image_file_path
+        upload_to=artist_image_file_path,
+        storage=content_addressed_storage
     )
+    # Recorded when an image is uploaded, so clients can reserve space
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    image_blurhash = models.CharField(max_length=64, null=True, blank=True)
     instagram = models.CharField(max_length=128, blank=True, null=True)
     deviant = models.CharField(max_length=128, blank=True, null=True)
     twitter = models.CharField(max_length=128, blank=True, null=True)
     oficial = models.CharField(max_length=128, blank=True, null=True)
     slug = models.SlugField(max_length=255, unique=True)
+    # Set while the artist and its artworks are deleted in the background
+    hidden = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
 
     def __str__(self):
@@ -90,7 +123,9 @@ class Artist(models.Model):
     def save(self, *args, **kwargs):
         self.name = normalize_name(self.name)
         self.slug = slugify(self.name)
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        update_name_trigrams(self)
+        return result
 
 
 class Art(models.Model):
@@ -106,7 +141,16 @@ class Art(models.Model):
     title = models.CharField(max_length=50)
     subtitle = models.CharField(max_length=100)
     description = models.TextField(blank=True)
-    image = models.ImageField(null=True, upload_to=art_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=art_image_file_path,
+        storage=content_addressed_storage
+    )
+    # Recorded when an image is uploaded, so clients can reserve space
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    image_blurhash = models.CharField(max_length=64, null=True, blank=True)
     type = models.IntegerField(choices=TYPE_CHOICES)
     tags = models.ManyToManyField(Tag, blank=True)
     characters = models.ManyToManyField(Character, blank=True)
@@ -115,7 +159,12 @@ class Art(models.Model):
         on_delete=models.CASCADE,
         related_name='artworks'
     )
+    # 64-bit difference hash of the image, stored as a signed integer
+    phash = models.BigIntegerField(null=True, blank=True)
+    # Dominant colors, [{"color": "#rrggbb", "weight": 0.4}, ...]
+    palette = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(null=False, auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     created_by = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
 
     def __str__(self):
@@ -125,3 +174,84 @@ class Art(models.Model):
         self.title = normalize_name(self.title)
         self.subtitle = normalize_name(self.subtitle)
         return super().save(*args, **kwargs)
+
+
+class NameTrigram(models.Model):
+    """
+    One lowercase 3-character substring of a name.
+    Substring filters look names up by their trigrams instead of
+    scanning the whole table with LIKE '%x%'.
+    """
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.trigram
+
+
+class ArtistNameTrigram(NameTrigram):
+    artist = models.ForeignKey(
+        Artist,
+        on_delete=models.CASCADE,
+        related_name='name_trigrams'
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=['trigram', 'artist'])]
+
+
+class CharacterNameTrigram(NameTrigram):
+    character = models.ForeignKey(
+        Character,
+        on_delete=models.CASCADE,
+        related_name='name_trigrams'
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=['trigram', 'character'])]
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized text of an art and its related names, kept up to date
+    by signals and used by the search endpoint.
+    """
+    art = models.OneToOneField(
+        Art,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Search document for art {self.art_id}'
+
+
+class UploadSession(models.Model):
+    """
+    Resumable upload of an art or artist image.
+    Chunks are appended to a temporary file until `offset` reaches
+    `size`, then the file is attached to the target's image field.
+    The request writing a chunk holds `writer` until its lease expires.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    model = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    writer = models.UUIDField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [models.Index(fields=['model', 'object_id'])]
+
+    def __str__(self):
+        return f'Upload {self.id} of {self.filename}'
@@ -0,0 +1,171 @@
+"""
+On demand resizing of art images with a size bounded disk cache.
+
+A resized image is written once under RESIZE_CACHE_DIR and reused until
+evicted. Entries are keyed by the original's name, which changes with
+its content, so they never go stale. Hits refresh the file's mtime and
+eviction removes the least recently used entries once the cache outgrows
+RESIZE_CACHE_MAX_BYTES. Identical concurrent requests are coalesced with
+file locks, so one process resizes while the others wait for its file.
+"""
+import fcntl
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+from PIL import Image, ImageOps
+
+from portfolio.images import ORIENTATION_TAG
+
+
+FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+MIN_WIDTH = 16
+MAX_WIDTH = 2400
+QUALITY = 80
+# Number of lock files requests are spread over
+LOCK_STRIPES = 256
+# Part of the cap written by a process before it scans for eviction
+EVICTION_SLACK = 0.1
+
+# Bumped when output changes, so older cache entries are not reused
+VERSION = 2
+
+_written = 0
+_written_lock = threading.Lock()
+
+
+def cache_key(name, width, extension):
+    """Return the cache key of a resized original"""
+    key = f'{VERSION}:{name}:{width}:{extension}'
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def cache_name(key, extension):
+    """Return the path of an entry relative to the cache directory"""
+    return os.path.join(key[:2], f'{key}.{extension}')
+
+
+def resize(file, width, format):
+    """Return an image scaled down to `width` and encoded as format"""
+    image = Image.open(file)
+    # The decoder works on the stored pixels, which orientations 5 to 8
+    # turn by 90 degrees: `width` is then their height
+    rotated = image.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8)
+    stored_width, stored_height = image.size
+    if rotated:
+        height = max(round(stored_width * width / stored_height), 1)
+        image.draft('RGB', (height, width))
+    else:
+        height = max(round(stored_height * width / stored_width), 1)
+        image.draft('RGB', (width, height))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if image.width > width:
+        height = max(round(image.height * width / image.width), 1)
+        image = image.resize((width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, quality=QUALITY)
+    return buffer.getvalue()
+
+
+def _lock_path(key):
+    directory = os.path.join(settings.RESIZE_CACHE_DIR, 'locks')
+    os.makedirs(directory, exist_ok=True)
+    stripe = int(key[:8], 16) % LOCK_STRIPES
+    return os.path.join(directory, f'{stripe}.lock')
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def get_resized(field_file, width, extension):
+    """
+    Return the cache name of field_file resized to width and extension,
+    resizing it first on a miss.
+    """
+    key = cache_key(field_file.name, width, extension)
+    name = cache_name(key, extension)
+    path = os.path.join(settings.RESIZE_CACHE_DIR, name)
+    if _touch(path):
+        return name
+
+    # flock conflicts between separate opens, so this excludes threads
+    # of this process as well as other processes
+    with open(_lock_path(key), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if _touch(path):
+                return name
+
+            with field_file.storage.open(field_file.name, 'rb') as file:
+                content = resize(file, width, FORMATS[extension])
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(path),
+                delete=False
+            ) as temporary:
+                temporary.write(content)
+            os.replace(temporary.name, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    _record_write(len(content))
+    return name
+
+
+def _record_write(size):
+    global _written
+
+    cap = settings.RESIZE_CACHE_MAX_BYTES
+    with _written_lock:
+        _written += size
+        if _written < cap * EVICTION_SLACK:
+            return
+        _written = 0
+    evict(cap)
+
+
+def _entries(directory):
+    for shard in os.scandir(directory):
+        if shard.name == 'locks' or not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.is_file() and not entry.name.startswith('tmp'):
+                yield entry
+
+
+def evict(max_bytes):
+    """Delete least recently used entries until the cache fits max_bytes"""
+    entries = []
+    total = 0
+    for entry in _entries(settings.RESIZE_CACHE_DIR):
+        stat = entry.stat()
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+    return total
@@ -0,0 +1,152 @@
+"""
+Full-text search over arts.
+
+Every art has a SearchDocument holding its text and the names of its
+artist, tags and characters. MySQL ranks documents with a FULLTEXT index,
+other databases (SQLite in development and tests) use an in-process
+inverted index scored with BM25.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from core.generations import bump_generation, get_generation
+from portfolio.models import Art, SearchDocument
+
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into lowercase words"""
+    return WORD_RE.findall(text.lower())
+
+
+def document_body(title, subtitle, description, artist_name,
+                  tag_names, character_names):
+    """Return the searchable text of an art"""
+    parts = [title, subtitle, description, artist_name]
+    parts += list(tag_names) + list(character_names)
+    return '\n'.join(part for part in parts if part)
+
+
+def update_search_documents(art_ids):
+    """Rebuild the search documents of the given arts"""
+    art_ids = set(art_ids)
+    if not art_ids:
+        return
+
+    arts = Art.objects.filter(pk__in=art_ids).select_related(
+        'artist'
+    ).prefetch_related('tags', 'characters')
+    documents = [
+        SearchDocument(
+            art=art,
+            body=document_body(
+                art.title,
+                art.subtitle,
+                art.description,
+                art.artist.name,
+                [tag.name for tag in art.tags.all()],
+                [character.name for character in art.characters.all()],
+            )
+        )
+        for art in arts
+    ]
+    with transaction.atomic():
+        SearchDocument.objects.filter(art_id__in=art_ids).delete()
+        SearchDocument.objects.bulk_create(documents)
+
+    bump_generation(SearchDocument)
+
+
+class InvertedIndex:
+    """In-memory inverted index with BM25 ranking"""
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, documents):
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        for doc_id, body in documents:
+            terms = tokenize(body)
+            self.lengths[doc_id] = len(terms)
+            for term, frequency in Counter(terms).items():
+                self.postings[term][doc_id] = frequency
+
+        total = sum(self.lengths.values())
+        self.average_length = total / len(self.lengths) if total else 0
+
+    def idf(self, term):
+        """Inverse document frequency, never negative"""
+        matches = len(self.postings.get(term, ()))
+        documents = len(self.lengths)
+        return math.log(1 + (documents - matches + 0.5) / (matches + 0.5))
+
+    def search(self, query, limit):
+        """Return up to `limit` (doc_id, score) pairs, best first"""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, frequency in postings.items():
+                norm = 1 - self.b + self.b * (
+                    self.lengths[doc_id] / self.average_length
+                )
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (
+                    frequency + self.k1 * norm
+                )
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+_index = None
+_index_generation = None
+_index_lock = threading.Lock()
+
+
+def get_inverted_index():
+    """Return this process' index, rebuilding it when documents changed"""
+    global _index, _index_generation
+
+    generation = get_generation(SearchDocument)
+    if _index is None or _index_generation != generation:
+        with _index_lock:
+            if _index is None or _index_generation != generation:
+                documents = SearchDocument.objects.values_list(
+                    'art_id', 'body'
+                ).iterator()
+                _index = InvertedIndex(documents)
+                _index_generation = generation
+
+    return _index
+
+
+def _fulltext_search(query, limit):
+    """Rank documents with MySQL's FULLTEXT index"""
+    score = RawSQL(
+        'MATCH (body) AGAINST (%s IN NATURAL LANGUAGE MODE)',
+        (query,)
+    )
+    return list(
+        SearchDocument.objects.annotate(score=score).filter(
+            score__gt=0
+        ).order_by('-score', 'art_id').values_list('art_id', 'score')[:limit]
+    )
+
+
+def search_arts(query, limit=1000):
+    """Return (art_id, score) pairs matching a query, best first"""
+    if not tokenize(query):
+        return []
+    if connection.vendor == 'mysql':
+        return _fulltext_search(query, limit)
+
+    return get_inverted_index().search(query, limit)
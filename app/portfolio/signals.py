@@ -0,0 +1,209 @@
+"""
+Signal handlers keeping derived portfolio data up to date
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.generations import bump_generation
+from portfolio.models import Art, Artist, Character, SearchDocument, Tag
+from portfolio.search import update_search_documents
+from portfolio.images import IMAGE_FEATURES, image_metadata, release_image
+from portfolio.indexes import DELETED_GENERATION
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Character)
+@receiver(post_save, sender=Artist)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Character)
+@receiver(post_delete, sender=Artist)
+def name_changed(sender, **kwargs):
+    """Move the generation read by the in-process name indexes"""
+    bump_generation(sender)
+
+
+@receiver(pre_save, sender=Art)
+@receiver(pre_save, sender=Artist)
+def image_saving(sender, instance, **kwargs):
+    """
+    Record the dimensions and size of a newly assigned image from its
+    header, or clear them when the image was removed. Features of the
+    previous image are cleared until the processing job computes the
+    new ones.
+    """
+    image = instance.image
+    if image:
+        if image._committed:
+            return
+        metadata = image_metadata(image.file)
+    elif instance.image_width is not None:
+        metadata = dict.fromkeys(
+            ['image_width', 'image_height', 'image_bytes']
+        )
+    else:
+        return
+
+    for field in IMAGE_FEATURES[sender._meta.label_lower]:
+        metadata[field] = None
+    for field, value in metadata.items():
+        setattr(instance, field, value)
+
+
+@receiver(pre_save, sender=Art)
+@receiver(pre_save, sender=Artist)
+def image_replacing(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored image a save may replace"""
+    instance._replaced_image = None
+    if instance.pk is None or (
+        update_fields is not None and 'image' not in update_fields
+    ):
+        return
+
+    stored = sender.objects.filter(pk=instance.pk).values_list(
+        'image',
+        flat=True
+    ).first()
+    image = instance.image
+    if stored and (stored != image.name or not image._committed):
+        instance._replaced_image = stored
+
+
+def release_after_commit(field_file):
+    transaction.on_commit(lambda: release_image(field_file))
+
+
+@receiver(post_save, sender=Art)
+@receiver(post_save, sender=Artist)
+def image_replaced(sender, instance, **kwargs):
+    """
+    Release the instance's reference to its previous image. Storing the
+    same content again returns the same name with one more reference,
+    which this releases too.
+    """
+    replaced = getattr(instance, '_replaced_image', None)
+    instance._replaced_image = None
+    if replaced:
+        field = instance.image.field
+        release_after_commit(field.attr_class(instance, field, replaced))
+
+
+@receiver(post_delete, sender=Art)
+@receiver(post_delete, sender=Artist)
+def image_owner_deleted(sender, instance, **kwargs):
+    """Release the image of a deleted art or artist"""
+    if instance.image:
+        release_after_commit(instance.image)
+
+
+@receiver(post_save, sender=Art)
+def art_saved(sender, instance, **kwargs):
+    """Rebuild the search document of a saved art"""
+    bump_generation(Art)
+    update_search_documents([instance.pk])
+
+
+@receiver(post_delete, sender=Art)
+def art_deleted(sender, instance, **kwargs):
+    """
+    The search document is removed by the cascade. Hash and palette
+    indexes only see updates, so they are rebuilt.
+    """
+    bump_generation(Art)
+    bump_generation(SearchDocument)
+    bump_generation(DELETED_GENERATION)
+
+
+def relations_changed(art_ids):
+    """
+    Touch updated_at and rebuild the search documents of arts whose
+    tags or characters changed, since those rows were not saved.
+    """
+    art_ids = list(art_ids)
+    if art_ids:
+        Art.objects.filter(pk__in=art_ids).update(updated_at=timezone.now())
+    bump_generation(Art)
+    update_search_documents(art_ids)
+
+
+@receiver(m2m_changed, sender=Art.tags.through)
+@receiver(m2m_changed, sender=Art.characters.through)
+def art_relations_changed(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Handle tags or characters being added to or removed from arts"""
+    if action == 'pre_clear' and reverse:
+        # Reverse side: instance is a Tag or Character
+        instance._cleared_art_ids = list(
+            instance.art_set.values_list('pk', flat=True)
+        )
+        return
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        relations_changed([instance.pk])
+    elif action == 'post_clear':
+        relations_changed(getattr(instance, '_cleared_art_ids', []))
+    else:
+        relations_changed(pk_set or [])
+
+
+@receiver(pre_save, sender=Artist)
+@receiver(pre_save, sender=Tag)
+@receiver(pre_save, sender=Character)
+def related_name_saving(sender, instance, update_fields=None, **kwargs):
+    """Remember whether a save changes the stored name"""
+    instance._renamed = False
+    if instance.pk is None or (
+        update_fields is not None and 'name' not in update_fields
+    ):
+        return
+
+    stored = sender.objects.filter(pk=instance.pk).values_list(
+        'name',
+        flat=True
+    ).first()
+    instance._renamed = stored is not None and stored != instance.name
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Character)
+def related_name_saved(sender, instance, created, **kwargs):
+    """
+    Rebuild the documents of arts showing a renamed related object.
+    Other saves, such as an image upload, leave the documents alone.
+    """
+    renamed = getattr(instance, '_renamed', False)
+    instance._renamed = False
+    if created or not renamed:
+        return
+    if sender is Artist:
+        arts = instance.artworks.all()
+    else:
+        arts = instance.art_set.all()
+
+    update_search_documents(arts.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Character)
+def related_name_deleting(sender, instance, **kwargs):
+    """Remember which arts lose a tag or character"""
+    instance._deleted_art_ids = list(
+        instance.art_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Character)
+def related_name_deleted(sender, instance, **kwargs):
+    """The cascade removed art relations without m2m_changed"""
+    relations_changed(getattr(instance, '_deleted_art_ids', []))
@@ -1,16 +1,32 @@
 from django.urls import reverse
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core.checks import check_shared_default_cache
+from core.models import StoredFile
 from portfolio import models
+from portfolio.images import delete_variants, variant_name
 from portfolio.api import serializers
 
 import tempfile
+import struct
+import zlib
+from io import BytesIO, StringIO
+from unittest.mock import patch
 import os
 
+import time
+from datetime import date, timedelta
+
 from PIL import Image
 
 
@@ -244,6 +260,7 @@ class ArtPublicEndpointsTest(TestCase):
         params = {'tags': f'{tag.id}'}
         res = self.client.get(art_create_list_url(), params)
 
+        self.art.refresh_from_db()
         s1 = serializers.ArtSerializer(self.art)
         s2 = serializers.ArtSerializer(another_art)
 
@@ -251,6 +268,29 @@ class ArtPublicEndpointsTest(TestCase):
         self.assertIn(s1.data, res.data['results'])
         self.assertNotIn(s2.data, res.data['results'])
 
+    def test_art_filter_by_tags_uses_semi_join(self):
+        """Test the tags filter runs EXISTS without JOIN + DISTINCT"""
+        self.art.save()
+        tags = [
+            models.Tag.objects.create(name=f'Tag {i}', created_by=self.user)
+            for i in range(2)
+        ]
+        self.art.tags.add(*tags)
+
+        params = {'tags': ','.join(str(tag.id) for tag in tags)}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(art_create_list_url(), params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 1)
+        list_sql = next(
+            query['sql'].upper() for query in ctx.captured_queries
+            if 'LIMIT' in query['sql'].upper()
+        )
+        self.assertIn('EXISTS', list_sql)
+        self.assertNotIn('DISTINCT', list_sql)
+        self.assertNotIn('JOIN', list_sql)
+
     def test_art_filter_by_artist(self):
         """Test filtering art by artist"""
         self.art.save()
@@ -285,6 +325,196 @@ class ArtPublicEndpointsTest(TestCase):
         self.assertIn(s2.data, res.data['results'])
         self.assertNotIn(s3.data, res.data['results'])
 
+    def _count_list_queries(self, arts_count):
+        """Create arts with tags and characters and count list queries"""
+        tag = models.Tag.objects.create(name='Tag', created_by=self.user)
+        character = models.Character.objects.create(
+            page_id='12345',
+            name='Some Comic Character',
+            slug='some-comic-character',
+            sex='F',
+            alive=True,
+            first_appearance=date.today(),
+            created_by=self.user
+        )
+        for i in range(arts_count):
+            art = models.Art.objects.create(
+                title=f'Art {i}',
+                subtitle='Art Subtitle',
+                type=1,
+                artist=self.artist,
+                created_by=self.user
+            )
+            art.tags.add(tag)
+            art.characters.add(character)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(art_create_list_url())
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), arts_count)
+        return len(ctx.captured_queries)
+
+    def test_art_list_queries_do_not_grow_with_page_size(self):
+        """Test listing arts runs a constant number of queries"""
+        few = self._count_list_queries(2)
+        models.Art.objects.all().delete()
+        models.Tag.objects.all().delete()
+        models.Character.objects.all().delete()
+        many = self._count_list_queries(20)
+
+        self.assertEqual(few, many)
+
+    def test_art_list_cursor_pagination(self):
+        """Test walking every art page with opaque keyset cursors"""
+        arts = [
+            models.Art.objects.create(
+                title=f'Art {i}',
+                subtitle='Art Subtitle',
+                type=1,
+                artist=self.artist,
+                created_by=self.user
+            )
+            for i in range(5)
+        ]
+        url = art_create_list_url()
+        params = {'pagination': 'cursor', 'limit': 2}
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(url, params)
+            params = None
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', res.data)
+            for query in ctx.captured_queries:
+                sql = query['sql'].upper()
+                # Only the ETag aggregate may count rows
+                if 'MAX(' not in sql:
+                    self.assertNotIn('COUNT(', sql)
+            seen.extend(art['id'] for art in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(seen, [art.id for art in arts])
+
+    def _assert_cached_and_invalidated(self):
+        """Test a repeated list is cached until arts or their tags change"""
+        self.art.save()
+        tag = models.Tag.objects.create(name='Tag', created_by=self.user)
+        url = art_create_list_url()
+
+        first = self.client.get(url, {'limit': 10, 'offset': ''})
+        # Only the ETag aggregate runs, the page comes from the cache
+        with self.assertNumQueries(1):
+            second = self.client.get(url, {'offset': '', 'limit': 10})
+        self.assertEqual(first.data, second.data)
+
+        self.art.tags.add(tag)
+        res = self.client.get(url, {'limit': 10})
+        self.assertEqual(res.data['results'][0]['tags'], [tag.id])
+
+        tag.delete()
+        res = self.client.get(url, {'limit': 10})
+        self.assertEqual(res.data['results'][0]['tags'], [])
+
+        self.client.get(art_detail_url(self.art.id))
+        self.art.title = 'Changed Title'
+        self.art.save()
+        res = self.client.get(art_detail_url(self.art.id))
+        self.assertEqual(res.data['title'], 'Changed Title')
+
+    def test_art_list_response_cache_process_local_backend(self):
+        """Test the cache works with Django's local memory cache"""
+        self._assert_cached_and_invalidated()
+
+    def test_art_list_response_cache_shared_backend(self):
+        """Test the cache works with a backend shared between processes"""
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=caches):
+                self.assertEqual(check_shared_default_cache(None), [])
+                self._assert_cached_and_invalidated()
+
+        self.assertEqual(
+            [warning.id for warning in check_shared_default_cache(None)],
+            ['core.W001']
+        )
+
+    def test_art_list_conditional_get(self):
+        """Test unchanged art lists answer 304 from a single query"""
+        self.art.save()
+        url = art_create_list_url()
+        res = self.client.get(url)
+        etag = res['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+        tag = models.Tag.objects.create(name='Tag', created_by=self.user)
+        self.art.tags.add(tag)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_art_retrieve_conditional_get(self):
+        """Test art detail validators follow the art and its deletion"""
+        self.art.save()
+        url = art_detail_url(self.art.id)
+        res = self.client.get(url)
+        etag, last_modified = res['ETag'], res['Last-Modified']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        list_etag = self.client.get(art_create_list_url())['ETag']
+        self.art.delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(
+            art_create_list_url(),
+            HTTP_IF_NONE_MATCH=list_etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_art_list_ignores_if_modified_since(self):
+        """Test a deletion leaving MAX(updated_at) alone is not missed"""
+        self.art.save()
+        other = models.Art.objects.create(
+            title='Older Art',
+            subtitle='Art Subtitle',
+            type=1,
+            artist=self.artist,
+            created_by=self.user
+        )
+        models.Art.objects.filter(pk=other.pk).update(
+            updated_at=self.art.updated_at - timedelta(days=1)
+        )
+        url = art_create_list_url()
+        res = self.client.get(url)
+        self.assertNotIn('Last-Modified', res)
+
+        other.delete()
+        res = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time())
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_art_retrieve_malformed_pk_not_found(self):
+        """Test a non-numeric pk answers 404, not a validator error"""
+        res = self.client.get(art_detail_url('abc'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class ImageUploadTests(TestCase):
     """Tests for the image upload API."""
@@ -309,7 +539,9 @@ class ImageUploadTests(TestCase):
         )
 
     def tearDown(self):
-        """Test uploading an image to a art."""
+        """Remove uploaded files."""
+        if self.art.image:
+            delete_variants(self.art.image)
         self.art.image.delete()
 
     def test_art_image_upload(self):
@@ -323,9 +555,24 @@ class ImageUploadTests(TestCase):
             res = self.client.post(url, payload, format='multipart')
 
         self.art.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.art.image.path))
+        self.assertEqual(res.data['image_width'], 10)
+        self.assertEqual(res.data['image_height'], 10)
+        self.assertEqual(res.data['image_bytes'], self.art.image.size)
+        self.assertIsNone(res.data['image_blurhash'])
+
+        call_command('worker', processes=0, burst=True, stdout=StringIO())
+        job = self.client.get(res['Location'])
+        self.assertEqual(job.data['id'], res.data['job'])
+        self.assertEqual(job.data['status'], 'succeeded')
+        self.art.refresh_from_db()
+        self.assertEqual(len(self.art.image_blurhash), 28)
+        for variant, formats in res.data['image_variants'].items():
+            for extension in formats:
+                name = variant_name(self.art.image.name, variant, extension)
+                self.assertTrue(self.art.image.storage.exists(name))
 
     def test_art_image_upload_bad_request(self):
         """Test uploading invalid image."""
@@ -334,3 +581,128 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_art_image_upload_unsupported_format(self):
+        """Test uploading an image format variants are not made from."""
+        url = image_upload_url(self.art.id)
+        with tempfile.NamedTemporaryFile(suffix='.bmp') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='BMP')
+            image_file.seek(0)
+            res = self.client.post(
+                url,
+                {'image': image_file},
+                format='multipart'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('BMP', str(res.data['image']))
+
+    def test_art_image_upload_too_many_pixels(self):
+        """Test images are rejected from their header, before decoding."""
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='PNG')
+        png = bytearray(buffer.getvalue())
+        # Claim 20000x20000 pixels in the IHDR chunk and fix its CRC
+        png[16:24] = struct.pack('>II', 20000, 20000)
+        png[29:33] = struct.pack('>I', zlib.crc32(bytes(png[12:29])))
+
+        url = image_upload_url(self.art.id)
+        with tempfile.NamedTemporaryFile(suffix='.png') as image_file:
+            image_file.write(png)
+            image_file.seek(0)
+            with patch('PIL.ImageFile.ImageFile.load') as load:
+                res = self.client.post(
+                    url,
+                    {'image': image_file},
+                    format='multipart'
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', str(res.data['image']))
+        load.assert_not_called()
+
+    def _upload(self, color):
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10), color).save(buffer, format='PNG')
+        upload = SimpleUploadedFile(f'{color}.png', buffer.getvalue())
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                image_upload_url(self.art.id),
+                {'image': upload},
+                format='multipart'
+            )
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.art.refresh_from_db()
+        return self.art.image.name
+
+    def test_art_image_reupload_is_deduplicated(self):
+        """Test uploading the same bytes twice stores them once."""
+        names = [self._upload('blue') for _ in range(2)]
+
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(
+            StoredFile.objects.get(name=names[0]).references,
+            1
+        )
+
+    def test_art_image_replacement_releases_the_previous_file(self):
+        storage = self.art.image.storage
+        red = self._upload('red')
+        self._upload('red')
+        blue = self._upload('blue')
+
+        self.assertFalse(storage.exists(red))
+        self.assertFalse(StoredFile.objects.filter(name=red).exists())
+        self.assertEqual(StoredFile.objects.get(name=blue).references, 1)
+
+    def test_art_delete_releases_its_image(self):
+        storage = self.art.image.storage
+        name = self._upload('red')
+        self.assertTrue(storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(art_detail_url(self.art.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        self.art.image = None
+
+    def test_original_image_is_delivered_by_the_proxy(self):
+        """Test originals are authorized by Django and sent by nginx."""
+        self.art.image.save('art.png', ContentFile(b'original bytes'))
+        url = reverse('art-original', kwargs={'pk': self.art.id})
+
+        # Anonymous clients get the public, content addressed file URL
+        res = APIClient().get(art_detail_url(self.art.id))
+        self.assertEqual(
+            res.data['image'],
+            f'http://testserver{self.art.image.url}'
+        )
+
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected/'):
+            res = self.client.get(url, HTTP_ACCEPT='image/*')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            f'/protected/{self.art.image.name}'
+        )
+        self.assertEqual(res['Content-Type'], 'image/png')
+        self.assertEqual(res.content, b'')
+
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX=''):
+            res = self.client.get(url)
+        self.assertEqual(b''.join(res.streaming_content), b'original bytes')
+
+        self.client.force_authenticate(None)
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_variant_urls_carry_their_version(self):
+        self.art.image.save('art.png', ContentFile(b'original bytes'))
+
+        res = self.client.get(art_detail_url(self.art.id))
+
+        thumbnail = res.data['image_variants']['thumbnail']['webp']
+        self.assertIn(self.art.image.name.rsplit('.', 1)[0], thumbnail)
+        self.assertIn('?v=', thumbnail)
@@ -1,6 +1,8 @@
 """
 Test Artist Model Endpoints
 """
+from django.core.files.base import ContentFile
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -8,11 +10,14 @@ from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from portfolio import models
+from portfolio import images, models
+from portfolio.images import delete_variants, process_image, variant_name
 from portfolio.api import serializers
 
 import tempfile
+from io import BytesIO, StringIO
 import os
+from unittest import mock
 
 from PIL import Image
 
@@ -110,7 +115,13 @@ class ArtistPrivateEndpointsTest(TestCase):
         self.artist.save()
         res = self.client.delete(artist_detail_url(self.artist.id))
 
-        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(self.qs.get(id=self.artist.id).hidden)
+        res = self.client.get(artist_detail_url(self.artist.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        call_command('worker', processes=0, burst=True, stdout=StringIO())
+        self.assertFalse(self.qs.filter(id=self.artist.id).exists())
 
 
 class ArtistPublicEndpointsTest(TestCase):
@@ -254,6 +265,38 @@ class ArtistPublicEndpointsTest(TestCase):
         self.assertIn(s1.data, res.data['results'])
         self.assertIn(s2.data, res.data['results'])
 
+    def test_artist_fuzzy_name_filter(self):
+        """Test filter artists by a misspelled name"""
+        self.artist.save()
+        models.Artist.objects.create(
+            name='Another Artist',
+            created_by=self.user
+        )
+
+        params = {'name': 'Tezt Artst', 'fuzzy': 2}
+        res = self.client.get(artist_create_list_url(), params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [artist['id'] for artist in res.data['results']],
+            [self.artist.id]
+        )
+
+    def test_artist_retrieve_conditional_get(self):
+        """Test artist detail answers 304 until the artist changes"""
+        self.artist.save()
+        url = artist_detail_url(self.artist.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.artist.instagram = 'test_artist'
+        self.artist.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['instagram'], 'test_artist')
+
 
 class ArtistImageUploadTests(TestCase):
     """Tests for the artist image upload API."""
@@ -271,6 +314,8 @@ class ArtistImageUploadTests(TestCase):
         )
 
     def tearDown(self):
+        if self.artist.image:
+            delete_variants(self.artist.image)
         self.artist.image.delete()
 
     def test_artist_image_upload(self):
@@ -284,9 +329,49 @@ class ArtistImageUploadTests(TestCase):
             res = self.client.post(url, payload, format='multipart')
 
         self.artist.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.artist.image.path))
+        self.assertEqual(res.data['image_width'], 10)
+        self.assertEqual(res.data['image_height'], 10)
+        self.assertEqual(res.data['image_bytes'], self.artist.image.size)
+        self.assertIsNone(res.data['image_blurhash'])
+
+        call_command('worker', processes=0, burst=True, stdout=StringIO())
+        job = self.client.get(res['Location'])
+        self.assertEqual(job.data['id'], res.data['job'])
+        self.assertEqual(job.data['status'], 'succeeded')
+        self.artist.refresh_from_db()
+        self.assertEqual(len(self.artist.image_blurhash), 28)
+        for variant, formats in res.data['image_variants'].items():
+            for extension in formats:
+                name = variant_name(self.artist.image.name, variant, extension)
+                self.assertTrue(self.artist.image.storage.exists(name))
+
+    def test_job_of_a_replaced_image_keeps_its_metadata(self):
+        """Test a job finishing after the image changed stores nothing"""
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='JPEG')
+        self.artist.image.save('artist.jpg', ContentFile(buffer.getvalue()))
+        features = images.image_features
+
+        def replace_then_compute(*args, **kwargs):
+            models.Artist.objects.filter(pk=self.artist.pk).update(
+                image='uploads/artist/replaced.jpg',
+                image_width=None
+            )
+            return features(*args, **kwargs)
+
+        with mock.patch.object(
+            images,
+            'image_features',
+            side_effect=replace_then_compute
+        ):
+            process_image('portfolio.artist', self.artist.pk)
+
+        artist = models.Artist.objects.get(pk=self.artist.pk)
+        self.assertIsNone(artist.image_width)
+        self.assertIsNone(artist.image_blurhash)
 
     def test_artist_image_upload_bad_request(self):
         """Test uploading invalid image."""
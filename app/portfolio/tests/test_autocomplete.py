@@ -0,0 +1,117 @@
+"""
+Test the autocomplete endpoint
+"""
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from portfolio import models
+from portfolio.autocomplete import PrefixIndex
+
+from datetime import date
+
+
+AUTOCOMPLETE_URL = reverse('autocomplete-list')
+
+
+class PrefixIndexTests(SimpleTestCase):
+    """Test the sorted prefix array"""
+
+    def test_prefix_matches_names_and_words(self):
+        index = PrefixIndex([
+            (['Spider-Man', 'spider-man'], 'spider-man'),
+            (['Superman', 'superman'], 'superman'),
+            (['Batman'], 'batman'),
+        ])
+
+        self.assertEqual(index.search('sp', 10), ['spider-man'])
+        self.assertEqual(index.search('SU', 10), ['superman'])
+        self.assertEqual(index.search('man', 10), ['spider-man'])
+        self.assertEqual(index.search('x', 10), [])
+        self.assertEqual(len(index.search('s', 1)), 1)
+
+
+class AutocompleteEndpointTests(TestCase):
+    """Test suggestions across tags, characters and artists"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.tag = models.Tag.objects.create(
+            name='Batcave',
+            created_by=self.user
+        )
+        self.character = models.Character.objects.create(
+            page_id='1',
+            name='Batman',
+            slug='batman',
+            sex='M',
+            alive=True,
+            first_appearance=date.today(),
+            created_by=self.user
+        )
+        self.artist = models.Artist.objects.create(
+            name='Bob Kane',
+            created_by=self.user
+        )
+
+    def _authenticate_staff(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser(
+                email='admin@example.com',
+                password='testpass123'
+            )
+        )
+
+    def test_autocomplete_across_models(self):
+        self._authenticate_staff()
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'ba'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['type'], item['id']) for item in res.data],
+            [('tag', self.tag.id), ('character', self.character.id)]
+        )
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'bob-k'})
+        self.assertEqual(res.data[0]['slug'], 'bob-kane')
+
+    def test_autocomplete_hides_tags_from_public(self):
+        """Test tags, private like the tag endpoints, need staff"""
+        for user in [None, self.user]:
+            self.client.force_authenticate(user)
+            res = self.client.get(AUTOCOMPLETE_URL, {'q': 'ba', 'limit': 1})
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                [(item['type'], item['id']) for item in res.data],
+                [('character', self.character.id)]
+            )
+
+    def test_autocomplete_serves_from_memory(self):
+        """Test a warm index answers without queries and sees new names"""
+        self._authenticate_staff()
+        self.client.get(AUTOCOMPLETE_URL, {'q': 'ba'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {'q': 'bat'})
+        self.assertEqual(len(res.data), 2)
+
+        self.character.delete()
+        models.Artist.objects.create(name='Batista', created_by=self.user)
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'bat'})
+        self.assertEqual(
+            [item['name'] for item in res.data],
+            ['Batcave', 'Batista']
+        )
+
+    def test_autocomplete_limit(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'b', 'limit': 1})
+
+        self.assertEqual(len(res.data), 1)
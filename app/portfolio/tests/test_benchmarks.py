@@ -0,0 +1,78 @@
+"""
+Test the benchmark commands run on small data sets
+"""
+import contextlib
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from portfolio import fuzzy, indexes
+
+
+class BenchmarkCommandTests(TestCase):
+    """Test each benchmark completes and reports its measurements"""
+
+    def setUp(self):
+        # The tests already run in a test database
+        patch = mock.patch(
+            'core.benchmarks.benchmark_database',
+            contextlib.nullcontext
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+        # Indexes built by a benchmark would outlive its rolled back rows
+        self.addCleanup(indexes._indexes.clear)
+        self.addCleanup(fuzzy._indexes.clear)
+
+    def _bench(self, name, **options):
+        out = StringIO()
+        call_command(name, repeat=1, stdout=out, **options)
+        return out.getvalue()
+
+    def test_bench_tag_filter(self):
+        output = self._bench('bench_tag_filter', arts=200, tags=10)
+
+        self.assertIn('JOIN + DISTINCT', output)
+        self.assertIn('EXISTS', output)
+        self.assertIn('page at offset 100', output)
+
+    def test_bench_name_filter(self):
+        output = self._bench('bench_name_filter', sizes=[50, 100])
+
+        self.assertIn('100 artists, rare substring', output)
+        self.assertIn('trigrams count', output)
+
+    def test_bench_fuzzy(self):
+        output = self._bench('bench_fuzzy', names=100, queries=10)
+
+        self.assertIn('Edit distance 2', output)
+        self.assertIn('index p99', output)
+        self.assertIn('full scan median', output)
+
+    def test_bench_uploads(self):
+        output = self._bench('bench_uploads', sizes=[0.05], megapixels=0.1)
+
+        self.assertIn('0.05MB noise', output)
+        self.assertIn('temporary file, header check', output)
+
+    def test_bench_similar(self):
+        output = self._bench('bench_similar', arts=200, updated=5)
+
+        self.assertIn('200 hashes', output)
+        self.assertIn('incremental refresh', output)
+        self.assertIn('endpoint', output)
+
+    def test_bench_colors(self):
+        output = self._bench('bench_colors', arts=200, width=64, height=48)
+
+        self.assertIn('palette extraction', output)
+        self.assertIn('200 palettes', output)
+        self.assertIn('endpoint', output)
+
+    def test_bench_gc_media(self):
+        output = self._bench('bench_gc_media', files=40, passes=2)
+
+        self.assertIn('2 passes peak allocated', output)
+        self.assertIn('40 files scanned, removed 4 orphans', output)
@@ -245,3 +245,55 @@ class PublicEndpointsTests(TestCase):
         res = self.client.get(character_create_list_url(), {'name': 'Test'})
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(len(res.data['results']), 1)
+
+    def test_character_name_filter_case_insensitive(self):
+        """Test the trigram backed name filter ignores case"""
+        self.c.save()
+
+        for value in ['comic', 'COMIC CHAR', 'me co', 'So']:
+            res = self.client.get(
+                character_create_list_url(),
+                {'name': value}
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data['results']), 1)
+
+        res = self.client.get(character_create_list_url(), {'name': 'cimoc'})
+        self.assertEqual(len(res.data['results']), 0)
+
+    def test_character_name_trigrams_follow_renames(self):
+        """Test trigram rows are kept in sync with the name"""
+        self.c.save()
+        self.c.name = 'Another Hero'
+        self.c.save()
+
+        trigrams = set(self.c.name_trigrams.values_list('trigram', flat=True))
+        self.assertIn('her', trigrams)
+        self.assertNotIn('com', trigrams)
+        res = self.client.get(character_create_list_url(), {'name': 'comic'})
+        self.assertEqual(len(res.data['results']), 0)
+        res = self.client.get(character_create_list_url(), {'name': 'hero'})
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_character_fuzzy_name_filter(self):
+        """Test misspelled names are found within the edit distance"""
+        self.c.save()
+
+        res = self.client.get(
+            character_create_list_url(),
+            {'name': 'Some Comic Charactr', 'fuzzy': 1}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+        res = self.client.get(
+            character_create_list_url(),
+            {'name': 'Sume Comic Charactr', 'fuzzy': 1}
+        )
+        self.assertEqual(len(res.data['results']), 0)
+
+        res = self.client.get(
+            character_create_list_url(),
+            {'name': 'Sume Comic Charactr', 'fuzzy': 3}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,221 @@
+"""
+Test palette extraction and filtering arts by color
+"""
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from portfolio import colors, images, indexes, models
+from portfolio.images import process_image
+
+
+ARTS_URL = reverse('art-list')
+
+
+def two_color_image():
+    """Three quarters red and one quarter blue"""
+    image = Image.new('RGB', (80, 80), (200, 30, 30))
+    image.paste((20, 40, 220), (60, 0, 80, 80))
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer
+
+
+class PaletteTests(SimpleTestCase):
+    """Test color conversion, clustering and the palette index"""
+
+    def test_rgb_to_lab(self):
+        white, red = colors.rgb_to_lab([(255, 255, 255), (255, 0, 0)])
+
+        self.assertAlmostEqual(white[0], 100, places=2)
+        self.assertAlmostEqual(abs(white[1]) + abs(white[2]), 0, places=2)
+        self.assertAlmostEqual(red[0], 53.24, places=1)
+        self.assertAlmostEqual(red[1], 80.09, places=1)
+        self.assertAlmostEqual(red[2], 67.20, places=1)
+
+    def test_extract_palette(self):
+        palette = colors.extract_palette(two_color_image())
+
+        self.assertEqual(palette, [
+            {'color': '#c81e1e', 'weight': 0.75},
+            {'color': '#1428dc', 'weight': 0.25},
+        ])
+
+    def test_parse_hex_color(self):
+        self.assertEqual(colors.parse_hex_color('#AA3322'), (170, 51, 34))
+        self.assertEqual(colors.parse_hex_color('aa3322'), (170, 51, 34))
+        for value in ['#aa33', 'red', '#gg3322']:
+            with self.assertRaises(ValueError):
+                colors.parse_hex_color(value)
+
+    def test_search_by_nearest_palette_color(self):
+        index = colors.PaletteIndex()
+        index.upsert([
+            (1, [{'color': '#ff0000', 'weight': 1}]),
+            (2, [{'color': '#0000ff', 'weight': 0.6},
+                 {'color': '#f00a0a', 'weight': 0.4}]),
+            (3, [{'color': '#00ff00', 'weight': 1}]),
+            (4, []),
+        ])
+
+        matches = index.search((255, 0, 0), 10, 20)
+
+        self.assertEqual([pk for pk, _ in matches], [1, 2])
+        self.assertEqual(matches[0][1], 0)
+        self.assertEqual(index.search((255, 0, 0), 1, 20), matches[:1])
+        self.assertEqual(index.search((255, 0, 0), None, 20), matches)
+
+
+class ColorFilterTests(TestCase):
+    """Test filtering the art list by color"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        indexes._indexes.clear()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.artist = models.Artist.objects.create(
+            name='Test Artist',
+            created_by=self.user
+        )
+
+    def create_art(self, title, *hex_colors):
+        return models.Art.objects.create(
+            title=title,
+            subtitle=title,
+            type=1,
+            artist=self.artist,
+            palette=[{'color': color, 'weight': 1} for color in hex_colors],
+            created_by=self.user
+        )
+
+    def test_upload_job_stores_the_palette(self):
+        art = self.create_art('art')
+        art.image.save('art.png', ContentFile(two_color_image().getvalue()))
+
+        process_image('portfolio.art', art.pk)
+
+        art.refresh_from_db()
+        self.assertEqual(
+            [item['color'] for item in art.palette],
+            ['#c81e1e', '#1428dc']
+        )
+
+    def test_job_of_a_replaced_image_keeps_its_palette(self):
+        """Test a job finishing after the image changed stores no palette"""
+        art = self.create_art('art')
+        art.image.save('art.png', ContentFile(two_color_image().getvalue()))
+        features = images.image_features
+
+        def replace_then_compute(*args, **kwargs):
+            models.Art.objects.filter(pk=art.pk).update(
+                image='uploads/art/replaced.png'
+            )
+            return features(*args, **kwargs)
+
+        with mock.patch.object(
+            images,
+            'image_features',
+            side_effect=replace_then_compute
+        ):
+            process_image('portfolio.art', art.pk)
+
+        art.refresh_from_db()
+        self.assertEqual(art.palette, [])
+        res = self.client.get(ARTS_URL, {'color': '#c81e1e'})
+        self.assertEqual(res.data['results'], [])
+
+    def test_filter_by_color_closest_first(self):
+        close = self.create_art('close', '#0000ff', '#aa3325')
+        exact = self.create_art('exact', '#aa3322')
+        self.create_art('green', '#22aa33')
+
+        res = self.client.get(ARTS_URL, {'color': '#aa3322'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [art['id'] for art in res.data['results']],
+            [exact.pk, close.pk]
+        )
+        res = self.client.get(
+            ARTS_URL,
+            {'color': 'aa3322', 'color_distance': 0}
+        )
+        self.assertEqual(
+            [art['id'] for art in res.data['results']],
+            [exact.pk]
+        )
+
+    def test_filter_by_color_counts_every_match(self):
+        arts = [
+            self.create_art(f'art {index}', f'#aa33{index:02x}')
+            for index in range(0x22, 0x28)
+        ]
+        params = {'color': '#aa3322', 'limit': 4}
+
+        first = self.client.get(ARTS_URL, params)
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(first.data['count'], len(arts))
+        self.assertEqual(
+            [art['id'] for art in first.data['results']]
+            + [art['id'] for art in second.data['results']],
+            [art.pk for art in arts]
+        )
+
+    def test_filter_combines_with_other_filters(self):
+        other = models.Artist.objects.create(
+            name='Other Artist',
+            created_by=self.user
+        )
+        art = self.create_art('art', '#aa3322')
+        models.Art.objects.create(
+            title='other',
+            subtitle='other',
+            type=1,
+            artist=other,
+            palette=[{'color': '#aa3322', 'weight': 1}],
+            created_by=self.user
+        )
+
+        res = self.client.get(
+            ARTS_URL,
+            {'color': '#aa3322', 'artists': str(self.artist.pk)}
+        )
+
+        self.assertEqual([a['id'] for a in res.data['results']], [art.pk])
+
+    def test_no_match(self):
+        self.create_art('green', '#22aa33')
+
+        res = self.client.get(ARTS_URL, {'color': '#aa3322'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_invalid_color(self):
+        for params in [
+            {'color': 'red'},
+            {'color': '#aa3322', 'color_distance': -1},
+            {'color': '#aa3322', 'color_distance': 'x'},
+        ]:
+            res = self.client.get(ARTS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
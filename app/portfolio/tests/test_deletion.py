@@ -0,0 +1,180 @@
+"""
+Test deleting artists in the background
+"""
+import os
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from core.models import Job
+from portfolio import deletion, models
+from portfolio.images import generate_variants, manifest_name
+
+
+def jpeg_content(color):
+    buffer = BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, format='JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+class ArtistDeletionTests(TestCase):
+    """Test hiding an artist then deleting its artworks in batches"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(MEDIA_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.artist = models.Artist.objects.create(
+            name='Some Artist',
+            created_by=self.user
+        )
+        self.other = models.Artist.objects.create(
+            name='Other Artist',
+            created_by=self.user
+        )
+        self.arts = [
+            models.Art.objects.create(
+                title=f'Art {index}',
+                subtitle='Art',
+                type=1,
+                artist=self.artist,
+                created_by=self.user
+            )
+            for index in range(5)
+        ]
+        self.kept = models.Art.objects.create(
+            title='Kept',
+            subtitle='Art',
+            type=1,
+            artist=self.other,
+            created_by=self.user
+        )
+
+    def _work(self):
+        call_command('worker', processes=0, burst=True, stdout=StringIO())
+
+    def _delete(self):
+        url = reverse('artist-detail', kwargs={'pk': self.artist.pk})
+        return self.client.delete(url)
+
+    def test_artist_is_hidden_at_once(self):
+        res = self._delete()
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], Job.QUEUED)
+        job = self.client.get(res['Location'])
+        self.assertEqual(job.data['id'], res.data['id'])
+
+        artists = self.client.get(reverse('artist-list'))
+        self.assertEqual(
+            [artist['id'] for artist in artists.data['results']],
+            [self.other.pk]
+        )
+        arts = self.client.get(reverse('art-list'))
+        self.assertEqual(
+            [art['id'] for art in arts.data['results']],
+            [self.kept.pk]
+        )
+        art = self.client.get(
+            reverse('art-detail', kwargs={'pk': self.arts[0].pk})
+        )
+        self.assertEqual(art.status_code, status.HTTP_404_NOT_FOUND)
+        # Nothing is deleted until the job runs
+        self.assertEqual(models.Art.objects.count(), 6)
+
+    def test_hidden_artist_takes_no_new_artworks(self):
+        self._delete()
+
+        res = self.client.post(reverse('art-list'), {
+            'title': 'Late',
+            'subtitle': 'Art',
+            'type': 1,
+            'artist': self.artist.pk,
+            'created_by': self.user.pk,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('artist', res.data)
+
+    def test_artworks_are_deleted_in_batches(self):
+        deletion.hide_artist(self.artist)
+        reports = []
+
+        with mock.patch.object(deletion, 'report_progress') as report:
+            report.side_effect = lambda **progress: reports.append(progress)
+            deletion.delete_artist(self.artist.pk, batch_size=2)
+
+        self.assertEqual(
+            [report['deleted'] for report in reports],
+            [0, 2, 4, 5]
+        )
+        self.assertTrue(all(report['total'] == 5 for report in reports))
+        self.assertFalse(
+            models.Artist.objects.filter(pk=self.artist.pk).exists()
+        )
+        self.assertEqual(list(models.Art.objects.all()), [self.kept])
+
+    def test_job_records_progress(self):
+        res = self._delete()
+
+        self._work()
+
+        job = Job.objects.get(pk=res.data['id'])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.progress, {'deleted': 5, 'total': 5})
+
+    def test_retried_deletion_resumes(self):
+        deletion.hide_artist(self.artist)
+        self.arts[0].delete()
+
+        deletion.delete_artist(self.artist.pk, batch_size=2)
+
+        self.assertEqual(list(models.Art.objects.all()), [self.kept])
+        # Running it again once everything is gone is harmless
+        deletion.delete_artist(self.artist.pk)
+
+    def test_visible_artists_are_not_deleted(self):
+        deletion.delete_artist(self.artist.pk)
+
+        self.assertEqual(models.Art.objects.count(), 6)
+
+    def test_images_are_released(self):
+        self.artist.image.save('artist.jpg', jpeg_content('red'))
+        self.arts[0].image.save('art.jpg', jpeg_content('green'))
+        generate_variants(self.arts[0].image)
+        # The same content is still used by an artwork that is kept
+        self.arts[1].image.save('shared.jpg', jpeg_content('blue'))
+        self.kept.image.save('kept.jpg', jpeg_content('blue'))
+        storage = self.artist.image.storage
+        removed = [self.artist.image.name, self.arts[0].image.name]
+
+        self._delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self._work()
+
+        self.assertTrue(storage.exists(self.kept.image.name))
+        for name in removed:
+            self.assertFalse(storage.exists(name), name)
+        self.assertFalse(
+            os.path.exists(storage.path(manifest_name(removed[1])))
+        )
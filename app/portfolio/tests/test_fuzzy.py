@@ -0,0 +1,59 @@
+"""
+Test typo tolerant name lookup
+"""
+from django.test import SimpleTestCase
+
+from portfolio.fuzzy import NameIndex, levenshtein, name_key
+
+
+class FuzzyNameIndexTests(SimpleTestCase):
+    """Test the trigram filtered edit distance index"""
+
+    def setUp(self):
+        self.names = [
+            'Wolverine',
+            'Spider-Man',
+            'Spider-Woman',
+            'Superman',
+            'Thor',
+            'Thing',
+            'Storm',
+        ]
+        self.index = NameIndex(enumerate(self.names))
+
+    def _search(self, name, distance):
+        return [self.names[pk] for pk in self.index.search(name, distance)]
+
+    def test_levenshtein_bounded(self):
+        self.assertEqual(levenshtein('kitten', 'sitting', 5), 3)
+        self.assertEqual(levenshtein('kitten', 'sitting', 2), 3)
+        self.assertEqual(levenshtein('abc', 'abc', 1), 0)
+
+    def test_name_key(self):
+        self.assertEqual(name_key(' spider-MAN '), 'spiderman')
+
+    def test_misspelled_names(self):
+        self.assertEqual(self._search('Wolverene', 1), ['Wolverine'])
+        self.assertEqual(self._search('Spyderman', 1), ['Spider-Man'])
+        self.assertEqual(self._search('Supperman', 1), ['Superman'])
+        self.assertEqual(self._search('Spiderwman', 2), [
+            'Spider-Man', 'Spider-Woman'
+        ])
+
+    def test_short_names_use_length_buckets(self):
+        self.assertEqual(self._search('thro', 1), [])
+        self.assertEqual(self._search('thro', 2), ['Thor'])
+
+    def test_matches_brute_force(self):
+        for query in ['Sprman', 'Stom', 'Woman', 'Thng', 'Spider Mn']:
+            for distance in (1, 2):
+                expected = sorted(
+                    pk for pk, name in enumerate(self.names)
+                    if levenshtein(
+                        name_key(query), name_key(name), distance
+                    ) <= distance
+                )
+                self.assertEqual(
+                    sorted(self.index.search(query, distance)),
+                    expected
+                )
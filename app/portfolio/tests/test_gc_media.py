@@ -0,0 +1,169 @@
+"""
+Test the gc_media command
+"""
+import os
+import tempfile
+import time
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from PIL import Image
+
+from core.models import StoredFile
+from core.storage import image_storage
+from portfolio import models
+from portfolio.images import generate_variants, manifest_name, variant_name
+
+
+def jpeg_content(color):
+    buffer = BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, format='JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+class GarbageCollectMediaTests(TestCase):
+    """Test finding and removing orphaned media files"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = os.path.join(directory.name, 'media')
+        self.quarantine = os.path.join(directory.name, 'quarantine')
+        settings = override_settings(
+            MEDIA_ROOT=self.media,
+            RESIZE_CACHE_DIR=os.path.join(self.media, 'uploads', 'resized'),
+            UPLOAD_SESSION_DIR=os.path.join(directory.name, 'sessions')
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.artist = models.Artist.objects.create(
+            name='Some Artist',
+            created_by=user
+        )
+        self.artist.image.save('artist.jpg', jpeg_content('red'))
+        self.art = models.Art.objects.create(
+            title='Art',
+            subtitle='Art',
+            type=1,
+            artist=self.artist,
+            created_by=user
+        )
+        self.art.image.save('art.jpg', jpeg_content('green'))
+        generate_variants(self.art.image)
+
+        # The art's previous image, replaced by the one above
+        self.replaced = self.art.image.storage.save(
+            'uploads/art/old.jpg',
+            jpeg_content('blue')
+        )
+        generate_variants(self.art.image.field.attr_class(
+            self.art,
+            self.art.image.field,
+            self.replaced
+        ))
+        self.cached = os.path.join(self.media, 'uploads', 'resized', 'x.webp')
+        os.makedirs(os.path.dirname(self.cached))
+        open(self.cached, 'wb').close()
+
+        self.age_files()
+
+    def age_files(self):
+        """Make every media file older than the grace period"""
+        old = time.time() - 48 * 3600
+        for directory, _, files in os.walk(self.media):
+            for name in files:
+                os.utime(os.path.join(directory, name), (old, old))
+
+    def replaced_files(self):
+        return [
+            self.replaced,
+            variant_name(self.replaced, 'card', 'webp'),
+            manifest_name(self.replaced),
+        ]
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media, name))
+
+    def _gc(self, **options):
+        out = StringIO()
+        call_command('gc_media', stdout=out, **options)
+        return out.getvalue()
+
+    def assert_kept(self):
+        for name in [
+            self.artist.image.name,
+            self.art.image.name,
+            variant_name(self.art.image.name, 'thumbnail', 'jpeg'),
+            manifest_name(self.art.image.name),
+        ]:
+            self.assertTrue(self.exists(name), name)
+        self.assertTrue(os.path.exists(self.cached))
+
+    def test_dry_run_changes_nothing(self):
+        out = self._gc(dry_run=True, verbosity=2)
+
+        self.assertIn('would remove 8 orphans', out)
+        self.assertIn(f'orphan: {self.replaced}', out)
+        for name in self.replaced_files():
+            self.assertTrue(self.exists(name))
+
+    def test_orphans_and_their_variants_are_deleted(self):
+        out = self._gc()
+
+        self.assertIn('removed 8 orphans', out)
+        for name in self.replaced_files():
+            self.assertFalse(self.exists(name), name)
+        self.assertFalse(
+            StoredFile.objects.filter(name=self.replaced).exists()
+        )
+        self.assert_kept()
+
+    def test_orphans_are_quarantined(self):
+        self._gc(quarantine=self.quarantine)
+
+        for name in self.replaced_files():
+            self.assertFalse(self.exists(name))
+            self.assertTrue(
+                os.path.exists(os.path.join(self.quarantine, name))
+            )
+        self.assert_kept()
+
+    def test_grace_period_keeps_recent_files(self):
+        recent = image_storage.save(
+            'uploads/art/new.jpg',
+            jpeg_content('white')
+        )
+
+        out = self._gc(grace_hours=72)
+        self.assertIn('removed 0 orphans', out)
+
+        out = self._gc()
+        self.assertIn('removed 8 orphans', out)
+        self.assertTrue(self.exists(recent))
+
+    def test_reuploaded_content_is_protected(self):
+        # Storing the same bytes again refreshes the file's mtime
+        image_storage.save('uploads/art/again.jpg', jpeg_content('blue'))
+
+        out = self._gc()
+
+        # Variants stay with their original
+        self.assertIn('removed 0 orphans', out)
+        for name in self.replaced_files():
+            self.assertTrue(self.exists(name))
+
+    def test_partitioned_passes(self):
+        out = self._gc(max_keys_per_pass=1)
+
+        self.assertIn('pass 2/2', out)
+        self.assertIn('removed 8 orphans', out)
+        self.assert_kept()
@@ -0,0 +1,78 @@
+"""
+Test image variant generation and metadata
+"""
+import io
+import os
+
+from django.test import SimpleTestCase
+
+from PIL import Image
+
+from portfolio import blurhash
+from portfolio.images import (
+    ORIENTATION_TAG,
+    encode_within_budget,
+    image_metadata,
+    open_scaled,
+    variant_name,
+)
+
+
+class ImageVariantTests(SimpleTestCase):
+    """Test variant names, scaling and byte budgets"""
+
+    def _jpeg(self, size):
+        image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=95)
+        return buffer
+
+    def test_variant_name(self):
+        self.assertEqual(
+            variant_name('uploads/art/abc.png', 'card', 'webp'),
+            'uploads/art/abc_card.webp'
+        )
+
+    def test_open_scaled_fits_the_box(self):
+        image = open_scaled(self._jpeg((1200, 600)), 160)
+
+        self.assertEqual(image.size, (160, 80))
+        self.assertEqual(image.mode, 'RGB')
+
+    def test_encoding_respects_the_budget(self):
+        image = open_scaled(self._jpeg((400, 400)), 400)
+
+        for format in ['JPEG', 'WEBP']:
+            content = encode_within_budget(image, format, 8 * 1024)
+            self.assertLessEqual(len(content), 8 * 1024)
+            self.assertEqual(Image.open(io.BytesIO(content)).format, format)
+
+
+class ImageMetadataTests(SimpleTestCase):
+    """Test header metadata and blurhash placeholders"""
+
+    def test_metadata_follows_exif_rotation(self):
+        exif = Image.Exif()
+        exif[ORIENTATION_TAG] = 6
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 30)).save(buffer, format='JPEG', exif=exif)
+
+        self.assertEqual(image_metadata(buffer), {
+            'image_width': 30,
+            'image_height': 40,
+            'image_bytes': len(buffer.getvalue()),
+        })
+
+    def test_blurhash_matches_reference_encoder(self):
+        # Expected values come from the reference blurhash encoder
+        gradient = Image.linear_gradient('L').convert('RGB').resize((32, 32))
+        self.assertEqual(
+            blurhash.encode(gradient),
+            'L#HetWoffQof00WBfQWBxuj[fQj['
+        )
+
+        solid = Image.new('RGB', (8, 8), (255, 0, 0))
+        self.assertEqual(
+            blurhash.encode(solid),
+            'LfTI:j|cfQ|c|csUfQsUfQfQfQfQ'
+        )
@@ -0,0 +1,119 @@
+"""
+Test the reprocess_images command
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from PIL import Image
+
+from portfolio import models
+from portfolio.images import manifest_name, read_manifest, variant_name
+
+
+def jpeg_content(color):
+    buffer = ContentFile(b'')
+    Image.new('RGB', (64, 48), color).save(buffer, format='JPEG')
+    return buffer
+
+
+class ReprocessImagesTests(TestCase):
+    """Test backfilling variants of stored images"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.artist = models.Artist.objects.create(
+            name='Some Artist',
+            created_by=user
+        )
+        self.artist.image.save('artist.jpg', jpeg_content('red'))
+        self.arts = []
+        for color in ['green', 'blue', 'white']:
+            art = models.Art.objects.create(
+                title=color,
+                subtitle=color,
+                type=1,
+                artist=self.artist,
+                created_by=user
+            )
+            art.image.save('art.jpg', jpeg_content(color))
+            self.arts.append(art)
+
+    def _reprocess(self, **options):
+        out = StringIO()
+        call_command(
+            'reprocess_images',
+            processes=0,
+            stdout=out,
+            stderr=StringIO(),
+            **options
+        )
+        return out.getvalue()
+
+    def test_all_images_get_variants(self):
+        out = self._reprocess()
+
+        for instance in [self.artist, *self.arts]:
+            storage = instance.image.storage
+            name = instance.image.name
+            self.assertTrue(storage.exists(variant_name(name, 'card', 'webp')))
+            self.assertTrue(storage.exists(manifest_name(name)))
+        self.assertIn('images/s', out)
+        self.assertIn('3 processed', out)
+
+    def test_up_to_date_images_are_skipped(self):
+        self._reprocess()
+        art = self.arts[0]
+        manifest = read_manifest(art.image.storage, art.image.name)
+
+        out = self._reprocess()
+        self.assertIn('3 skipped', out)
+
+        with art.image.storage.open(art.image.name, 'wb') as file:
+            Image.new('RGB', (64, 48), 'black').save(file, format='JPEG')
+        out = self._reprocess()
+        self.assertIn('1 processed, 2 skipped', out)
+        self.assertNotEqual(
+            read_manifest(art.image.storage, art.image.name),
+            manifest
+        )
+
+    def test_resumes_from_checkpoint(self):
+        checkpoint = os.path.join(self.media.name, 'checkpoint')
+        with open(checkpoint, 'w') as file:
+            json.dump({'portfolio.art': self.arts[1].pk}, file)
+
+        out = self._reprocess(checkpoint=checkpoint)
+
+        self.assertIn(f'resuming after id {self.arts[1].pk}', out)
+        self.assertIn('1 processed', out)
+        skipped = self.arts[0].image
+        self.assertIsNone(read_manifest(skipped.storage, skipped.name))
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_missing_art_features_are_backfilled(self):
+        models.Art.objects.filter(pk=self.arts[0].pk).update(phash=12345)
+
+        self._reprocess()
+
+        arts = models.Art.objects.in_bulk()
+        self.assertEqual(arts[self.arts[0].pk].phash, 12345)
+        for art in self.arts[1:]:
+            self.assertIsNotNone(arts[art.pk].phash)
+        for art in self.arts:
+            self.assertEqual(len(arts[art.pk].palette), 1)
@@ -0,0 +1,174 @@
+"""
+Test on demand image resizing
+"""
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from portfolio import models, resize
+
+
+def image_url(art_id):
+    return reverse('art-image', kwargs={'pk': art_id})
+
+
+class ResizeEndpointTests(TestCase):
+    """Test resizing, caching and eviction"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = os.path.join(directory.name, 'resized')
+        settings = override_settings(
+            MEDIA_ROOT=os.path.join(directory.name, 'media'),
+            RESIZE_CACHE_DIR=self.cache_dir,
+            RESIZE_ACCEL_REDIRECT_PREFIX=''
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.art = models.Art.objects.create(
+            title='Test Art Title',
+            subtitle='Test Art Subtitle',
+            type=1,
+            artist=models.Artist.objects.create(
+                name='Test Artist',
+                created_by=user
+            ),
+            created_by=user
+        )
+        buffer = BytesIO()
+        Image.new('RGB', (800, 400), 'green').save(buffer, format='JPEG')
+        self.art.image.save('art.jpg', ContentFile(buffer.getvalue()))
+
+    def _fetch(self, **params):
+        res = self.client.get(image_url(self.art.id), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_resized_image_is_cached(self):
+        with mock.patch.object(resize, 'resize', wraps=resize.resize) as spy:
+            res = self._fetch(w=200, fmt='webp')
+            image = Image.open(BytesIO(b''.join(res.streaming_content)))
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (200, 100))
+
+            self._fetch(w=200, fmt='webp')
+            self._fetch(w=200, fmt='jpeg')
+
+        self.assertEqual(spy.call_count, 2)
+        self.assertEqual(res['Cache-Control'], 'public, max-age=3600')
+
+        res = self.client.get(
+            image_url(self.art.id),
+            {'w': 200},
+            HTTP_IF_NONE_MATCH=res['ETag']
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_none_match_compares_whole_etags(self):
+        etag = self._fetch(w=200)['ETag']
+
+        for header, expected in [
+            (f'"other", W/{etag}', status.HTTP_304_NOT_MODIFIED),
+            ('*', status.HTTP_304_NOT_MODIFIED),
+            (f'x{etag}x', status.HTTP_200_OK),
+            (etag[:-2] + '"', status.HTTP_200_OK),
+        ]:
+            res = self.client.get(
+                image_url(self.art.id),
+                {'w': 200},
+                HTTP_IF_NONE_MATCH=header
+            )
+            self.assertEqual(res.status_code, expected, header)
+
+    def test_proxy_delivers_cached_file(self):
+        with override_settings(RESIZE_ACCEL_REDIRECT_PREFIX='/resized/'):
+            res = self._fetch(w=64)
+
+        self.assertTrue(res['X-Accel-Redirect'].startswith('/resized/'))
+        self.assertTrue(os.path.exists(os.path.join(
+            self.cache_dir,
+            res['X-Accel-Redirect'][len('/resized/'):]
+        )))
+
+    def test_rotated_jpeg_keeps_the_requested_width(self):
+        """Test the decoder is not reduced below a rotated target"""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffer = BytesIO()
+        Image.new('RGB', (2000, 1500), 'green').save(
+            buffer,
+            format='JPEG',
+            exif=exif
+        )
+
+        content = resize.resize(BytesIO(buffer.getvalue()), 500, 'JPEG')
+
+        self.assertEqual(Image.open(BytesIO(content)).size, (500, 667))
+
+    def test_invalid_parameters(self):
+        for params in [{}, {'w': 'wide'}, {'w': 5}, {'w': 100, 'fmt': 'bmp'}]:
+            res = self.client.get(image_url(self.art.id), params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('application/json', res['Content-Type'])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        names = [
+            resize.get_resized(self.art.image, width, 'jpeg')
+            for width in [100, 120, 140]
+        ]
+        paths = [os.path.join(self.cache_dir, name) for name in names]
+        for age, path in enumerate(reversed(paths)):
+            os.utime(path, (time.time() - 100 * age,) * 2)
+        # The oldest entry is used again
+        resize.get_resized(self.art.image, 100, 'jpeg')
+        sizes = [os.path.getsize(path) for path in paths]
+
+        resize.evict(sizes[1] + sizes[2])
+
+        self.assertEqual(
+            [os.path.exists(path) for path in paths],
+            [True, False, True]
+        )
+
+    def test_concurrent_requests_resize_once(self):
+        original = resize.resize
+
+        def slow_resize(*args):
+            time.sleep(0.2)
+            return original(*args)
+
+        with mock.patch.object(resize, 'resize', side_effect=slow_resize) \
+                as spy:
+            threads = [
+                threading.Thread(
+                    target=resize.get_resized,
+                    args=(self.art.image, 300, 'webp')
+                )
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(spy.call_count, 1)
@@ -0,0 +1,131 @@
+"""
+Test full-text search over arts
+"""
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from portfolio import models, signals
+from portfolio.search import InvertedIndex
+
+from datetime import date
+from unittest import mock
+
+
+SEARCH_URL = reverse('search-list')
+
+
+class InvertedIndexTests(SimpleTestCase):
+    """Test BM25 ranking"""
+
+    def test_rarer_and_repeated_terms_rank_higher(self):
+        index = InvertedIndex([
+            (1, 'red dragon'),
+            (2, 'red red dragon'),
+            (3, 'blue bird'),
+        ])
+
+        self.assertEqual(
+            [doc_id for doc_id, _ in index.search('red', 10)],
+            [2, 1]
+        )
+        self.assertEqual(index.search('bird dragon', 1)[0][0], 3)
+        self.assertEqual(index.search('missing', 10), [])
+
+
+class SearchEndpointTests(TestCase):
+    """Test the search endpoint and its documents"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.artist = models.Artist.objects.create(
+            name='Jim Lee',
+            created_by=self.user
+        )
+        self.art = models.Art.objects.create(
+            title='Dark Knight',
+            subtitle='Cover',
+            description='Gotham rooftops at night',
+            type=1,
+            artist=self.artist,
+            created_by=self.user
+        )
+        self.other_art = models.Art.objects.create(
+            title='Sunny Day',
+            subtitle='Pin up',
+            type=2,
+            artist=models.Artist.objects.create(
+                name='Someone Else',
+                created_by=self.user
+            ),
+            created_by=self.user
+        )
+
+    def _search(self, query):
+        res = self.client.get(SEARCH_URL, {'q': query})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [art['id'] for art in res.data['results']]
+
+    def test_search_art_fields_and_artist(self):
+        self.assertEqual(self._search('gotham'), [self.art.id])
+        self.assertEqual(self._search('lee'), [self.art.id])
+        self.assertCountEqual(
+            self._search('knight day'),
+            [self.art.id, self.other_art.id]
+        )
+
+    def test_search_follows_related_changes(self):
+        """Test documents are updated by tag, character and name changes"""
+        tag = models.Tag.objects.create(name='Noir', created_by=self.user)
+        character = models.Character.objects.create(
+            page_id='1',
+            name='Bruce Wayne',
+            slug='bruce-wayne',
+            sex='M',
+            alive=True,
+            first_appearance=date.today(),
+            created_by=self.user
+        )
+        self.assertEqual(self._search('noir'), [])
+
+        self.art.tags.add(tag)
+        self.art.characters.add(character)
+        self.assertEqual(self._search('noir'), [self.art.id])
+        self.assertEqual(self._search('wayne'), [self.art.id])
+
+        tag.name = 'Pulp'
+        tag.save()
+        self.assertEqual(self._search('noir'), [])
+        self.assertEqual(self._search('pulp'), [self.art.id])
+
+        character.delete()
+        self.assertEqual(self._search('wayne'), [])
+
+        self.art.delete()
+        self.assertEqual(self._search('pulp'), [])
+
+    def test_only_renames_rebuild_documents(self):
+        """Test saving a related object without renaming it is cheap"""
+        with mock.patch.object(signals, 'update_search_documents') as update:
+            self.artist.save()
+            self.artist.save(update_fields=['image'])
+        update.assert_not_called()
+
+        self.artist.name = 'Frank Miller'
+        self.artist.save()
+
+        self.assertEqual(self._search('miller'), [self.art.id])
+        self.assertEqual(self._search('lee'), [])
+
+    def test_search_requires_query(self):
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,201 @@
+"""
+Test perceptual hashes and similar art lookup
+"""
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image, ImageDraw
+
+from portfolio import images, indexes, models, similar
+from portfolio.images import dhash, process_image
+
+
+def similar_url(art_id):
+    return reverse('art-similar', kwargs={'pk': art_id})
+
+
+def gradient_image(flip=False, mark=False):
+    # Brightness grows from left to right, which is what dHash compares
+    image = Image.linear_gradient('L').transpose(Image.ROTATE_90)
+    image = image.resize((128, 128)).convert('RGB')
+    if flip:
+        image = image.transpose(Image.FLIP_LEFT_RIGHT)
+    if mark:
+        ImageDraw.Draw(image).rectangle((0, 0, 20, 20), fill='red')
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer
+
+
+class HashTests(SimpleTestCase):
+    """Test the difference hash and the in-memory index"""
+
+    def test_dhash_is_close_for_similar_images(self):
+        original = dhash(gradient_image())
+        marked = dhash(gradient_image(mark=True))
+        flipped = dhash(gradient_image(flip=True))
+
+        def distance(a, b):
+            return bin((a ^ b) & (2 ** 64 - 1)).count('1')
+
+        self.assertLess(distance(original, marked), 10)
+        self.assertGreater(distance(original, flipped), 20)
+
+    def test_dhash_fits_a_signed_64_bit_column(self):
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'white').save(buffer, format='PNG')
+        self.assertEqual(dhash(buffer), 0)
+
+        for image in [gradient_image(), gradient_image(flip=True)]:
+            self.assertTrue(-2 ** 63 <= dhash(image) < 2 ** 63)
+
+    def test_search_orders_by_distance(self):
+        index = similar.HashIndex()
+        index.upsert([(1, 0b0000), (2, 0b0111), (3, 0b0001), (4, -1)])
+
+        self.assertEqual(
+            index.search(0, 10, 64),
+            [(1, 0), (3, 1), (2, 3), (4, 64)]
+        )
+        self.assertEqual(index.search(0, 2, 64, exclude=1), [(3, 1), (2, 3)])
+        self.assertEqual(index.search(0, 10, 1), [(1, 0), (3, 1)])
+
+    def test_upsert_replaces_and_removes(self):
+        index = similar.HashIndex()
+        index.upsert([(1, 0), (2, 1), (3, 3)])
+
+        index.upsert([(2, None), (3, 0), (4, 7)])
+
+        self.assertEqual(index.ids.tolist(), [1, 3, 4])
+        self.assertEqual(index.search(0, 10, 64), [(1, 0), (3, 0), (4, 3)])
+
+    def test_popcount(self):
+        values = np.array([0, 1, 2 ** 64 - 1, 0xF0F0], dtype=np.uint64)
+
+        for popcount in [similar.popcount, similar.table_popcount]:
+            self.assertEqual(popcount(values).tolist(), [0, 1, 64, 8])
+
+
+class SimilarEndpointTests(TestCase):
+    """Test the similar art endpoint"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        indexes._indexes.clear()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.artist = models.Artist.objects.create(
+            name='Test Artist',
+            created_by=self.user
+        )
+
+    def create_art(self, title, phash=None):
+        return models.Art.objects.create(
+            title=title,
+            subtitle=title,
+            type=1,
+            artist=self.artist,
+            phash=phash,
+            created_by=self.user
+        )
+
+    def test_upload_job_stores_the_hash(self):
+        art = self.create_art('art')
+        art.image.save('art.png', ContentFile(gradient_image().getvalue()))
+
+        process_image('portfolio.art', art.pk)
+
+        art.refresh_from_db()
+        self.assertEqual(art.phash, dhash(gradient_image()))
+
+    def test_job_of_a_replaced_image_stores_nothing(self):
+        """Test a job finishing after the image changed leaves the row"""
+        art = self.create_art('art')
+        art.image.save('art.png', ContentFile(gradient_image().getvalue()))
+
+        def replace_then_compute(*args, **kwargs):
+            models.Art.objects.filter(pk=art.pk).update(
+                image='uploads/art/replaced.png',
+                phash=None
+            )
+            return features(*args, **kwargs)
+
+        features = images.image_features
+        with mock.patch.object(
+            images,
+            'image_features',
+            side_effect=replace_then_compute
+        ):
+            process_image('portfolio.art', art.pk)
+
+        art.refresh_from_db()
+        self.assertIsNone(art.phash)
+
+    def test_similar_arts_closest_first(self):
+        art = self.create_art('query', 0)
+        near = self.create_art('near', 0b1)
+        far = self.create_art('far', 0b1111)
+        self.create_art('unrelated', -1)
+        self.create_art('unhashed')
+
+        res = self.client.get(similar_url(art.pk))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['id'], item['distance']) for item in res.data],
+            [(near.pk, 1), (far.pk, 4)]
+        )
+        res = self.client.get(similar_url(art.pk), {'limit': 1})
+        self.assertEqual([item['id'] for item in res.data], [near.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        art = self.create_art('query', 0)
+        near = self.create_art('near', 0b1)
+        self.client.get(similar_url(art.pk))
+
+        later = self.create_art('later', 0b11)
+        near.delete()
+        res = self.client.get(similar_url(art.pk))
+        self.assertEqual([item['id'] for item in res.data], [later.pk])
+
+        added = self.create_art('added', 0)
+        res = self.client.get(similar_url(art.pk))
+        self.assertEqual(
+            [item['id'] for item in res.data],
+            [added.pk, later.pk]
+        )
+
+    def test_art_without_hash_has_no_similar_arts(self):
+        art = self.create_art('query')
+        self.create_art('other', 0)
+
+        res = self.client.get(similar_url(art.pk))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_invalid_parameters(self):
+        art = self.create_art('query', 0)
+
+        for params in [{'limit': 0}, {'limit': 'x'}, {'max_distance': 65}]:
+            res = self.client.get(similar_url(art.pk), params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,145 @@
+"""
+Test boolean tag expressions on the art list endpoint
+"""
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from portfolio import models
+from portfolio.api.filters import (
+    MAX_DEPTH,
+    TagQueryError,
+    parse_tag_query
+)
+
+
+ART_LIST_URL = reverse('art-list')
+
+
+class TagQueryParserTests(SimpleTestCase):
+    """Test parsing tag expressions"""
+
+    def test_parse_precedence(self):
+        """Test AND binds tighter than OR and NOT applies to one factor"""
+        node = parse_tag_query('1 or 2 AND NOT 3')
+
+        self.assertEqual(
+            node,
+            ('or', [('tag', 1), ('and', [('tag', 2), ('not', ('tag', 3))])])
+        )
+
+    def test_parse_parentheses(self):
+        node = parse_tag_query('(1 OR 2) AND 3')
+
+        self.assertEqual(
+            node,
+            ('and', [('or', [('tag', 1), ('tag', 2)]), ('tag', 3)])
+        )
+
+    def test_parse_invalid_expressions(self):
+        for text in ['', '1 AND', '(1 OR 2', '1 XOR 2', '1;2', '1 2']:
+            with self.assertRaises(TagQueryError):
+                parse_tag_query(text)
+
+    def test_parse_depth_is_limited(self):
+        deep = '(' * MAX_DEPTH + '1' + ')' * MAX_DEPTH
+        self.assertEqual(parse_tag_query(deep), ('tag', 1))
+
+        for text in [f'({deep})', 'NOT ' * (MAX_DEPTH + 1) + '1']:
+            with self.assertRaises(TagQueryError):
+                parse_tag_query(text)
+
+
+class TagQueryEndpointTests(TestCase):
+    """Test filtering arts with tag expressions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123'
+        )
+        artist = models.Artist.objects.create(
+            name='Test Artist',
+            created_by=self.user
+        )
+        self.tags = [
+            models.Tag.objects.create(name=f'Tag {i}', created_by=self.user)
+            for i in range(3)
+        ]
+        self.arts = {}
+        for name, tags in [
+            ('none', []),
+            ('a', [0]),
+            ('ab', [0, 1]),
+            ('abc', [0, 1, 2]),
+            ('c', [2]),
+        ]:
+            art = models.Art.objects.create(
+                title=name,
+                subtitle='Subtitle',
+                type=1,
+                artist=artist,
+                created_by=self.user
+            )
+            art.tags.set([self.tags[i] for i in tags])
+            self.arts[name] = art
+
+    def _query(self, expression):
+        """Run a tag expression, using {0}, {1}... for the tag ids"""
+        ids = [tag.id for tag in self.tags]
+        params = {'tag_query': expression.format(*ids)}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(ART_LIST_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = {art['title'] for art in res.data['results']}
+        return names, ctx.captured_queries
+
+    def test_and(self):
+        names, queries = self._query('{0} AND {1}')
+
+        self.assertEqual(names, {'Ab', 'Abc'})
+        list_sql = queries[-3]['sql'].upper()
+        self.assertIn('HAVING', list_sql)
+        self.assertNotIn('JOIN', list_sql)
+
+    def test_and_not(self):
+        names, queries = self._query('{0} AND {1} AND NOT {2}')
+
+        self.assertEqual(names, {'Ab'})
+        self.assertIn('NOT', queries[-3]['sql'].upper())
+
+    def test_or(self):
+        names, _ = self._query('{1} OR {2}')
+
+        self.assertEqual(names, {'Ab', 'Abc', 'C'})
+
+    def test_not_only(self):
+        names, _ = self._query('NOT {0}')
+
+        self.assertEqual(names, {'None', 'C'})
+
+    def test_nested(self):
+        names, _ = self._query('({0} AND NOT {1}) OR ({2} AND NOT {0})')
+
+        self.assertEqual(names, {'A', 'C'})
+
+    def test_invalid_expression(self):
+        res = self.client.get(ART_LIST_URL, {'tag_query': '1 AND'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tag_query', res.data)
+
+    def test_deeply_nested_expression(self):
+        """Test deep nesting is refused instead of exhausting the stack"""
+        for text in ['(' * 600 + '1' + ')' * 600, 'NOT ' * 1500 + '1']:
+            res = self.client.get(ART_LIST_URL, {'tag_query': text})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('tag_query', res.data)
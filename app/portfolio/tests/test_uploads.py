@@ -0,0 +1,245 @@
+"""
+Test resumable image uploads
+"""
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from portfolio import models, uploads
+from portfolio.images import delete_variants, variant_name
+
+
+def sessions_url(art_id):
+    return reverse('art-create-upload-session', kwargs={'pk': art_id})
+
+
+def session_url(art_id, session_id):
+    return reverse(
+        'art-upload-session',
+        kwargs={'pk': art_id, 'session_id': session_id}
+    )
+
+
+def finalize_url(art_id, session_id):
+    return reverse(
+        'art-finalize-upload-session',
+        kwargs={'pk': art_id, 'session_id': session_id}
+    )
+
+
+class ResumableUploadTests(TestCase):
+    """Test uploading an art image in chunks"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            MEDIA_ROOT=os.path.join(directory.name, 'media'),
+            UPLOAD_SESSION_DIR=os.path.join(directory.name, 'sessions')
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            'user@example.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.art = models.Art.objects.create(
+            title='Test Art Title',
+            subtitle='Test Art Subtitle',
+            type=1,
+            artist=models.Artist.objects.create(
+                name='Test Artist',
+                created_by=self.user
+            ),
+            created_by=self.user
+        )
+
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'red').save(buffer, format='PNG')
+        self.content = buffer.getvalue()
+
+    def _open(self, size=None):
+        res = self.client.post(
+            sessions_url(self.art.id),
+            {'filename': 'painting.png', 'size': size or len(self.content)}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def _patch(self, session_id, offset, body):
+        return self.client.generic(
+            'PATCH',
+            session_url(self.art.id, session_id),
+            body,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_upload_in_chunks_and_finalize(self):
+        session_id = self._open()
+        middle = len(self.content) // 2
+
+        res = self._patch(session_id, 0, self.content[:middle])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Upload-Offset'], str(middle))
+
+        res = self.client.get(session_url(self.art.id, session_id))
+        self.assertEqual(res.data['offset'], middle)
+
+        res = self._patch(session_id, middle, self.content[middle:])
+        self.assertEqual(res.data['offset'], len(self.content))
+
+        res = self.client.post(finalize_url(self.art.id, session_id))
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.art.refresh_from_db()
+        self.addCleanup(self.art.image.delete)
+        self.addCleanup(delete_variants, self.art.image)
+        self.assertTrue(self.art.image.name.startswith('uploads/art/'))
+        with self.art.image.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertEqual(res.data['image_bytes'], len(self.content))
+        self.assertEqual(
+            (self.art.image_width, self.art.image_height),
+            Image.open(BytesIO(self.content)).size
+        )
+        self.assertFalse(
+            models.UploadSession.objects.filter(pk=session_id).exists()
+        )
+
+        call_command('worker', processes=0, burst=True, stdout=StringIO())
+        name = variant_name(self.art.image.name, 'thumbnail', 'webp')
+        self.assertTrue(self.art.image.storage.exists(name))
+
+    def test_wrong_offset_is_a_conflict(self):
+        session_id = self._open()
+        self._patch(session_id, 0, self.content[:10])
+
+        res = self._patch(session_id, 0, self.content[:10])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res['Upload-Offset'], '10')
+
+    def test_chunk_past_size_keeps_what_fits(self):
+        session_id = self._open(size=10)
+
+        res = self._patch(session_id, 0, self.content)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        session = models.UploadSession.objects.get(pk=session_id)
+        self.assertEqual(session.offset, 0)
+
+    def test_incomplete_or_invalid_upload_is_not_finalized(self):
+        session_id = self._open()
+        self._patch(session_id, 0, self.content[:10])
+        res = self.client.post(finalize_url(self.art.id, session_id))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        session_id = self._open(size=10)
+        self._patch(session_id, 0, b'notanimage')
+        res = self.client.post(finalize_url(self.art.id, session_id))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.art.refresh_from_db()
+        self.assertFalse(self.art.image)
+
+    def test_discard_session(self):
+        session_id = self._open()
+
+        res = self.client.delete(session_url(self.art.id, session_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = self.client.get(session_url(self.art.id, session_id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_chunk_being_written_is_locked(self):
+        """Test a second chunk is refused at once instead of waiting"""
+        session_id = self._open()
+        uploads.claim_chunk(session_id, 0)
+
+        res = self._patch(session_id, 0, self.content[:10])
+
+        self.assertEqual(res.status_code, status.HTTP_423_LOCKED)
+        self.assertEqual(res['Upload-Offset'], '0')
+
+        # The lease of a request that died expires
+        models.UploadSession.objects.filter(pk=session_id).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        res = self._patch(session_id, 0, self.content[:10])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Upload-Offset'], '10')
+
+    def test_taken_over_chunk_is_not_committed(self):
+        session_id = self._open()
+        content = self.content
+
+        class Body:
+            """Loses the lease to another request while streaming"""
+            sent = False
+
+            def read(self, size):
+                if self.sent:
+                    models.UploadSession.objects.filter(
+                        pk=session_id
+                    ).update(writer=uuid.uuid4())
+                    return b''
+                self.sent = True
+                return content[:10]
+
+        with self.assertRaises(uploads.SessionBusy):
+            uploads.append_chunk(session_id, 0, Body())
+
+        session = models.UploadSession.objects.get(pk=session_id)
+        self.assertEqual(session.offset, 0)
+
+    def test_stalled_writer_does_not_overwrite_a_takeover(self):
+        """Test a writer whose lease expired mid-stream writes no more"""
+        session_id = self._open()
+        content = self.content
+        path = uploads.session_path(
+            models.UploadSession.objects.get(pk=session_id)
+        )
+
+        class Body:
+            """Stalls past its lease while another request rewrites"""
+            reads = 0
+
+            def read(self, size):
+                self.reads += 1
+                if self.reads == 1:
+                    return b'x' * 10
+                if self.reads == 2:
+                    models.UploadSession.objects.filter(
+                        pk=session_id
+                    ).update(
+                        lease_expires_at=timezone.now() - timedelta(seconds=1)
+                    )
+                    uploads.append_chunk(session_id, 0, BytesIO(content[:20]))
+                    return b'y' * 10
+                return b''
+
+        with mock.patch.object(uploads, 'LEASE_RENEWAL_SECONDS', -1):
+            with self.assertRaises(uploads.SessionBusy):
+                uploads.append_chunk(session_id, 0, Body())
+
+        session = models.UploadSession.objects.get(pk=session_id)
+        self.assertEqual(session.offset, 20)
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), content[:20])
@@ -0,0 +1,201 @@
+"""
+Resumable chunked uploads of art and artist images.
+
+A client creates a session announcing the file size, sends the bytes in
+any number of PATCH requests each starting at the current offset, and
+finalizes the session once everything arrived. A dropped request keeps
+whatever was written, so the client resumes from the offset the server
+reports instead of starting over.
+"""
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from portfolio.images import inspect_upload
+from portfolio.models import UploadSession
+
+
+SESSION_LIFETIME = timedelta(days=1)
+MAX_SIZE = 200 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+# A chunk's writer renews its lease while the body streams in; a lease
+# left by a dead or stalled request expires and the chunk can be sent
+# again. A writer renews before writing once this long has passed since
+# it last held the lease, so it never writes after losing it.
+WRITE_LEASE = timedelta(seconds=60)
+LEASE_RENEWAL_SECONDS = 15
+
+
+class UploadError(Exception):
+    """Raised when a chunk or a finalization is not acceptable"""
+
+
+class OffsetMismatch(UploadError):
+    """Raised when a chunk does not start at the session's offset"""
+
+
+class SessionBusy(UploadError):
+    """Raised when another request is writing a chunk of the session"""
+
+
+def session_path(session):
+    """Return the temporary file holding the bytes of a session"""
+    return os.path.join(settings.UPLOAD_SESSION_DIR, f'{session.pk}.part')
+
+
+def purge_expired_sessions():
+    """Delete expired sessions and their temporary files"""
+    expired = UploadSession.objects.filter(expires_at__lt=timezone.now())
+    for session in expired:
+        discard_session(session)
+
+
+def discard_session(session):
+    """Delete a session and its temporary file"""
+    try:
+        os.remove(session_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def create_session(instance, filename, size, user):
+    """Open a session uploading `size` bytes to instance.image"""
+    if size > MAX_SIZE:
+        raise UploadError(
+            f'Uploads must be at most {MAX_SIZE // 1024 // 1024}MB.'
+        )
+
+    purge_expired_sessions()
+    session = UploadSession.objects.create(
+        model=instance._meta.label_lower,
+        object_id=instance.pk,
+        filename=os.path.basename(filename),
+        size=size,
+        expires_at=timezone.now() + SESSION_LIFETIME,
+        created_by=user
+    )
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    open(session_path(session), 'wb').close()
+    return session
+
+
+def claim_chunk(session_id, offset):
+    """
+    Take the write lease of a session for a chunk starting at `offset`,
+    with one conditional UPDATE. Returns the writer token.
+    """
+    now = timezone.now()
+    writer = uuid.uuid4()
+    claimed = UploadSession.objects.filter(
+        Q(writer=None) | Q(lease_expires_at__lt=now),
+        pk=session_id,
+        offset=offset
+    ).update(writer=writer, lease_expires_at=now + WRITE_LEASE)
+    if claimed:
+        return writer
+
+    session = UploadSession.objects.get(pk=session_id)
+    if session.offset != offset:
+        raise OffsetMismatch(session.offset)
+    raise SessionBusy(session.offset)
+
+
+def lost_lease(session_id):
+    """Return the error of a writer whose lease was taken over"""
+    return SessionBusy(UploadSession.objects.filter(
+        pk=session_id
+    ).values_list('offset', flat=True).first())
+
+
+def renew_lease(session_id, writer):
+    """Extend a held write lease, False when it was lost"""
+    return bool(UploadSession.objects.filter(
+        pk=session_id,
+        writer=writer
+    ).update(lease_expires_at=timezone.now() + WRITE_LEASE))
+
+
+def append_chunk(session_id, offset, stream):
+    """
+    Write a request body at `offset` and return the updated session.
+    The chunk is claimed with a write lease, so concurrent chunks cannot
+    interleave, but no transaction or row lock is held while the body
+    streams in from the client. Bytes read before the client disconnects
+    are kept.
+    """
+    # Taken before each claim or renewal, the lease runs at least until
+    # renewed + WRITE_LEASE
+    renewed = time.monotonic()
+    writer = claim_chunk(session_id, offset)
+    session = UploadSession.objects.get(pk=session_id)
+
+    written = 0
+    error = None
+    try:
+        # Unbuffered, nothing is left to flush once the lease is lost
+        with open(session_path(session), 'r+b', buffering=0) as file:
+            file.seek(offset)
+            file.truncate()
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if offset + written + len(chunk) > session.size:
+                    raise UploadError('Chunk goes past the upload size.')
+                # The read may have stalled past the lease, in which case
+                # another request may own these bytes by now
+                if time.monotonic() - renewed > LEASE_RENEWAL_SECONDS:
+                    renewing = time.monotonic()
+                    if not renew_lease(session_id, writer):
+                        raise lost_lease(session_id)
+                    renewed = renewing
+                # Raw writes may be short
+                view = memoryview(chunk)
+                while view:
+                    view = view[file.write(view):]
+                written += len(chunk)
+    except Exception as exc:
+        # Raised after the offset of what was written is committed
+        error = exc
+
+    session.offset = offset + written
+    committed = UploadSession.objects.filter(
+        pk=session_id,
+        writer=writer
+    ).update(offset=session.offset, writer=None, lease_expires_at=None)
+    if not committed and error is None:
+        error = lost_lease(session_id)
+    if error is not None:
+        raise error
+    return session
+
+
+def finalize_session(session, instance):
+    """
+    Attach a complete upload to instance.image through its upload_to
+    path function, then delete the session.
+    """
+    if session.offset != session.size:
+        raise UploadError(
+            f'Upload is incomplete: {session.offset} of {session.size} bytes.'
+        )
+
+    with open(session_path(session), 'rb') as file:
+        upload = File(file, name=session.filename)
+        try:
+            inspect_upload(upload, MAX_SIZE)
+        except ValueError as error:
+            raise UploadError(str(error))
+        # Assigned like a form upload so the image's metadata is recorded
+        instance.image = upload
+        instance.save()
+
+    discard_session(session)
+    return instance
@@ -4,7 +4,9 @@ from portfolio.api.views import (
     CharacterViewSet,
     TagViewSet,
     ArtistViewSet,
-    ArtViewSet
+    ArtViewSet,
+    SearchViewSet,
+    AutocompleteViewSet
 )
 
 router = routers.SimpleRouter()
@@ -13,5 +15,11 @@ router.register(r'characters', CharacterViewSet)
 router.register(r'tags', TagViewSet)
 router.register(r'artists', ArtistViewSet)
 router.register(r'arts', ArtViewSet)
+router.register(r'search', SearchViewSet, basename='search')
+router.register(
+    r'autocomplete',
+    AutocompleteViewSet,
+    basename='autocomplete'
+)
 
 urlpatterns = router.urls
@@ -10,6 +10,8 @@ from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
 
+from core.tokens import REFRESH, InvalidToken, decode_token
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializaer for the user object."""
@@ -58,3 +60,26 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class TokenPairSerializer(serializers.Serializer):
+    """Serializer for a signed access and refresh token pair."""
+    access = serializers.CharField(read_only=True)
+    refresh = serializers.CharField(read_only=True)
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer validating a signed refresh token."""
+    refresh = serializers.CharField(trim_whitespace=True)
+
+    def validate(self, attrs):
+        """Verify the token and keep its payload."""
+        try:
+            attrs['payload'] = decode_token(attrs['refresh'], REFRESH)
+        except InvalidToken as error:
+            raise serializers.ValidationError(
+                {'refresh': str(error)},
+                code='authorization'
+            )
+
+        return attrs
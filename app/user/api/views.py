@@ -2,15 +2,30 @@
 Views for the user API.
 """
 
-from rest_framework import viewsets, generics, authentication, permissions
+from rest_framework import viewsets, generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
 from django.contrib.auth import get_user_model
 
+from drf_spectacular.utils import extend_schema
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication
+)
+from core.tokens import (
+    claim_token,
+    issue_tokens,
+    revoke_token,
+    signed_token_settings
+)
 from user.api.serializers import (
     UserSerializer,
-    AuthTokenSerializer
+    AuthTokenSerializer,
+    RefreshTokenSerializer,
+    TokenPairSerializer
 )
 
 
@@ -20,17 +35,87 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 class CreateTokenView(ObtainAuthToken):
-    """Create a new auth token for user."""
+    """
+    Create a new auth token for user.
+    Issues a signed token pair instead when signed tokens are enabled.
+    """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        if not signed_token_settings()['ENABLED']:
+            return super().post(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(issue_tokens(serializer.validated_data['user']))
+
+
+class TokenRefreshView(generics.GenericAPIView):
+    """Exchange a signed refresh token for a new token pair."""
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(responses=TokenPairSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data['payload']
+
+        user = get_user_model().objects.filter(
+            pk=payload['uid'],
+            is_active=True
+        ).first()
+        if user is None:
+            return Response(
+                {'refresh': ['User is inactive or deleted.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Refresh tokens are single use
+        if not claim_token(payload):
+            return Response(
+                {'refresh': ['Token has been revoked.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(issue_tokens(user))
+
+
+class TokenRevokeView(generics.GenericAPIView):
+    """Revoke a signed refresh token."""
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(responses={204: None})
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_token(serializer.validated_data['payload'])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SignedTokenAuthentication
+    ]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated user"""
+        if isinstance(
+            self.request.successful_authenticator,
+            SignedTokenAuthentication
+        ):
+            # Signed tokens only carry the user id and staff flag
+            return generics.get_object_or_404(
+                get_user_model(),
+                pk=self.request.user.pk
+            )
+
         return self.request.user
@@ -1,10 +1,40 @@
 server {
     listen ${LISTEN_PORT};
 
+    sendfile on;
+    tcp_nopush on;
+
+    # Media names embed their content hash or a version parameter, so a
+    # URL never points to different bytes and can be cached for a year
+    location /static/media/ {
+        alias /vol/static/media/;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+    # Partial uploads and the resize cache are only reached through Django
+    location /static/uploads/ {
+        deny all;
+    }
+
+    location /static/resized/ {
+        deny all;
+    }
+
     location /static {
         alias /vol/static;
     }
 
+    # Files Django authorized with an X-Accel-Redirect header
+    location /protected-media/ {
+        internal;
+        alias /vol/static/media/;
+    }
+
+    location /resized-images/ {
+        internal;
+        alias /vol/static/resized/;
+    }
+
     location / {
         uwsgi_pass ${APP_HOST}:${APP_PORT};
         include /etc/nginx/uwsgi_params;